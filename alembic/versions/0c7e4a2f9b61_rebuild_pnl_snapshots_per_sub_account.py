@@ -0,0 +1,35 @@
+"""Rebuild P&L snapshots with lots kept per sub-account
+
+Revision ID: 0c7e4a2f9b61
+Revises: f6b2d8a41c37
+Create Date: 2026-10-17 23:40:37.206114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c7e4a2f9b61'
+down_revision: Union[str, None] = 'f6b2d8a41c37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Checkpoints kept lots by symbol alone, so sales in one sub-account closed
+    # lots from another and the daily snapshots built on them are wrong too.
+    # An account without checkpoints is computed on the fly and fully rebuilt
+    # by its next sync.
+    op.execute(sa.text("DELETE FROM pnl_checkpoints"))
+    op.execute(sa.text("DELETE FROM pnl_daily_snapshots"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The previous code cannot read per-sub-account checkpoints; let it rebuild.
+    op.execute(sa.text("DELETE FROM pnl_checkpoints"))
+    op.execute(sa.text("DELETE FROM pnl_daily_snapshots"))
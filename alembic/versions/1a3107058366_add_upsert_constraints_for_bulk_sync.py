@@ -0,0 +1,60 @@
+"""Add unique constraints backing bulk sync upserts
+
+Revision ID: 1a3107058366
+Revises: 5ff98bcc14f4
+Create Date: 2026-10-17 09:12:41.503127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1a3107058366'
+down_revision: Union[str, None] = '5ff98bcc14f4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Drop duplicates left by the old select-then-insert upserts, keeping the
+    # most recently updated row for each key.
+    op.execute("""
+        DELETE FROM tastytrade_positions p
+        USING tastytrade_positions newer
+        WHERE p.account_id = newer.account_id
+          AND p.user_id = newer.user_id
+          AND p.symbol = newer.symbol
+          AND p.created_at IS NOT DISTINCT FROM newer.created_at
+          AND (p.updated_at, p.id) < (newer.updated_at, newer.id)
+    """)
+    op.execute("""
+        DELETE FROM tastytrade_transactions t
+        USING tastytrade_transactions newer
+        WHERE t.account_id = newer.account_id
+          AND t.user_id = newer.user_id
+          AND t.symbol IS NOT DISTINCT FROM newer.symbol
+          AND t.transaction_type = newer.transaction_type
+          AND t.date IS NOT DISTINCT FROM newer.date
+          AND (t.updated_at, t.id) < (newer.updated_at, newer.id)
+    """)
+    op.create_unique_constraint(
+        'uq_tastytrade_positions_snapshot',
+        'tastytrade_positions',
+        ['account_id', 'user_id', 'symbol', 'created_at'],
+    )
+    op.create_unique_constraint(
+        'uq_tastytrade_transactions_natural_key',
+        'tastytrade_transactions',
+        ['account_id', 'user_id', 'symbol', 'transaction_type', 'date'],
+        postgresql_nulls_not_distinct=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_tastytrade_transactions_natural_key', 'tastytrade_transactions', type_='unique')
+    op.drop_constraint('uq_tastytrade_positions_snapshot', 'tastytrade_positions', type_='unique')
@@ -0,0 +1,39 @@
+"""Add position_group_watermarks table
+
+Revision ID: 2f8b6d1e9c47
+Revises: 7d3a9f5c2e18
+Create Date: 2026-10-17 20:52:08.341975
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f8b6d1e9c47'
+down_revision: Union[str, None] = '7d3a9f5c2e18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('position_group_watermarks',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('account_id', sa.UUID(), nullable=False),
+    sa.Column('last_date', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('last_transaction_id', sa.UUID(), nullable=False),
+    sa.Column('open_trades', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['account_id'], ['tastytrade_accounts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('account_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('position_group_watermarks')
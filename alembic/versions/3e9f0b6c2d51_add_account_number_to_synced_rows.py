@@ -0,0 +1,59 @@
+"""Add broker account_number to synced balances, positions and transactions
+
+Revision ID: 3e9f0b6c2d51
+Revises: 8c41d2e7b9a0
+Create Date: 2026-10-17 13:26:50.118342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e9f0b6c2d51'
+down_revision: Union[str, None] = '8c41d2e7b9a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tastytrade_balances', sa.Column('account_number', sa.String(length=32), nullable=True))
+    op.add_column('tastytrade_positions', sa.Column('account_number', sa.String(length=32), nullable=True))
+    op.add_column('tastytrade_transactions', sa.Column('account_number', sa.String(length=32), nullable=True))
+    op.drop_constraint('uq_tastytrade_positions_snapshot', 'tastytrade_positions', type_='unique')
+    op.create_unique_constraint(
+        'uq_tastytrade_positions_snapshot',
+        'tastytrade_positions',
+        ['account_id', 'user_id', 'account_number', 'symbol', 'created_at'],
+        postgresql_nulls_not_distinct=True,
+    )
+    op.drop_constraint('uq_tastytrade_transactions_natural_key', 'tastytrade_transactions', type_='unique')
+    op.create_unique_constraint(
+        'uq_tastytrade_transactions_natural_key',
+        'tastytrade_transactions',
+        ['account_id', 'user_id', 'account_number', 'symbol', 'transaction_type', 'date'],
+        postgresql_nulls_not_distinct=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_tastytrade_transactions_natural_key', 'tastytrade_transactions', type_='unique')
+    op.drop_constraint('uq_tastytrade_positions_snapshot', 'tastytrade_positions', type_='unique')
+    op.drop_column('tastytrade_transactions', 'account_number')
+    op.drop_column('tastytrade_positions', 'account_number')
+    op.drop_column('tastytrade_balances', 'account_number')
+    op.create_unique_constraint(
+        'uq_tastytrade_positions_snapshot',
+        'tastytrade_positions',
+        ['account_id', 'user_id', 'symbol', 'created_at'],
+    )
+    op.create_unique_constraint(
+        'uq_tastytrade_transactions_natural_key',
+        'tastytrade_transactions',
+        ['account_id', 'user_id', 'symbol', 'transaction_type', 'date'],
+        postgresql_nulls_not_distinct=True,
+    )
@@ -0,0 +1,38 @@
+"""Add trade detail columns to tastytrade_transactions
+
+Revision ID: 4b8d2f6e1a93
+Revises: e1f4b7c92a68
+Create Date: 2026-10-17 18:02:41.318207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b8d2f6e1a93'
+down_revision: Union[str, None] = 'e1f4b7c92a68'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tastytrade_transactions', sa.Column('transaction_sub_type', sa.String(length=64), nullable=True))
+    op.add_column('tastytrade_transactions', sa.Column('action', sa.String(length=32), nullable=True))
+    op.add_column('tastytrade_transactions', sa.Column('underlying_symbol', sa.String(length=64), nullable=True))
+    op.add_column('tastytrade_transactions', sa.Column('instrument_type', sa.String(length=32), nullable=True))
+    op.add_column('tastytrade_transactions', sa.Column('value', sa.Float(), nullable=True))
+    op.add_column('tastytrade_transactions', sa.Column('fees', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('tastytrade_transactions', 'fees')
+    op.drop_column('tastytrade_transactions', 'value')
+    op.drop_column('tastytrade_transactions', 'instrument_type')
+    op.drop_column('tastytrade_transactions', 'underlying_symbol')
+    op.drop_column('tastytrade_transactions', 'action')
+    op.drop_column('tastytrade_transactions', 'transaction_sub_type')
@@ -0,0 +1,31 @@
+"""Add transactions_version to tastytrade_accounts
+
+Revision ID: 5d1f3b7e2a90
+Revises: 0c7e4a2f9b61
+Create Date: 2026-10-17 09:12:44.518302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d1f3b7e2a90'
+down_revision: Union[str, None] = '0c7e4a2f9b61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'tastytrade_accounts',
+        sa.Column('transactions_version', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('tastytrade_accounts', 'transactions_version')
@@ -0,0 +1,30 @@
+"""Add match_key to position_groups
+
+Revision ID: 7d3a9f5c2e18
+Revises: c4e7a2b9f351
+Create Date: 2026-10-17 20:14:31.508217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3a9f5c2e18'
+down_revision: Union[str, None] = 'c4e7a2b9f351'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('position_groups', sa.Column('match_key', sa.String(length=255), nullable=True))
+    op.create_unique_constraint('uq_position_groups_account_match_key', 'position_groups', ['account_id', 'match_key'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_position_groups_account_match_key', 'position_groups', type_='unique')
+    op.drop_column('position_groups', 'match_key')
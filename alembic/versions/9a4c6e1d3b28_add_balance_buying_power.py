@@ -0,0 +1,32 @@
+"""Add buying power columns to tastytrade_balances
+
+Revision ID: 9a4c6e1d3b28
+Revises: 5d1f3b7e2a90
+Create Date: 2026-10-17 10:03:27.640915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4c6e1d3b28'
+down_revision: Union[str, None] = '5d1f3b7e2a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tastytrade_balances', sa.Column('derivative_buying_power', sa.Float(), nullable=True))
+    op.add_column('tastytrade_balances', sa.Column('equity_buying_power', sa.Float(), nullable=True))
+    op.add_column('tastytrade_balances', sa.Column('maintenance_requirement', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('tastytrade_balances', 'maintenance_requirement')
+    op.drop_column('tastytrade_balances', 'equity_buying_power')
+    op.drop_column('tastytrade_balances', 'derivative_buying_power')
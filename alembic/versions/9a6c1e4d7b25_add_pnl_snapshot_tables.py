@@ -0,0 +1,52 @@
+"""Add pnl_daily_snapshots and pnl_checkpoints tables
+
+Revision ID: 9a6c1e4d7b25
+Revises: 4b8d2f6e1a93
+Create Date: 2026-10-17 18:47:09.602114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a6c1e4d7b25'
+down_revision: Union[str, None] = '4b8d2f6e1a93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('pnl_daily_snapshots',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('account_id', sa.UUID(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('underlying_symbol', sa.String(length=64), nullable=False),
+    sa.Column('realized_pnl', sa.Float(), nullable=False),
+    sa.Column('fees', sa.Float(), nullable=False),
+    sa.Column('closing_transactions', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['account_id'], ['tastytrade_accounts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('account_id', 'day', 'underlying_symbol', name='uq_pnl_daily_snapshots_account_day_underlying')
+    )
+    op.create_table('pnl_checkpoints',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('account_id', sa.UUID(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('open_lots', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['account_id'], ['tastytrade_accounts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('account_id', 'day', name='uq_pnl_checkpoints_account_day')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('pnl_checkpoints')
+    op.drop_table('pnl_daily_snapshots')
@@ -0,0 +1,28 @@
+"""Add keyset pagination index on position_groups
+
+Revision ID: a3e5c7d9f104
+Revises: 2f8b6d1e9c47
+Create Date: 2026-10-17 21:20:44.917362
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3e5c7d9f104'
+down_revision: Union[str, None] = '2f8b6d1e9c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_position_groups_user_created_id', 'position_groups', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_position_groups_user_created_id', table_name='position_groups')
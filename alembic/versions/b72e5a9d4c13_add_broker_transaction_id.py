@@ -0,0 +1,58 @@
+"""Add broker transaction_id to tastytrade_transactions
+
+Revision ID: b72e5a9d4c13
+Revises: 3e9f0b6c2d51
+Create Date: 2026-10-17 14:41:09.627385
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b72e5a9d4c13'
+down_revision: Union[str, None] = '3e9f0b6c2d51'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tastytrade_transactions', sa.Column('transaction_id', sa.String(length=64), nullable=True))
+    # Rows synced before this column existed have no broker id here. Give each
+    # a stable 'legacy-' placeholder so the column can be NOT NULL and unique.
+    # The next sync re-fetches the full history and hands each placeholder row
+    # the broker id it stands for (crud_tastytrade_transaction.
+    # adopt_legacy_transactions), so the history is not inserted a second time.
+    op.execute(
+        "UPDATE tastytrade_transactions SET transaction_id = 'legacy-' || id::text "
+        "WHERE transaction_id IS NULL"
+    )
+    op.alter_column('tastytrade_transactions', 'transaction_id', existing_type=sa.String(length=64), nullable=False)
+    op.create_index(
+        'ix_tastytrade_transactions_legacy_id',
+        'tastytrade_transactions',
+        ['account_id'],
+        postgresql_where=sa.text("transaction_id LIKE 'legacy-%'"),
+    )
+    op.drop_constraint('uq_tastytrade_transactions_natural_key', 'tastytrade_transactions', type_='unique')
+    op.create_unique_constraint(
+        'uq_tastytrade_transactions_account_transaction_id',
+        'tastytrade_transactions',
+        ['account_id', 'transaction_id'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tastytrade_transactions_legacy_id', table_name='tastytrade_transactions')
+    op.drop_constraint('uq_tastytrade_transactions_account_transaction_id', 'tastytrade_transactions', type_='unique')
+    op.create_unique_constraint(
+        'uq_tastytrade_transactions_natural_key',
+        'tastytrade_transactions',
+        ['account_id', 'user_id', 'account_number', 'symbol', 'transaction_type', 'date'],
+        postgresql_nulls_not_distinct=True,
+    )
+    op.drop_column('tastytrade_transactions', 'transaction_id')
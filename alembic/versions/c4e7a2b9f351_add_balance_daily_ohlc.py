@@ -0,0 +1,42 @@
+"""Add balance_daily_ohlc table
+
+Revision ID: c4e7a2b9f351
+Revises: 9a6c1e4d7b25
+Create Date: 2026-10-17 19:36:52.170448
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e7a2b9f351'
+down_revision: Union[str, None] = '9a6c1e4d7b25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('balance_daily_ohlc',
+    sa.Column('id', sa.UUID(), server_default=sa.text('gen_random_uuid()'), nullable=False),
+    sa.Column('account_id', sa.UUID(), nullable=False),
+    sa.Column('account_number', sa.String(length=32), nullable=True),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('open', sa.Float(), nullable=False),
+    sa.Column('high', sa.Float(), nullable=False),
+    sa.Column('low', sa.Float(), nullable=False),
+    sa.Column('close', sa.Float(), nullable=False),
+    sa.Column('samples', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['account_id'], ['tastytrade_accounts.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('account_id', 'account_number', 'day', name='uq_balance_daily_ohlc_account_day', postgresql_nulls_not_distinct=True)
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('balance_daily_ohlc')
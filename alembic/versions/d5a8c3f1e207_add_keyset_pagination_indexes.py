@@ -0,0 +1,32 @@
+"""Add (account_id, created_at, id) indexes for keyset pagination
+
+Revision ID: d5a8c3f1e207
+Revises: b72e5a9d4c13
+Create Date: 2026-10-17 16:02:33.480921
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a8c3f1e207'
+down_revision: Union[str, None] = 'b72e5a9d4c13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_tastytrade_balances_account_created_id', 'tastytrade_balances', ['account_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_tastytrade_positions_account_created_id', 'tastytrade_positions', ['account_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_tastytrade_transactions_account_created_id', 'tastytrade_transactions', ['account_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tastytrade_transactions_account_created_id', table_name='tastytrade_transactions')
+    op.drop_index('ix_tastytrade_positions_account_created_id', table_name='tastytrade_positions')
+    op.drop_index('ix_tastytrade_balances_account_created_id', table_name='tastytrade_balances')
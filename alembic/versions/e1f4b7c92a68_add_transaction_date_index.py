@@ -0,0 +1,28 @@
+"""Add (account_id, date) index on tastytrade_transactions
+
+Revision ID: e1f4b7c92a68
+Revises: d5a8c3f1e207
+Create Date: 2026-10-17 17:20:14.055763
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1f4b7c92a68'
+down_revision: Union[str, None] = 'd5a8c3f1e207'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_tastytrade_transactions_account_date', 'tastytrade_transactions', ['account_id', 'date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tastytrade_transactions_account_date', table_name='tastytrade_transactions')
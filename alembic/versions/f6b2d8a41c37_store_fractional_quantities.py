@@ -0,0 +1,35 @@
+"""Store transaction and position quantities as floats
+
+Revision ID: f6b2d8a41c37
+Revises: a3e5c7d9f104
+Create Date: 2026-10-17 23:05:12.481906
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6b2d8a41c37'
+down_revision: Union[str, None] = 'a3e5c7d9f104'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Fractional shares were truncated by the integer columns.
+    op.alter_column('tastytrade_transactions', 'quantity', type_=sa.Float(), existing_type=sa.Integer(),
+                    existing_nullable=True, postgresql_using='quantity::double precision')
+    op.alter_column('tastytrade_positions', 'quantity', type_=sa.Float(), existing_type=sa.Integer(),
+                    existing_nullable=False, postgresql_using='quantity::double precision')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column('tastytrade_positions', 'quantity', type_=sa.Integer(), existing_type=sa.Float(),
+                    existing_nullable=False, postgresql_using='round(quantity)::integer')
+    op.alter_column('tastytrade_transactions', 'quantity', type_=sa.Integer(), existing_type=sa.Float(),
+                    existing_nullable=True, postgresql_using='round(quantity)::integer')
@@ -1,16 +1,14 @@
 from fastapi import Depends, HTTPException, status, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
+from app.core.config import settings
 from app.core.security import decode_access_token
-from app.crud.crud_user import get_user_by_email
-from app.db.models.user import User
-from jose import JWTError
+from app.crud.crud_user import get_user_by_id
+from app.services.user_cache import CachedUser, user_cache
 from typing import Optional
+import uuid
 
-async def get_current_user(
-    request: Request,
-    db: AsyncSession = Depends(get_db),
-) -> User:
+def _token_payload(request: Request) -> dict:
     auth_header: Optional[str] = request.headers.get("Authorization")
     if not auth_header or not auth_header.startswith("Bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
@@ -18,16 +16,46 @@ async def get_current_user(
     payload = decode_access_token(token)
     if not payload or "sub" not in payload:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    user_id = payload["sub"]
-    # We need to get user by id, but our CRUD only has get_user_by_email. Let's add get_user_by_id inline for now.
-    from sqlalchemy.future import select
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalars().first()
+    try:
+        payload["sub"] = uuid.UUID(payload["sub"])
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    return payload
+
+async def get_current_user(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+) -> CachedUser:
+    # Returns a detached CachedUser; use crud_user to load a row you intend to modify.
+    user_id = _token_payload(request)["sub"]
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+    user = await get_user_by_id(db, user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
+    if not user.is_active:
+        # Inactive users are never cached, so reactivation takes effect immediately.
+        return CachedUser.from_user(user)
+    return user_cache.set(user)
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(current_user: CachedUser = Depends(get_current_user)) -> CachedUser:
     if not current_user.is_active:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user")
     return current_user
+
+async def get_read_only_user(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+) -> CachedUser:
+    # For GET endpoints. With AUTH_TRUST_TOKEN_CLAIMS the signed claims are taken
+    # at face value until the token expires, so auth never touches the database.
+    if not settings.AUTH_TRUST_TOKEN_CLAIMS:
+        return await get_current_active_user(await get_current_user(request, db))
+    payload = _token_payload(request)
+    return CachedUser(
+        id=payload["sub"],
+        email=payload.get("email", ""),
+        role=payload.get("role", "user"),
+        is_active=True,
+    )
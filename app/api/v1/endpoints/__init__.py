@@ -2,3 +2,8 @@ from .auth import router as auth_router
 from .tastytrade import router as tastytrade_router
 from .strategy import router as strategy_router
 from .position_group import router as position_group_router
+from .monitoring import router as monitoring_router
+from .reports import router as reports_router
+from .market_data import router as market_data_router
+from .portfolio import router as portfolio_router
+from .dashboard import router as dashboard_router
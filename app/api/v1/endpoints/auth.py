@@ -3,13 +3,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
 from app.schemas.user import UserCreate, UserRead
 from app.schemas.token import Token, RefreshToken
-from app.crud.crud_user import get_user_by_email, create_user, update_user_last_login
-from app.core.security import verify_password, create_access_token, create_refresh_token, decode_refresh_token
+from app.crud.crud_user import get_user_by_email, get_user_by_id, create_user, update_user_last_login
+from app.core.security import verify_and_update_password, create_access_token, create_refresh_token, decode_refresh_token
 from fastapi import Body
 from app.api.v1.deps import get_current_active_user
-from sqlalchemy.future import select
-from app.db.models.user import User
 import inspect
+import uuid
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
@@ -29,13 +28,16 @@ async def login(
     db: AsyncSession = Depends(get_db),
 ):
     user = await get_user_by_email(db, email)
-    if not user or not verify_password(password, user.hashed_password):
+    if not user:
+        raise HTTPException(status_code=401, detail="Incorrect email or password")
+    valid, new_hash = await verify_and_update_password(password, user.hashed_password)
+    if not valid:
         raise HTTPException(status_code=401, detail="Incorrect email or password")
     if not user.is_active:
         raise HTTPException(status_code=403, detail="Inactive user")
-    await update_user_last_login(db, user)
-    access_token = create_access_token({"sub": str(user.id), "role": user.role})
-    refresh_token = create_refresh_token({"sub": str(user.id), "role": user.role})
+    await update_user_last_login(db, user, new_password_hash=new_hash)
+    access_token = create_access_token({"sub": str(user.id), "role": user.role, "email": user.email})
+    refresh_token = create_refresh_token({"sub": str(user.id), "role": user.role, "email": user.email})
     return Token(access_token=access_token, refresh_token=refresh_token)
 
 @router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
@@ -51,13 +53,15 @@ async def refresh_token(
     payload = decode_refresh_token(body.refresh_token)
     if not payload or "sub" not in payload:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
-    user_id = payload["sub"]
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalars().first()
+    try:
+        user_id = uuid.UUID(payload["sub"])
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    user = await get_user_by_id(db, user_id)
     if not user or not user.is_active:
         raise HTTPException(status_code=401, detail="User not found or inactive")
-    access_token = create_access_token({"sub": str(user.id), "role": user.role})
-    refresh_token = create_refresh_token({"sub": str(user.id), "role": user.role})
+    access_token = create_access_token({"sub": str(user.id), "role": user.role, "email": user.email})
+    refresh_token = create_refresh_token({"sub": str(user.id), "role": user.role, "email": user.email})
     return Token(access_token=access_token, refresh_token=refresh_token)
 
 @router.get("/me", response_model=UserRead)
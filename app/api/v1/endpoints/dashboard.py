@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+from app.db.session import get_read_db
+from app.api.v1.deps import get_read_only_user
+from app.services.user_cache import CachedUser
+from app.crud.crud_tastytrade_account import get_tastytrade_account_by_id
+from app.schemas.dashboard import DashboardRead
+from app.services.dashboard import dashboard_service
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+@router.get("/{account_id}", response_model=DashboardRead)
+async def get_dashboard(
+    account_id: UUID,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CachedUser = Depends(get_read_only_user),
+):
+    """Balances, position greeks and period P&L in one call; cached until the account's next sync."""
+    account = await get_tastytrade_account_by_id(db, account_id)
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+    if account.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Forbidden: You do not own this account")
+    return await dashboard_service.get(account_id)
@@ -0,0 +1,18 @@
+import logging
+from fastapi import APIRouter, Depends, HTTPException
+from app.api.v1.deps import get_read_only_user
+from app.schemas.market_data import MarketOverviewSchema
+from app.services.market_data import market_data_service
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/market-data", tags=["market_data"])
+
+@router.get("/overview", response_model=MarketOverviewSchema, dependencies=[Depends(get_read_only_user)])
+async def get_market_overview():
+    try:
+        return await market_data_service.get_overview()
+    except Exception as e:
+        # Only reached when nothing is cached yet; otherwise stale quotes are served.
+        logger.warning("Market overview unavailable: %s", e)
+        raise HTTPException(status_code=503, detail="Market data unavailable")
@@ -0,0 +1,13 @@
+from fastapi import APIRouter, Depends
+from app.api.v1.deps import get_read_only_user
+from app.core.security import password_hasher
+from app.db.session import pool_stats
+
+router = APIRouter(prefix="/monitoring", tags=["monitoring"])
+
+@router.get("/pools")
+async def get_pool_stats(current_user=Depends(get_read_only_user)):
+    return {
+        "database": pool_stats(),
+        "password_hasher": password_hasher.stats(),
+    }
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+from app.db.session import get_read_db
+from app.api.v1.deps import get_read_only_user
+from app.services.user_cache import CachedUser
+from app.crud.crud_tastytrade_account import get_tastytrade_account_by_id
+from app.schemas.portfolio import PortfolioMetricsRead
+from app.services.portfolio import get_current_portfolio_metrics
+
+router = APIRouter(prefix="/portfolio", tags=["portfolio"])
+
+@router.get("/metrics/current/{account_id}", response_model=PortfolioMetricsRead)
+async def get_current_metrics(
+    account_id: UUID,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CachedUser = Depends(get_read_only_user),
+):
+    account = await get_tastytrade_account_by_id(db, account_id)
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+    if account.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Forbidden: You do not own this account")
+    return await get_current_portfolio_metrics(db, account_id)
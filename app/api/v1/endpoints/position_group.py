@@ -1,24 +1,35 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from typing import List, Optional
 from uuid import UUID
 from app.schemas.position_group import PositionGroupRead, PositionGroupCreate, PositionGroupUpdate
 from app.crud.crud_position_group import get_position_groups, create_position_group, update_position_group, delete_position_group
-from app.db.session import async_session_maker
+from app.db.session import get_db
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.v1.endpoints.deps import get_current_user
 
 router = APIRouter(prefix="/position-groups", tags=["position_groups"])
 
-async def get_db():
-    async with async_session_maker() as session:
-        yield session
-
 @router.get("/", response_model=List[PositionGroupRead])
 async def list_position_groups(
+    response: Response,
+    account_id: Optional[UUID] = Query(None),
+    strategy_id: Optional[UUID] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page; takes precedence over offset"),
     db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    return await get_position_groups(db, current_user.id)
+    try:
+        groups, next_cursor = await get_position_groups(
+            db, current_user.id, account_id=account_id, strategy_id=strategy_id,
+            limit=limit, cursor=cursor, offset=offset,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return groups
 
 @router.post("/", response_model=PositionGroupRead, status_code=status.HTTP_201_CREATED)
 async def create_new_position_group(
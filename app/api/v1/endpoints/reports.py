@@ -0,0 +1,70 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+from datetime import datetime
+from typing import List, Optional
+from app.db.session import get_read_db
+from app.api.v1.deps import get_read_only_user
+from app.services.user_cache import CachedUser
+from app.crud.crud_tastytrade_account import get_tastytrade_account_by_id
+from app.schemas.pnl import PnlSummaryRead, PnlByUnderlyingRead
+from app.schemas.net_liquidity import NetLiquidityReconciliationRead
+from app.services.net_liquidity import reconcile_net_liquidity
+from app.services.pnl import get_pnl_by_underlying, get_pnl_summary, resolve_period
+
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+PERIOD_PATTERN = "^(daily|mtd|ytd|all_time)$"
+
+async def _owned_account(db: AsyncSession, account_id: UUID, current_user: CachedUser):
+    account = await get_tastytrade_account_by_id(db, account_id)
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+    if account.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Forbidden: You do not own this account")
+    return account
+
+def _period(period: Optional[str], start_date: Optional[datetime], end_date: Optional[datetime]):
+    try:
+        return resolve_period(period, start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/pnl/summary/{account_id}", response_model=PnlSummaryRead)
+async def get_pnl_summary_report(
+    account_id: UUID,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CachedUser = Depends(get_read_only_user),
+    period: Optional[str] = Query("all_time", pattern=PERIOD_PATTERN),
+    start_date: Optional[datetime] = Query(None, description="Overrides period when given"),
+    end_date: Optional[datetime] = Query(None),
+):
+    await _owned_account(db, account_id, current_user)
+    start, end = _period(period, start_date, end_date)
+    return await get_pnl_summary(db, account_id, start, end)
+
+@router.get("/pnl/by-underlying/{account_id}", response_model=List[PnlByUnderlyingRead])
+async def get_pnl_by_underlying_report(
+    account_id: UUID,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CachedUser = Depends(get_read_only_user),
+    period: Optional[str] = Query("all_time", pattern=PERIOD_PATTERN),
+    start_date: Optional[datetime] = Query(None, description="Overrides period when given"),
+    end_date: Optional[datetime] = Query(None),
+):
+    await _owned_account(db, account_id, current_user)
+    start, end = _period(period, start_date, end_date)
+    return await get_pnl_by_underlying(db, account_id, start, end)
+
+@router.get("/net-liquidity/reconciliation/{account_id}", response_model=NetLiquidityReconciliationRead)
+async def get_net_liquidity_reconciliation(
+    account_id: UUID,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CachedUser = Depends(get_read_only_user),
+    period: Optional[str] = Query("mtd", pattern=PERIOD_PATTERN),
+    start_date: Optional[datetime] = Query(None, description="Overrides period when given"),
+    end_date: Optional[datetime] = Query(None),
+):
+    await _owned_account(db, account_id, current_user)
+    start, end = _period(period, start_date, end_date)
+    return await reconcile_net_liquidity(db, account_id, start, end)
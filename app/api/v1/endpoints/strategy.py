@@ -3,16 +3,12 @@ from typing import List
 from uuid import UUID
 from app.schemas.strategy import StrategyRead, StrategyCreate, StrategyUpdate
 from app.crud.crud_strategy import get_strategies, create_strategy, update_strategy, delete_strategy
-from app.db.session import async_session_maker
+from app.db.session import get_db
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.v1.endpoints.deps import get_current_user
 
 router = APIRouter(prefix="/strategies", tags=["strategies"])
 
-async def get_db():
-    async with async_session_maker() as session:
-        yield session
-
 @router.get("/", response_model=List[StrategyRead])
 async def list_strategies(
     db: AsyncSession = Depends(get_db),
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
-from app.db.session import get_db
-from app.api.v1.deps import get_current_active_user
-from app.db.models.user import User
+from app.db.session import get_db, get_read_db
+from app.api.v1.deps import get_current_active_user, get_read_only_user
+from app.services.user_cache import CachedUser
 from app.schemas.tastytrade_account import TastyTradeAccountCreate, TastyTradeAccountRead
 from app.crud.crud_tastytrade_account import (
     create_tastytrade_account,
@@ -11,17 +12,20 @@ from app.crud.crud_tastytrade_account import (
     delete_tastytrade_account,
     get_tastytrade_account_by_id,
 )
-from app.core.encryption import decrypt
-from typing import List
+from app.crud.crud_sync_job import create_sync_job, get_sync_job
+from app.schemas.sync_job import SyncJobRead
+from app.background_tasks.tastytrade_sync import sync_job_runner
+from app.services.tastytrade_service import tastytrade_session_pool
+from typing import List, Optional
+from datetime import datetime
+from app.services.transaction_export import EXPORT_MEDIA_TYPES, export_transactions
 import tastytrade
-from tastytrade.utils import TastytradeError
-from app.crud.crud_tastytrade_balance import upsert_balance, get_latest_balance
-from app.crud.crud_tastytrade_position import upsert_position, get_positions_by_account
-from app.crud.crud_tastytrade_transaction import upsert_transaction, get_transactions_by_account
-from datetime import datetime, timezone
-from sqlalchemy import select
-from app.schemas.tastytrade_balance import TastyTradeBalanceRead
+from app.crud.pagination import get_page_by_account, count_by_account, estimate_count_by_account
+from app.schemas.tastytrade_balance import TastyTradeBalanceRead, BalanceHistoryPoint
+from app.services.balance_history import get_balance_history
 from app.schemas.tastytrade_position import TastyTradePositionRead
+from app.schemas.position_group import IdentifiedStrategyRead, TradeTaggingRead
+from app.services.strategies import identify_position_groups, tag_transaction_history
 from app.schemas.tastytrade_transaction import TastyTradeTransactionRead
 from app.db.models.tastytrade_balance import TastyTradeBalance
 from app.db.models.tastytrade_position import TastyTradePosition
@@ -33,15 +37,15 @@ router = APIRouter(prefix="/tastytrade/accounts", tags=["tastytrade"])
 async def add_tastytrade_account(
     account_in: TastyTradeAccountCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: CachedUser = Depends(get_current_active_user),
 ):
     account = await create_tastytrade_account(db, current_user.id, account_in)
     return account
 
 @router.get("/", response_model=List[TastyTradeAccountRead])
 async def list_tastytrade_accounts(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CachedUser = Depends(get_read_only_user),
 ):
     accounts = await get_tastytrade_accounts_by_user(db, current_user.id)
     return accounts
@@ -50,84 +54,72 @@ async def list_tastytrade_accounts(
 async def remove_tastytrade_account(
     account_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: CachedUser = Depends(get_current_active_user),
 ):
     account = await get_tastytrade_account_by_id(db, account_id)
     if not account or account.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Account not found")
     await delete_tastytrade_account(db, account_id)
+    tastytrade_session_pool.invalidate(account_id)
     return None
 
-@router.post("/sync/{account_id}", status_code=status.HTTP_202_ACCEPTED)
+@router.post("/sync/{account_id}", response_model=SyncJobRead, status_code=status.HTTP_202_ACCEPTED)
 async def sync_tastytrade_account(
     account_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    current_user: CachedUser = Depends(get_current_active_user),
 ):
     account = await get_tastytrade_account_by_id(db, account_id)
     if not account or account.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Account not found")
+    job = await create_sync_job(db, current_user.id, account_id)
+    await sync_job_runner.notify()
+    return job
+
+@router.get("/sync/jobs/{job_id}", response_model=SyncJobRead)
+async def get_sync_job_status(
+    job_id: UUID,
+    # Polled right after the job is queued, so read from the primary, not a lagging replica.
+    db: AsyncSession = Depends(get_db),
+    current_user: CachedUser = Depends(get_read_only_user),
+):
+    job = await get_sync_job(db, job_id)
+    if not job or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Sync job not found")
+    return job
+
+async def _paginate(
+    db: AsyncSession,
+    model,
+    account_id: UUID,
+    response: Response,
+    limit: int,
+    offset: int,
+    cursor: Optional[str],
+    count: str,
+):
     try:
-        username = account.tasty_username
-        password = decrypt(account.tasty_password_encrypted)
-        session = tastytrade.Session(username, password)
-        accounts = await tastytrade.Account.a_get(session)
-        if not accounts:
-            raise HTTPException(status_code=404, detail="No TastyTrade accounts found")
-        tasty_account = accounts[0]
-        # --- Balances ---
-        balances = await tasty_account.a_get_balances(session)
-        balance_data = {
-            "cash": getattr(balances, "cash", None),
-            "long_equity_value": getattr(balances, "long_equity_value", None),
-            "short_equity_value": getattr(balances, "short_equity_value", None),
-            "net_liquidating_value": getattr(balances, "net_liquidating_value", None),
-            "created_at": datetime.now(timezone.utc),
-        }
-        await upsert_balance(db, account_id, current_user.id, balance_data)
-        # --- Positions ---
-        positions = await tasty_account.a_get_positions(session)
-        pos_list = []
-        for pos in positions:
-            pos_data = {
-                "symbol": getattr(pos, "symbol", None),
-                "quantity": getattr(pos, "quantity", None),
-                "average_price": getattr(pos, "average_price", None),
-                "market_value": getattr(pos, "market_value", None),
-                "created_at": datetime.now(timezone.utc),
-            }
-            await upsert_position(db, account_id, current_user.id, pos_data)
-            pos_list.append(pos_data)
-        # --- Transactions ---
-        transactions = await tasty_account.a_get_history(session)
-        txn_list = []
-        for txn in transactions:
-            txn_data = {
-                "transaction_type": getattr(txn, "transaction_type", None),
-                "symbol": getattr(txn, "symbol", None),
-                "quantity": getattr(txn, "quantity", None),
-                "price": getattr(txn, "price", None),
-                "amount": getattr(txn, "amount", None),
-                "date": getattr(txn, "date", None),
-                "created_at": datetime.now(timezone.utc),
-            }
-            await upsert_transaction(db, account_id, current_user.id, txn_data)
-            txn_list.append(txn_data)
-        return {"detail": "Sync successful", "balances": balance_data, "positions": pos_list, "transactions": txn_list}
-    except TastytradeError as e:
-        if "invalid_credentials" in str(e):
-            raise HTTPException(status_code=401, detail="TastyTrade login failed")
-        raise HTTPException(status_code=500, detail=f"Sync failed: {str(e)}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Sync failed: {str(e)}")
+        rows, next_cursor = await get_page_by_account(db, model, account_id, limit, cursor=cursor, offset=offset)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if count == "exact":
+        response.headers["X-Total-Count"] = str(await count_by_account(db, model, account_id))
+    elif count == "estimated":
+        response.headers["X-Total-Count"] = str(await estimate_count_by_account(db, model, account_id))
+        response.headers["X-Total-Count-Estimated"] = "true"
+    return rows
 
 @router.get("/{account_id}/balances", response_model=list[TastyTradeBalanceRead])
 async def get_balances(
     account_id: UUID,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CachedUser = Depends(get_read_only_user),
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page; takes precedence over offset"),
+    count: str = Query("exact", pattern="^(exact|estimated|none)$"),
     response: Response = None,
 ):
     account = await get_tastytrade_account_by_id(db, account_id)
@@ -135,24 +127,45 @@ async def get_balances(
         raise HTTPException(status_code=404, detail="Account not found")
     if account.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Forbidden: You do not own this account")
-    stmt = (
-        select(TastyTradeBalance)
-        .where(TastyTradeBalance.account_id == account_id)
-        .order_by(TastyTradeBalance.created_at.desc())
-    )
-    result = await db.execute(stmt)
-    all_balances = result.scalars().all()
-    response.headers["X-Total-Count"] = str(len(all_balances))
-    balances = all_balances[offset:offset+limit]
+    balances = await _paginate(db, TastyTradeBalance, account_id, response, limit, offset, cursor, count)
     return [TastyTradeBalanceRead.model_validate(b) for b in balances]
 
+@router.get("/{account_id}/balances/history", response_model=list[BalanceHistoryPoint])
+async def get_balance_history_points(
+    account_id: UUID,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CachedUser = Depends(get_read_only_user),
+    points: int = Query(200, ge=2, le=2000, description="Number of evenly spaced OHLC buckets"),
+    start: Optional[datetime] = Query(None),
+    end: Optional[datetime] = Query(None),
+    account_number: Optional[str] = Query(None, description="One sub-account; all sub-accounts are summed by default"),
+):
+    """Net liquidating value as evenly spaced OHLC buckets.
+
+    Summed across sub-accounts, days older than BALANCE_RAW_RETENTION_DAYS are
+    approximate: they are rolled up per sub-account, so high and low are the
+    sums of each sub-account's extremes and bound the account's true range
+    rather than match it. Open and close are exact, as is everything within
+    the raw retention window or for a single sub-account.
+    """
+    account = await get_tastytrade_account_by_id(db, account_id)
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+    if account.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Forbidden: You do not own this account")
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    return await get_balance_history(db, account_id, points, start=start, end=end, account_number=account_number)
+
 @router.get("/{account_id}/positions", response_model=list[TastyTradePositionRead])
 async def get_positions(
     account_id: UUID,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CachedUser = Depends(get_read_only_user),
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page; takes precedence over offset"),
+    count: str = Query("exact", pattern="^(exact|estimated|none)$"),
     response: Response = None,
 ):
     account = await get_tastytrade_account_by_id(db, account_id)
@@ -160,24 +173,72 @@ async def get_positions(
         raise HTTPException(status_code=404, detail="Account not found")
     if account.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Forbidden: You do not own this account")
-    stmt = (
-        select(TastyTradePosition)
-        .where(TastyTradePosition.account_id == account_id)
-        .order_by(TastyTradePosition.created_at.desc())
-    )
-    result = await db.execute(stmt)
-    all_positions = result.scalars().all()
-    response.headers["X-Total-Count"] = str(len(all_positions))
-    positions = all_positions[offset:offset+limit]
+    positions = await _paginate(db, TastyTradePosition, account_id, response, limit, offset, cursor, count)
     return [TastyTradePositionRead.model_validate(p) for p in positions]
 
+@router.post("/{account_id}/positions/identify-strategies", response_model=list[IdentifiedStrategyRead])
+async def identify_position_strategies(
+    account_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user: CachedUser = Depends(get_current_active_user),
+):
+    """Match the latest position snapshot against the default strategies; syncs do this automatically."""
+    account = await get_tastytrade_account_by_id(db, account_id)
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+    if account.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Forbidden: You do not own this account")
+    identified = await identify_position_groups(db, account_id, current_user.id)
+    await db.commit()
+    return identified
+
+@router.post("/{account_id}/transactions/tag-trades", response_model=TradeTaggingRead)
+async def tag_account_trades(
+    account_id: UUID,
+    rebuild: bool = Query(False, description="Drop existing trade groups and re-tag the whole history"),
+    db: AsyncSession = Depends(get_db),
+    current_user: CachedUser = Depends(get_current_active_user),
+):
+    """Tag transactions after the account's watermark into trade groups; syncs do this automatically."""
+    account = await get_tastytrade_account_by_id(db, account_id)
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+    if account.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Forbidden: You do not own this account")
+    summary = await tag_transaction_history(db, account_id, current_user.id, rebuild=rebuild)
+    await db.commit()
+    return summary
+
+@router.get("/{account_id}/transactions/export")
+async def export_account_transactions(
+    account_id: UUID,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CachedUser = Depends(get_read_only_user),
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    start: Optional[datetime] = Query(None, description="Include transactions dated at or after this time"),
+    end: Optional[datetime] = Query(None, description="Include transactions dated before this time"),
+    symbol: Optional[str] = Query(None),
+):
+    account = await get_tastytrade_account_by_id(db, account_id)
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+    if account.user_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Forbidden: You do not own this account")
+    return StreamingResponse(
+        export_transactions(account_id, format, start=start, end=end, symbol=symbol),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="transactions-{account_id}.{format}"'},
+    )
+
 @router.get("/{account_id}/transactions", response_model=list[TastyTradeTransactionRead])
 async def get_transactions(
     account_id: UUID,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: CachedUser = Depends(get_read_only_user),
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page; takes precedence over offset"),
+    count: str = Query("exact", pattern="^(exact|estimated|none)$"),
     response: Response = None,
 ):
     account = await get_tastytrade_account_by_id(db, account_id)
@@ -185,13 +246,5 @@ async def get_transactions(
         raise HTTPException(status_code=404, detail="Account not found")
     if account.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Forbidden: You do not own this account")
-    stmt = (
-        select(TastyTradeTransaction)
-        .where(TastyTradeTransaction.account_id == account_id)
-        .order_by(TastyTradeTransaction.created_at.desc())
-    )
-    result = await db.execute(stmt)
-    all_transactions = result.scalars().all()
-    response.headers["X-Total-Count"] = str(len(all_transactions))
-    transactions = all_transactions[offset:offset+limit]
+    transactions = await _paginate(db, TastyTradeTransaction, account_id, response, limit, offset, cursor, count)
     return [TastyTradeTransactionRead.model_validate(t) for t in transactions]
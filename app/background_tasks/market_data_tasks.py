@@ -0,0 +1,52 @@
+import asyncio
+import logging
+from typing import Optional
+from app.core.metrics import background_context
+from app.services.market_data import MarketDataService, market_data_service, refresh_interval
+
+logger = logging.getLogger(__name__)
+
+class MarketDataRefresher:
+    """Keeps the market overview cache warm.
+
+    Refreshes every MARKET_DATA_REFRESH_OPEN seconds during US market hours
+    and every MARKET_DATA_REFRESH_CLOSED seconds otherwise, waking at the
+    open. A failed refresh leaves the previous quotes in the cache, where
+    they are served as stale until the next attempt succeeds.
+    """
+
+    def __init__(self, service: MarketDataService):
+        self.service = service
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return (
+            self._task is not None
+            and not self._task.done()
+            and self._task.get_loop() is asyncio.get_running_loop()
+        )
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._task = asyncio.create_task(self._run(), name="market-data-refresher", context=background_context())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.service.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Market data refresh failed: %s", e)
+            await asyncio.sleep(refresh_interval())
+
+market_data_refresher = MarketDataRefresher(market_data_service)
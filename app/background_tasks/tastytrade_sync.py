@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import uuid
+from datetime import timedelta
+from typing import List, Optional
+from app.core.config import settings
+from app.core.metrics import background_context
+from app.db.session import async_session_maker
+from app.crud.crud_sync_job import (
+    claim_next_sync_job,
+    complete_sync_job,
+    fail_sync_job,
+    requeue_stale_sync_jobs,
+    touch_sync_job,
+    update_sync_job_progress,
+)
+from app.crud.crud_tastytrade_account import get_tastytrade_account_by_id
+from app.services.sync_service import SyncError, run_account_sync
+
+logger = logging.getLogger(__name__)
+
+class SyncJobRunner:
+    """In-process worker pool that drains the sync_jobs table.
+
+    Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so several
+    workers (and several API processes) can share one queue with nothing but
+    PostgreSQL. Enqueueing wakes an idle worker immediately; otherwise workers
+    poll every SYNC_JOB_POLL_INTERVAL seconds.
+
+    A running job is heartbeated from its own session, since the job's
+    session sits inside one long write transaction. Every sweep_interval
+    seconds, jobs whose heartbeat stopped (their worker died) are requeued,
+    or failed once they have been claimed max_attempts times.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        poll_interval: float,
+        stale_after: timedelta,
+        heartbeat_interval: float,
+        sweep_interval: float,
+        max_attempts: int,
+    ):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self.heartbeat_interval = heartbeat_interval
+        self.sweep_interval = sweep_interval
+        self.max_attempts = max_attempts
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def running(self) -> bool:
+        return (
+            self._loop is asyncio.get_running_loop()
+            and any(not t.done() for t in self._tasks)
+        )
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        # notify() may start the pool from inside a request; its SQL is not the request's.
+        context = background_context()
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"sync-worker-{i}", context=context.copy())
+            for i in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._sweeper(), name="sync-sweeper", context=context.copy()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def notify(self) -> None:
+        # Started lazily as well as from the app lifespan so that any process
+        # serving the enqueue endpoint also drains the queue.
+        await self.start()
+        self._wakeup.set()
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            try:
+                async with async_session_maker() as db:
+                    job = await claim_next_sync_job(db)
+                if job is None:
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                await self._run(job.id, job.account_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Sync worker %d crashed; restarting loop", index)
+                await asyncio.sleep(self.poll_interval)
+
+    async def sweep(self) -> int:
+        async with async_session_maker() as db:
+            requeued, failed = await requeue_stale_sync_jobs(db, self.stale_after, self.max_attempts)
+        if requeued:
+            logger.warning("Requeued %d stale sync jobs", requeued)
+            self._wakeup.set()
+        if failed:
+            logger.warning("Failed %d sync jobs after %d attempts", failed, self.max_attempts)
+        return requeued
+
+    async def _sweeper(self) -> None:
+        while True:
+            try:
+                await self.sweep()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Sync job sweep failed")
+            await asyncio.sleep(self.sweep_interval)
+
+    async def _heartbeat(self, job_id: uuid.UUID) -> None:
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                async with async_session_maker() as db:
+                    await touch_sync_job(db, job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Sync job %s heartbeat failed: %s", job_id, e)
+
+    async def _run(self, job_id: uuid.UUID, account_id: uuid.UUID) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(job_id), name=f"sync-heartbeat-{job_id}")
+        try:
+            await self._run_job(job_id, account_id)
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+
+    async def _run_job(self, job_id: uuid.UUID, account_id: uuid.UUID) -> None:
+        async with async_session_maker() as db:
+            async def on_progress(progress: int, detail: str) -> None:
+                await update_sync_job_progress(db, job_id, progress, detail)
+
+            try:
+                account = await get_tastytrade_account_by_id(db, account_id)
+                if account is None:
+                    raise SyncError("Account not found")
+                written = await run_account_sync(db, account, on_progress)
+            except Exception as e:
+                await db.rollback()
+                message = str(e) if isinstance(e, SyncError) else f"Sync failed: {str(e)}"
+                logger.warning("Sync job %s failed: %s", job_id, message)
+                await fail_sync_job(db, job_id, message)
+                return
+            await complete_sync_job(
+                db,
+                job_id,
+                balances=len(written["balances"]),
+                positions=len(written["positions"]),
+                transactions=len(written["transactions"]),
+            )
+
+sync_job_runner = SyncJobRunner(
+    workers=settings.SYNC_WORKER_COUNT,
+    poll_interval=settings.SYNC_JOB_POLL_INTERVAL,
+    stale_after=timedelta(seconds=settings.SYNC_JOB_STALE_AFTER),
+    heartbeat_interval=settings.SYNC_JOB_HEARTBEAT_INTERVAL,
+    sweep_interval=settings.SYNC_JOB_SWEEP_INTERVAL,
+    max_attempts=settings.SYNC_JOB_MAX_ATTEMPTS,
+)
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    stored_at: float                # time.monotonic()
+
+
+class SwrCache:
+    """
+    In-process stale-while-revalidate cache with request coalescing.
+
+    An entry younger than `fresh_ttl` is served as is. Up to `max_stale`
+    seconds beyond that it is still served, flagged stale, while one
+    background load replaces it. Older (or missing) entries make the caller
+    wait for a load, and a failed load falls back to whatever is cached.
+    Concurrent loads of one key share a single in-flight task, so a burst of
+    requests costs at most one upstream call. `fresh_ttl` may be a callable
+    so the TTL can follow a schedule.
+    """
+
+    def __init__(
+        self,
+        fresh_ttl: Union[float, Callable[[], float]],
+        max_stale: float = 0.0,
+        maxsize: int = 1024,
+    ):
+        self._fresh_ttl = fresh_ttl
+        self.max_stale = max_stale
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        # Bumped by invalidate() so a load started before it cannot store its result.
+        self._generations: dict[Hashable, int] = {}
+
+    @property
+    def fresh_ttl(self) -> float:
+        return self._fresh_ttl() if callable(self._fresh_ttl) else self._fresh_ttl
+
+    def peek(self, key: Hashable) -> Optional[CacheEntry]:
+        return self._entries.get(key)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = CacheEntry(value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+        self._inflight.pop(key, None)
+        self._generations[key] = self._generations.get(key, 0) + 1
+
+    def clear(self) -> None:
+        for key in list(self._entries) + list(self._inflight):
+            self.invalidate(key)
+
+    async def get(self, key: Hashable, loader: Loader) -> tuple[Any, bool]:
+        """Return (value, stale)."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry.stored_at
+            fresh_ttl = self.fresh_ttl
+            if age < fresh_ttl:
+                self._entries.move_to_end(key)
+                return entry.value, False
+            if age < fresh_ttl + self.max_stale:
+                self._revalidate(key, loader)
+                return entry.value, True
+        try:
+            return await self.load(key, loader), False
+        except Exception:
+            if entry is None:
+                raise
+            logger.warning("Serving stale cache entry %r after a failed load", key)
+            return entry.value, True
+
+    async def load(self, key: Hashable, loader: Loader) -> Any:
+        """Load `key` now, joining a load already in flight."""
+        # Shielded: a cancelled caller must not cancel the load others await.
+        return await asyncio.shield(self._task(key, loader))
+
+    def _revalidate(self, key: Hashable, loader: Loader) -> None:
+        self._task(key, loader)
+
+    def _task(self, key: Hashable, loader: Loader) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.create_task(self._run(key, loader))
+            # Failures are logged in _run; mark them retrieved for background loads.
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        return task
+
+    async def _run(self, key: Hashable, loader: Loader) -> Any:
+        generation = self._generations.get(key, 0)
+        try:
+            value = await loader()
+        except Exception:
+            logger.warning("Cache load for %r failed", key, exc_info=True)
+            raise
+        else:
+            if self._generations.get(key, 0) == generation:
+                self.set(key, value)
+            return value
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
@@ -1,7 +1,7 @@
 from pydantic_settings import BaseSettings
 from pydantic import EmailStr, ConfigDict
 from pydantic import Field
-from typing import Optional
+from typing import Dict, Optional
 from pathlib import Path
 
 # Get the project root directory (2 levels up from this file)
@@ -20,10 +20,77 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str
     POSTGRES_DB: str
     SQLALCHEMY_DATABASE_URI: Optional[str] = None
+    # Optional read replica for GET endpoints (full SQLAlchemy URI)
+    DB_READ_REPLICA_URI: Optional[str] = None
+    # Connection pool
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Request/DB instrumentation
+    METRICS_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: float = 250.0
+    SLOW_REQUEST_STATEMENT_COUNT: int = 50
     ENCRYPTION_KEY: str = Field(..., json_schema_extra={"env": "ENCRYPTION_KEY"})
     # Allow test credentials for TastyTrade
     TASTYTRADE_USERNAME: Optional[str] = None
     TASTY_PASSWORD: Optional[str] = None
+    # Background sync job workers
+    SYNC_WORKER_COUNT: int = 2
+    SYNC_JOB_POLL_INTERVAL: float = 5.0
+    # A running job touches updated_at this often; one silent for SYNC_JOB_STALE_AFTER
+    # seconds is presumed orphaned and requeued, up to SYNC_JOB_MAX_ATTEMPTS claims
+    SYNC_JOB_HEARTBEAT_INTERVAL: float = 30.0
+    SYNC_JOB_STALE_AFTER: int = 300
+    SYNC_JOB_MAX_ATTEMPTS: int = 3
+    SYNC_JOB_SWEEP_INTERVAL: float = 60.0
+    # Days of history re-fetched before the newest stored transaction, for late-posting rows
+    SYNC_HISTORY_LOOKBACK_DAYS: int = 5
+    # Cached TastyTrade sessions
+    TASTYTRADE_SESSION_IDLE_TTL: int = 900
+    TASTYTRADE_SESSION_EXPIRY_MARGIN: int = 60
+    # Balance history: raw per-sync rows are rolled into daily OHLC after this many days
+    BALANCE_RAW_RETENTION_DAYS: int = 30
+    # Daily OHLC rows older than this are dropped; 0 keeps them forever
+    BALANCE_DAILY_RETENTION_DAYS: int = 0
+    # Authenticated-user cache
+    USER_CACHE_TTL: float = 60.0
+    USER_CACHE_MAX_SIZE: int = 10000
+    # Let read-only endpoints authenticate from token claims without a DB lookup
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False
+    # Password hashing (changing the argon2 costs rehashes users on their next login)
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536
+    ARGON2_PARALLELISM: int = 4
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    # Market data overview
+    MARKET_DATA_PROVIDER: str = "file"  # "file" (offline fixture) or "finnhub"
+    MARKET_DATA_FILE: str = str(PROJECT_ROOT / "app" / "services" / "market_data" / "sample_quotes.json")
+    EXTERNAL_MARKET_DATA_API_KEY: Optional[str] = None
+    EXTERNAL_MARKET_DATA_API_BASE_URL: str = "https://finnhub.io/api/v1"
+    MARKET_DATA_TIMEOUT: float = 10.0
+    MARKET_INDEX_SYMBOLS: Dict[str, str] = {
+        "SPY": "S&P 500",
+        "QQQ": "NASDAQ 100",
+        "DIA": "Dow Jones",
+        "VIX": "CBOE Volatility Index",
+    }
+    # Background refresh cadence during / outside US market hours
+    MARKET_DATA_REFRESH_OPEN: float = 60.0
+    MARKET_DATA_REFRESH_CLOSED: float = 900.0
+    # How long past its refresh interval cached data may still be served while revalidating
+    MARKET_DATA_MAX_STALE: float = 3600.0
+    MARKET_DATA_REFRESHER_ENABLED: bool = True
+    # Portfolio greeks (annualised, continuously compounded)
+    RISK_FREE_RATE: float = 0.045
+    # Per-account dashboard cache; a completed sync invalidates the account's entry
+    DASHBOARD_CACHE_TTL: float = 300.0
+    DASHBOARD_CACHE_SIZE: int = 1024
+    # Columnar per-account transaction history for analytics, LRU-evicted above this size
+    TRANSACTION_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
 
     model_config = ConfigDict(
         env_file=str(PROJECT_ROOT / ".env"),
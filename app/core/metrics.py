@@ -0,0 +1,239 @@
+import logging
+import threading
+import time
+from contextvars import Context, ContextVar, copy_context
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by a fixed tuple of label values."""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...], buckets: Iterable[float]):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # [bucket counts..., +Inf count, sum]
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted(self._series.items())
+        for label_values, series in items:
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            sep = "," if base else ""
+            for bound, count in zip(self.buckets, series):
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound:g}"}} {count}')
+            lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {series[-2]}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{{{base}}} {series[-2]}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def value(self, *label_values: str) -> float:
+        with self._lock:
+            return self._values.get(label_values, 0.0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_values))
+            lines.append(f"{self.name}{{{base}}} {value:g}" if base else f"{self.name} {value:g}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.",
+    ("method", "route", "status"), LATENCY_BUCKETS,
+)
+REQUEST_DB_STATEMENTS = Histogram(
+    "http_request_db_statements", "SQL statements executed per HTTP request.",
+    ("method", "route"), STATEMENT_COUNT_BUCKETS,
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent in SQL per HTTP request.",
+    ("method", "route"), LATENCY_BUCKETS,
+)
+DB_STATEMENTS = Counter("db_statements_total", "SQL statements executed, including background jobs.")
+DB_SECONDS = Counter("db_statement_seconds_total", "Time spent executing SQL, including background jobs.")
+DB_SLOW_STATEMENTS = Counter("db_slow_statements_total", "SQL statements slower than SLOW_QUERY_THRESHOLD_MS.")
+MARKET_DATA_FETCHES = Counter("market_data_fetches_total", "Upstream market data fetches.", ("provider", "outcome"))
+
+REGISTRY = (
+    REQUEST_LATENCY, REQUEST_DB_STATEMENTS, REQUEST_DB_SECONDS,
+    DB_STATEMENTS, DB_SECONDS, DB_SLOW_STATEMENTS, MARKET_DATA_FETCHES,
+)
+
+
+@dataclass
+class RequestDbStats:
+    statements: int = 0
+    seconds: float = 0.0
+
+
+_request_db_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start_times"].pop()
+    elapsed = time.perf_counter() - started
+    DB_STATEMENTS.inc()
+    DB_SECONDS.inc(elapsed)
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.seconds += elapsed
+    if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+        DB_SLOW_STATEMENTS.inc()
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, " ".join(statement.split())[:500])
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute does not fire for failed statements; drop their start time.
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start_times"):
+        conn.info["query_start_times"].pop()
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+# Full templates of routes included under a prefix, keyed by route object id.
+_route_templates: dict[int, str] = {}
+
+
+def register_route_templates(router, prefix: str) -> None:
+    """Record the full template of each route of a router included under `prefix`.
+
+    FastAPI resolves included routers lazily, so scope["route"].path is the
+    template relative to the include prefix.
+    """
+    for route in router.routes:
+        path = getattr(route, "path", None)
+        if path is not None:
+            _route_templates[id(route)] = prefix + path
+
+
+def _route_template(scope) -> str:
+    # Label by template, never the raw path, to keep series cardinality bounded.
+    route = scope.get("route")
+    return _route_templates.get(id(route)) or getattr(route, "path", None) or "unmatched"
+
+
+def background_context() -> Context:
+    """A copy of the current context detached from any request being measured.
+
+    Long-lived tasks started lazily from inside a request (the sync workers,
+    the market data refresher) would otherwise inherit that request's stats
+    and bill their SQL time to it.
+    """
+    context = copy_context()
+    context.run(_request_db_stats.set, None)
+    return context
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (so streaming bodies are timed to the last chunk) that
+    records latency and SQL usage per route template, and logs requests whose
+    statement count suggests an N+1 pattern.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = RequestDbStats()
+        token = _request_db_stats.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_db_stats.reset(token)
+            route_path = _route_template(scope)
+            method = scope["method"]
+            REQUEST_LATENCY.observe(elapsed, method, route_path, str(status_code))
+            REQUEST_DB_STATEMENTS.observe(stats.statements, method, route_path)
+            REQUEST_DB_SECONDS.observe(stats.seconds, method, route_path)
+            if stats.statements >= settings.SLOW_REQUEST_STATEMENT_COUNT:
+                logger.warning(
+                    "%s %s ran %d SQL statements (%.1f ms in SQL, %.1f ms total)",
+                    method, route_path, stats.statements, stats.seconds * 1000, elapsed * 1000,
+                )
+
+
+def render_metrics(pools: Optional[dict[str, dict]] = None) -> str:
+    """Prometheus text exposition; `pools` is app.db.session.pool_stats()."""
+    lines: list[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for field in ("size", "checked_in", "checked_out", "overflow"):
+        name = f"db_pool_{field}"
+        lines.append(f"# TYPE {name} gauge")
+        for engine_name, stats in (pools or {}).items():
+            lines.append(f'{name}{{engine="{engine_name}"}} {stats[field]}')
+    return "\n".join(lines) + "\n"
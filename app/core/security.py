@@ -1,10 +1,22 @@
 from passlib.context import CryptContext
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Optional
+from typing import Any, Callable, Optional, TypeVar
 from jose import jwt, JWTError
 from app.core.config import settings
+import asyncio
+import threading
+import time
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+T = TypeVar("T")
+
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
 
 # Password hashing
 
@@ -14,6 +26,81 @@ def get_password_hash(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+class PasswordHasherBusy(Exception):
+    """Raised when too many hash/verify calls are already queued."""
+
+class PasswordHasherPool:
+    """
+    Runs argon2 off the event loop on a small dedicated thread pool (argon2-cffi
+    releases the GIL). Submissions beyond `max_pending` are rejected rather than
+    queued, so a login burst degrades into fast 503s instead of a growing backlog.
+    """
+
+    def __init__(self, workers: int = 4, max_pending: int = 32):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._busy_seconds = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="argon2")
+        return self._executor
+
+    def _timed(self, fn: Callable[..., T], *args) -> T:
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._busy_seconds += time.perf_counter() - started
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise PasswordHasherBusy()
+            self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), self._timed, fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "busy_seconds": round(self._busy_seconds, 3),
+            }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+password_hasher = PasswordHasherPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+async def hash_password_async(password: str) -> str:
+    return await password_hasher.run(pwd_context.hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    # Returns (valid, new_hash); new_hash is set when the stored hash uses outdated parameters.
+    return await password_hasher.run(pwd_context.verify_and_update, plain_password, hashed_password)
+
 # JWT helpers
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -0,0 +1,146 @@
+import uuid
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import DateTime, Float, cast, delete, func, union_all
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by, insert as pg_insert
+from sqlalchemy.engine import Row
+from app.db.models.balance_history import BalanceDailyOhlc
+from app.db.models.tastytrade_balance import TastyTradeBalance
+from typing import List, Optional
+from datetime import date, datetime, time, timedelta, timezone
+
+# Writers below do not commit; they run inside the sync transaction.
+
+async def rollup_balances_before(db: AsyncSession, account_id: uuid.UUID, cutoff: datetime) -> int:
+    """Fold raw balance rows older than `cutoff` into daily OHLC rows, then delete them."""
+    nlv = TastyTradeBalance.net_liquidating_value
+    created = TastyTradeBalance.created_at
+    day = func.date(func.timezone("UTC", created))
+    rollup = (
+        select(
+            TastyTradeBalance.account_id,
+            TastyTradeBalance.account_number,
+            day,
+            func.array_agg(aggregate_order_by(nlv, created.asc()), type_=ARRAY(Float))[1],
+            func.max(nlv),
+            func.min(nlv),
+            func.array_agg(aggregate_order_by(nlv, created.desc()), type_=ARRAY(Float))[1],
+            func.count(),
+        )
+        .where(TastyTradeBalance.account_id == account_id, created < cutoff, nlv.is_not(None))
+        .group_by(TastyTradeBalance.account_id, TastyTradeBalance.account_number, day)
+    )
+    stmt = pg_insert(BalanceDailyOhlc).from_select(
+        ["account_id", "account_number", "day", "open", "high", "low", "close", "samples"], rollup
+    )
+    # A day already rolled up (e.g. after a retention change) is merged, not replaced.
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_balance_daily_ohlc_account_day",
+        set_={
+            "high": func.greatest(BalanceDailyOhlc.high, stmt.excluded.high),
+            "low": func.least(BalanceDailyOhlc.low, stmt.excluded.low),
+            "close": stmt.excluded.close,
+            "samples": BalanceDailyOhlc.samples + stmt.excluded.samples,
+            "updated_at": func.now(),
+        },
+    )
+    await db.execute(stmt)
+    result = await db.execute(
+        delete(TastyTradeBalance).where(TastyTradeBalance.account_id == account_id, created < cutoff)
+    )
+    return result.rowcount
+
+async def delete_daily_ohlc_before(db: AsyncSession, account_id: uuid.UUID, day: date) -> int:
+    result = await db.execute(
+        delete(BalanceDailyOhlc).where(BalanceDailyOhlc.account_id == account_id, BalanceDailyOhlc.day < day)
+    )
+    return result.rowcount
+
+async def get_daily_ohlc(
+    db: AsyncSession,
+    account_id: uuid.UUID,
+    start: Optional[date],
+    end: Optional[date],
+    account_number: Optional[str] = None,
+) -> List[Row]:
+    # (day, open, high, low, close) over [start, end), summed across sub-accounts unless one is given.
+    # Summed high/low add up each sub-account's extremes, which may fall at different
+    # times, so they bound the account's range; open and close are exact.
+    columns = (
+        (BalanceDailyOhlc.open, BalanceDailyOhlc.high, BalanceDailyOhlc.low, BalanceDailyOhlc.close)
+        if account_number is not None
+        else tuple(func.sum(c) for c in (BalanceDailyOhlc.open, BalanceDailyOhlc.high, BalanceDailyOhlc.low, BalanceDailyOhlc.close))
+    )
+    stmt = select(BalanceDailyOhlc.day, *columns).where(BalanceDailyOhlc.account_id == account_id)
+    if account_number is not None:
+        stmt = stmt.where(BalanceDailyOhlc.account_number == account_number)
+    else:
+        stmt = stmt.group_by(BalanceDailyOhlc.day)
+    if start is not None:
+        stmt = stmt.where(BalanceDailyOhlc.day >= start)
+    if end is not None:
+        stmt = stmt.where(BalanceDailyOhlc.day < end)
+    result = await db.execute(stmt.order_by(BalanceDailyOhlc.day))
+    return result.all()
+
+async def get_balance_points(
+    db: AsyncSession,
+    account_id: uuid.UUID,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    account_number: Optional[str] = None,
+) -> List[Row]:
+    # (created_at, net_liquidating_value); sub-accounts of one sync share created_at and are summed.
+    nlv = TastyTradeBalance.net_liquidating_value
+    stmt = select(
+        TastyTradeBalance.created_at, nlv if account_number is not None else func.sum(nlv)
+    ).where(TastyTradeBalance.account_id == account_id, nlv.is_not(None))
+    if account_number is not None:
+        stmt = stmt.where(TastyTradeBalance.account_number == account_number)
+    else:
+        stmt = stmt.group_by(TastyTradeBalance.created_at)
+    if start is not None:
+        stmt = stmt.where(TastyTradeBalance.created_at >= start)
+    if end is not None:
+        stmt = stmt.where(TastyTradeBalance.created_at < end)
+    result = await db.execute(stmt.order_by(TastyTradeBalance.created_at))
+    return result.all()
+
+async def get_net_liquidity_near(
+    db: AsyncSession,
+    account_id: uuid.UUID,
+    at: datetime,
+    after: bool = False,
+) -> Optional[Row]:
+    """(at, net_liquidity) of the last balance at or before `at`, or the first at or after it.
+
+    Looks at both raw snapshots (summed across the sub-accounts of one sync)
+    and rolled-up days, where a day's close counts as of the following
+    midnight and its open as of its own midnight. Each side is one index
+    probe; the nearer of the two wins.
+    """
+    nlv = TastyTradeBalance.net_liquidating_value
+    created = TastyTradeBalance.created_at
+    raw = (
+        select(created.label("at"), func.sum(nlv).label("net_liquidity"))
+        .where(TastyTradeBalance.account_id == account_id, nlv.is_not(None), created >= at if after else created <= at)
+        .group_by(created)
+        .order_by(created.asc() if after else created.desc())
+        .limit(1)
+    )
+    day = BalanceDailyOhlc.day
+    at_day = at.astimezone(timezone.utc).date()
+    if after and at.astimezone(timezone.utc).time() != time.min:
+        at_day += timedelta(days=1)
+    midnight = func.timezone("UTC", cast(day + (0 if after else 1), DateTime))
+    daily = (
+        select(midnight.label("at"), func.sum(BalanceDailyOhlc.open if after else BalanceDailyOhlc.close).label("net_liquidity"))
+        .where(BalanceDailyOhlc.account_id == account_id, day >= at_day if after else day < at_day)
+        .group_by(day)
+        .order_by(day.asc() if after else day.desc())
+        .limit(1)
+    )
+    both = union_all(select(raw.subquery()), select(daily.subquery())).subquery()
+    stmt = select(both.c.at, both.c.net_liquidity).order_by(both.c.at.asc() if after else both.c.at.desc()).limit(1)
+    result = await db.execute(stmt)
+    return result.first()
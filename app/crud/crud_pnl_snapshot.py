@@ -0,0 +1,80 @@
+import uuid
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import delete, func, insert, true
+from app.db.models.pnl_snapshot import PnlCheckpoint, PnlDailySnapshot
+from typing import Dict, List, Optional
+from datetime import date
+
+# Rows per INSERT statement; keeps bind parameters under the asyncpg limit.
+BULK_CHUNK_SIZE = 1000
+
+# Writers below do not commit: P&L is refreshed inside the sync transaction.
+
+async def get_latest_checkpoint(db: AsyncSession, account_id: uuid.UUID, before: Optional[date] = None) -> Optional[PnlCheckpoint]:
+    stmt = select(PnlCheckpoint).where(PnlCheckpoint.account_id == account_id)
+    if before is not None:
+        stmt = stmt.where(PnlCheckpoint.day < before)
+    result = await db.execute(stmt.order_by(PnlCheckpoint.day.desc()).limit(1))
+    return result.scalars().first()
+
+async def delete_pnl_from(db: AsyncSession, account_id: uuid.UUID, day: Optional[date]) -> None:
+    # Drops snapshots and checkpoints on or after `day` (everything when day is None).
+    for model in (PnlDailySnapshot, PnlCheckpoint):
+        stmt = delete(model).where(model.account_id == account_id)
+        if day is not None:
+            stmt = stmt.where(model.day >= day)
+        await db.execute(stmt)
+
+async def bulk_insert_snapshots(db: AsyncSession, account_id: uuid.UUID, rows: List[dict]) -> int:
+    values = [{"id": uuid.uuid4(), "account_id": account_id, **r} for r in rows]
+    for start in range(0, len(values), BULK_CHUNK_SIZE):
+        await db.execute(insert(PnlDailySnapshot).values(values[start:start + BULK_CHUNK_SIZE]))
+    return len(values)
+
+async def add_checkpoint(db: AsyncSession, account_id: uuid.UUID, day: date, open_lots: dict) -> None:
+    db.add(PnlCheckpoint(account_id=account_id, day=day, open_lots=open_lots))
+    await db.flush()
+
+async def get_pnl_totals(
+    db: AsyncSession,
+    account_id: uuid.UUID,
+    start: Optional[date],
+    end: Optional[date],
+    by_underlying: bool = False,
+) -> list:
+    """Sums over [start, end) days; one row overall, or one per underlying."""
+    columns = [
+        func.coalesce(func.sum(PnlDailySnapshot.realized_pnl), 0.0).label("realized_pnl"),
+        func.coalesce(func.sum(PnlDailySnapshot.fees), 0.0).label("fees_total"),
+        func.coalesce(func.sum(PnlDailySnapshot.closing_transactions), 0).label("closing_transactions"),
+    ]
+    if by_underlying:
+        columns.insert(0, PnlDailySnapshot.underlying_symbol)
+    stmt = select(*columns).where(PnlDailySnapshot.account_id == account_id)
+    if start is not None:
+        stmt = stmt.where(PnlDailySnapshot.day >= start)
+    if end is not None:
+        stmt = stmt.where(PnlDailySnapshot.day < end)
+    if by_underlying:
+        stmt = stmt.group_by(PnlDailySnapshot.underlying_symbol).order_by(PnlDailySnapshot.underlying_symbol)
+    result = await db.execute(stmt)
+    return result.all()
+
+async def get_pnl_period_totals(
+    db: AsyncSession,
+    account_id: uuid.UUID,
+    starts: Dict[str, Optional[date]],
+    end: Optional[date],
+) -> Dict[str, tuple]:
+    """(realized, fees, closing) over [start, end) for several start days in one scan."""
+    columns = []
+    for name, start in starts.items():
+        condition = PnlDailySnapshot.day >= start if start is not None else true()
+        for column in (PnlDailySnapshot.realized_pnl, PnlDailySnapshot.fees, PnlDailySnapshot.closing_transactions):
+            columns.append(func.coalesce(func.sum(column).filter(condition), 0))
+    stmt = select(*columns).where(PnlDailySnapshot.account_id == account_id)
+    if end is not None:
+        stmt = stmt.where(PnlDailySnapshot.day < end)
+    row = (await db.execute(stmt)).one()
+    return {name: tuple(row[i * 3:i * 3 + 3]) for i, name in enumerate(starts)}
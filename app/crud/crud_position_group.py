@@ -1,16 +1,57 @@
 import uuid
-from typing import List, Optional
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete
-from app.db.models.position_group import PositionGroup
+from sqlalchemy import select, delete, exists, insert, literal_column, tuple_, update
+from sqlalchemy.orm import selectinload
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.db.models.position_group import PositionGroup, PositionGroupWatermark
 from app.db.models.position_group_transaction import PositionGroupTransaction
+from app.crud.pagination import decode_cursor, encode_cursor
 from app.schemas.position_group import PositionGroupCreate, PositionGroupUpdate
 
-async def get_position_groups(session: AsyncSession, user_id: uuid.UUID) -> List[PositionGroup]:
+async def get_position_groups(
+    session: AsyncSession,
+    user_id: uuid.UUID,
+    account_id: Optional[uuid.UUID] = None,
+    strategy_id: Optional[uuid.UUID] = None,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+) -> Tuple[List[PositionGroup], Optional[str]]:
+    """One page of groups, newest first, with their links.
+
+    The groups, then every link of the page through selectinload's IN (one
+    query per 500 groups), so the cost does not grow with the number of
+    links. Pages by keyset cursor (see app.crud.pagination) or offset.
+    """
+    stmt = select(PositionGroup).where(PositionGroup.user_id == user_id).options(selectinload(PositionGroup.links))
+    if account_id is not None:
+        stmt = stmt.where(PositionGroup.account_id == account_id)
+    if strategy_id is not None:
+        stmt = stmt.where(PositionGroup.strategy_id == strategy_id)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(PositionGroup.created_at, PositionGroup.id) < tuple_(created_at, row_id))
+    elif offset:
+        stmt = stmt.offset(offset)
+    stmt = stmt.order_by(PositionGroup.created_at.desc(), PositionGroup.id.desc()).limit(limit + 1)
+    result = await session.execute(stmt)
+    groups = result.scalars().all()
+    next_cursor = None
+    if len(groups) > limit:
+        groups = groups[:limit]
+        next_cursor = encode_cursor(groups[-1].created_at, groups[-1].id)
+    return groups, next_cursor
+
+async def _get_group_with_links(session: AsyncSession, user_id: uuid.UUID, group_id: uuid.UUID) -> Optional[PositionGroup]:
     result = await session.execute(
-        select(PositionGroup).where(PositionGroup.user_id == user_id)
+        select(PositionGroup)
+        .where(PositionGroup.id == group_id, PositionGroup.user_id == user_id)
+        .options(selectinload(PositionGroup.links))
+        .execution_options(populate_existing=True)
     )
-    return result.scalars().all()
+    return result.scalar_one_or_none()
 
 async def create_position_group(session: AsyncSession, user_id: uuid.UUID, data: PositionGroupCreate) -> PositionGroup:
     group = PositionGroup(
@@ -22,15 +63,9 @@ async def create_position_group(session: AsyncSession, user_id: uuid.UUID, data:
     )
     session.add(group)
     await session.flush()
-    for tx_id in data.transaction_ids:
-        session.add(PositionGroupTransaction(
-            id=uuid.uuid4(),
-            group_id=group.id,
-            transaction_id=tx_id,
-        ))
+    await bulk_insert_group_links(session, [(group.id, tx_id) for tx_id in data.transaction_ids])
     await session.commit()
-    await session.refresh(group)
-    return group
+    return await _get_group_with_links(session, user_id, group.id)
 
 async def update_position_group(session: AsyncSession, user_id: uuid.UUID, group_id: uuid.UUID, data: PositionGroupUpdate) -> Optional[PositionGroup]:
     result = await session.execute(
@@ -49,15 +84,9 @@ async def update_position_group(session: AsyncSession, user_id: uuid.UUID, group
             delete(PositionGroupTransaction).where(PositionGroupTransaction.group_id == group_id)
         )
         # Add new links
-        for tx_id in data.transaction_ids:
-            session.add(PositionGroupTransaction(
-                id=uuid.uuid4(),
-                group_id=group_id,
-                transaction_id=tx_id,
-            ))
+        await bulk_insert_group_links(session, [(group_id, tx_id) for tx_id in data.transaction_ids])
     await session.commit()
-    await session.refresh(group)
-    return group
+    return await _get_group_with_links(session, user_id, group_id)
 
 async def delete_position_group(session: AsyncSession, user_id: uuid.UUID, group_id: uuid.UUID) -> bool:
     result = await session.execute(
@@ -69,3 +98,96 @@ async def delete_position_group(session: AsyncSession, user_id: uuid.UUID, group
     await session.delete(group)
     await session.commit()
     return True
+
+# Rows per INSERT statement; keeps bind parameters under the asyncpg limit.
+BULK_CHUNK_SIZE = 1000
+
+async def upsert_identified_groups(
+    session: AsyncSession, user_id: uuid.UUID, account_id: uuid.UUID, rows: List[dict]
+) -> List[tuple]:
+    """Insert groups by (account_id, match_key); groups that already exist only get updated_at bumped.
+
+    Returns (id, match_key, created) per row. Does not commit.
+    """
+    now = datetime.now(timezone.utc)
+    values = [
+        {"id": uuid.uuid4(), "user_id": user_id, "account_id": account_id, "created_at": now, "updated_at": now, **r}
+        for r in rows
+    ]
+    saved = []
+    for start in range(0, len(values), BULK_CHUNK_SIZE):
+        stmt = pg_insert(PositionGroup).values(values[start:start + BULK_CHUNK_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_position_groups_account_match_key",
+            set_={"updated_at": stmt.excluded.updated_at},
+        ).returning(PositionGroup.id, PositionGroup.match_key, literal_column("xmax = 0"))
+        saved.extend(tuple(row) for row in (await session.execute(stmt)).all())
+    return saved
+
+# Trade groups built from transaction history; see app.services.strategies.tagging.
+TRADE_MATCH_KEY_PREFIX = "trade|"
+
+async def retire_identified_groups(session: AsyncSession, account_id: uuid.UUID, keep: List[str]) -> int:
+    """Drop identified groups whose match_key is not in `keep`; returns how many. Does not commit.
+
+    Groups the user has linked transactions to are kept as hand-made groups
+    (match_key cleared) so their links survive.
+    """
+    stale = (
+        PositionGroup.account_id == account_id,
+        PositionGroup.match_key.is_not(None),
+        ~PositionGroup.match_key.startswith(TRADE_MATCH_KEY_PREFIX),
+        PositionGroup.match_key.not_in(keep),
+    )
+    linked = exists().where(PositionGroupTransaction.group_id == PositionGroup.id)
+    kept = await session.execute(
+        update(PositionGroup).where(*stale, linked).values(match_key=None, updated_at=datetime.now(timezone.utc))
+    )
+    deleted = await session.execute(delete(PositionGroup).where(*stale, ~linked))
+    return kept.rowcount + deleted.rowcount
+
+async def bulk_insert_groups(session: AsyncSession, rows: List[dict]) -> int:
+    # One executemany; SQLAlchemy batches it into multi-row INSERTs. Does not commit.
+    if rows:
+        await session.execute(insert(PositionGroup), rows)
+    return len(rows)
+
+async def bulk_insert_group_links(session: AsyncSession, links: List[tuple]) -> int:
+    """Link (group_id, transaction_id) pairs with one executemany. Does not commit."""
+    now = datetime.now(timezone.utc)
+    if links:
+        await session.execute(insert(PositionGroupTransaction), [
+            {"id": uuid.uuid4(), "group_id": group_id, "transaction_id": transaction_id, "created_at": now}
+            for group_id, transaction_id in links
+        ])
+    return len(links)
+
+async def get_tag_watermark(session: AsyncSession, account_id: uuid.UUID) -> Optional[PositionGroupWatermark]:
+    result = await session.execute(
+        select(PositionGroupWatermark).where(PositionGroupWatermark.account_id == account_id)
+    )
+    return result.scalar_one_or_none()
+
+async def save_tag_watermark(
+    session: AsyncSession,
+    account_id: uuid.UUID,
+    last_date: datetime,
+    last_transaction_id: uuid.UUID,
+    open_trades: dict,
+) -> None:
+    values = {
+        "last_date": last_date,
+        "last_transaction_id": last_transaction_id,
+        "open_trades": open_trades,
+        "updated_at": datetime.now(timezone.utc),
+    }
+    stmt = pg_insert(PositionGroupWatermark).values(id=uuid.uuid4(), account_id=account_id, **values)
+    await session.execute(stmt.on_conflict_do_update(index_elements=["account_id"], set_=values))
+
+async def delete_trade_groups(session: AsyncSession, account_id: uuid.UUID) -> None:
+    # Drops every tagged trade group (links cascade) and the watermark. Does not commit.
+    await session.execute(delete(PositionGroup).where(
+        PositionGroup.account_id == account_id,
+        PositionGroup.match_key.startswith(TRADE_MATCH_KEY_PREFIX),
+    ))
+    await session.execute(delete(PositionGroupWatermark).where(PositionGroupWatermark.account_id == account_id))
@@ -1,5 +1,5 @@
 import uuid
-from typing import List, Optional
+from typing import Dict, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete
 from app.db.models.strategy import Strategy
@@ -11,6 +11,12 @@ async def get_strategies(session: AsyncSession, user_id: uuid.UUID) -> List[Stra
     )
     return result.scalars().all()
 
+async def get_default_strategy_ids(session: AsyncSession, names: List[str]) -> Dict[str, uuid.UUID]:
+    result = await session.execute(
+        select(Strategy.name, Strategy.id).where(Strategy.is_default == True, Strategy.name.in_(names))
+    )
+    return {name: strategy_id for name, strategy_id in result.all()}
+
 async def create_strategy(session: AsyncSession, user_id: uuid.UUID, data: StrategyCreate) -> Strategy:
     strategy = Strategy(
         id=uuid.uuid4(),
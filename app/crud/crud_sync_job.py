@@ -0,0 +1,146 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy import func, update
+from sqlalchemy.orm import aliased
+from app.db.models.sync_job import SyncJob, SYNC_JOB_QUEUED, SYNC_JOB_RUNNING, SYNC_JOB_COMPLETED, SYNC_JOB_FAILED
+from typing import Optional
+
+# Advisory lock classes (first key of the two-key form); the second key is the account.
+ENQUEUE_LOCK = 1
+WRITE_LOCK = 2
+
+async def _lock_account(db: AsyncSession, lock_class: int, account_id: uuid.UUID) -> None:
+    # Held until the transaction ends; hash collisions only serialize unrelated accounts.
+    await db.execute(select(func.pg_advisory_xact_lock(lock_class, func.hashtext(str(account_id)))))
+
+async def lock_account_sync_write(db: AsyncSession, account_id: uuid.UUID) -> None:
+    """Serialize sync writes for one account across workers and processes.
+
+    Caller owns the transaction; the lock is released when it commits or rolls back.
+    """
+    await _lock_account(db, WRITE_LOCK, account_id)
+
+async def create_sync_job(db: AsyncSession, user_id: uuid.UUID, account_id: uuid.UUID) -> SyncJob:
+    # A job still waiting in the queue will fetch everything a second one would.
+    await _lock_account(db, ENQUEUE_LOCK, account_id)
+    result = await db.execute(
+        select(SyncJob)
+        .where(SyncJob.account_id == account_id, SyncJob.status == SYNC_JOB_QUEUED)
+        .order_by(SyncJob.created_at)
+        .limit(1)
+    )
+    job = result.scalars().first()
+    if job is not None:
+        await db.commit()
+        return job
+    job = SyncJob(user_id=user_id, account_id=account_id, status=SYNC_JOB_QUEUED, detail="Queued")
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+async def get_sync_job(db: AsyncSession, job_id: uuid.UUID) -> Optional[SyncJob]:
+    result = await db.execute(select(SyncJob).where(SyncJob.id == job_id))
+    return result.scalars().first()
+
+async def claim_next_sync_job(db: AsyncSession) -> Optional[SyncJob]:
+    # SKIP LOCKED lets concurrent workers (in this or another process) each
+    # take a different queued job without blocking on one another. Jobs for an
+    # account that is already syncing wait; two claims racing past this check
+    # still write one at a time under lock_account_sync_write.
+    running = aliased(SyncJob)
+    stmt = (
+        select(SyncJob)
+        .where(
+            SyncJob.status == SYNC_JOB_QUEUED,
+            ~select(running.id).where(
+                running.account_id == SyncJob.account_id, running.status == SYNC_JOB_RUNNING
+            ).exists(),
+        )
+        .order_by(SyncJob.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(stmt)
+    job = result.scalars().first()
+    if not job:
+        await db.rollback()
+        return None
+    job.status = SYNC_JOB_RUNNING
+    job.attempts += 1
+    job.started_at = datetime.now(timezone.utc)
+    job.detail = "Starting"
+    await db.commit()
+    return job
+
+async def update_sync_job_progress(db: AsyncSession, job_id: uuid.UUID, progress: int, detail: str) -> None:
+    await db.execute(
+        update(SyncJob).where(SyncJob.id == job_id).values(
+            progress=progress, detail=detail, updated_at=datetime.now(timezone.utc)
+        )
+    )
+    await db.commit()
+
+async def complete_sync_job(db: AsyncSession, job_id: uuid.UUID, balances: int, positions: int, transactions: int) -> None:
+    now = datetime.now(timezone.utc)
+    await db.execute(
+        update(SyncJob).where(SyncJob.id == job_id).values(
+            status=SYNC_JOB_COMPLETED,
+            progress=100,
+            detail="Sync successful",
+            balances_written=balances,
+            positions_written=positions,
+            transactions_written=transactions,
+            finished_at=now,
+            updated_at=now,
+        )
+    )
+    await db.commit()
+
+async def fail_sync_job(db: AsyncSession, job_id: uuid.UUID, error: str) -> None:
+    now = datetime.now(timezone.utc)
+    await db.execute(
+        update(SyncJob).where(SyncJob.id == job_id).values(
+            status=SYNC_JOB_FAILED, detail="Sync failed", error=error[:1024], finished_at=now, updated_at=now
+        )
+    )
+    await db.commit()
+
+async def touch_sync_job(db: AsyncSession, job_id: uuid.UUID) -> None:
+    # Heartbeat from the worker running the job; a job no longer running is left alone.
+    await db.execute(
+        update(SyncJob)
+        .where(SyncJob.id == job_id, SyncJob.status == SYNC_JOB_RUNNING)
+        .values(updated_at=datetime.now(timezone.utc))
+    )
+    await db.commit()
+
+async def requeue_stale_sync_jobs(db: AsyncSession, stale_after: timedelta, max_attempts: int) -> tuple[int, int]:
+    """Hand jobs whose worker stopped heartbeating back to the queue.
+
+    A job already claimed `max_attempts` times is failed instead, so one that
+    crashes its worker every time does not loop forever. Returns the number
+    of jobs requeued and failed.
+    """
+    now = datetime.now(timezone.utc)
+    stale = (SyncJob.status == SYNC_JOB_RUNNING, SyncJob.updated_at < now - stale_after)
+    failed = await db.execute(
+        update(SyncJob)
+        .where(*stale, SyncJob.attempts >= max_attempts)
+        .values(
+            status=SYNC_JOB_FAILED,
+            detail="Sync failed",
+            error=f"Sync abandoned after {max_attempts} attempts",
+            finished_at=now,
+            updated_at=now,
+        )
+    )
+    requeued = await db.execute(
+        update(SyncJob)
+        .where(*stale)
+        .values(status=SYNC_JOB_QUEUED, detail="Requeued after worker timeout", updated_at=now)
+    )
+    await db.commit()
+    return requeued.rowcount, failed.rowcount
@@ -1,7 +1,7 @@
 import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import delete
+from sqlalchemy import delete, update
 from app.db.models.tastytrade_account import TastyTradeAccount
 from app.core.encryption import encrypt, decrypt
 from app.schemas.tastytrade_account import TastyTradeAccountCreate
@@ -30,3 +30,17 @@ async def get_tastytrade_account_by_id(db: AsyncSession, account_id: uuid.UUID)
 async def delete_tastytrade_account(db: AsyncSession, account_id: uuid.UUID) -> None:
     await db.execute(delete(TastyTradeAccount).where(TastyTradeAccount.id == account_id))
     await db.commit()
+
+async def get_transactions_version(db: AsyncSession, account_id: uuid.UUID) -> Optional[int]:
+    result = await db.execute(select(TastyTradeAccount.transactions_version).where(TastyTradeAccount.id == account_id))
+    return result.scalar_one_or_none()
+
+async def bump_transactions_version(db: AsyncSession, account_id: uuid.UUID) -> int:
+    # Does not commit: the new version becomes visible together with the rows it covers.
+    result = await db.execute(
+        update(TastyTradeAccount)
+        .where(TastyTradeAccount.id == account_id)
+        .values(transactions_version=TastyTradeAccount.transactions_version + 1)
+        .returning(TastyTradeAccount.transactions_version)
+    )
+    return result.scalar_one()
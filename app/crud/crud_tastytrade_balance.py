@@ -1,9 +1,9 @@
 import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import delete
+from sqlalchemy import delete, func
 from app.db.models.tastytrade_balance import TastyTradeBalance
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 async def upsert_balance(db: AsyncSession, account_id: uuid.UUID, user_id: uuid.UUID, data: dict) -> TastyTradeBalance:
@@ -30,6 +30,29 @@ async def get_latest_balance(db: AsyncSession, account_id: uuid.UUID) -> Optiona
     result = await db.execute(stmt)
     return result.scalars().first()
 
+async def get_latest_balance_time(db: AsyncSession, account_id: uuid.UUID) -> Optional[datetime]:
+    # created_at of the latest sync; every sync writes one balance row per sub-account.
+    stmt = select(func.max(TastyTradeBalance.created_at)).where(TastyTradeBalance.account_id == account_id)
+    return (await db.execute(stmt)).scalar()
+
+async def get_latest_balances(db: AsyncSession, account_id: uuid.UUID) -> List[TastyTradeBalance]:
+    # One row per sub-account, all sharing the sync's created_at.
+    latest = select(func.max(TastyTradeBalance.created_at)).where(
+        TastyTradeBalance.account_id == account_id
+    ).scalar_subquery()
+    stmt = select(TastyTradeBalance).where(
+        TastyTradeBalance.account_id == account_id,
+        TastyTradeBalance.created_at == latest,
+    )
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
 async def delete_balances_by_account(db: AsyncSession, account_id: uuid.UUID) -> None:
     await db.execute(delete(TastyTradeBalance).where(TastyTradeBalance.account_id == account_id))
     await db.commit()
+
+async def add_balance(db: AsyncSession, account_id: uuid.UUID, user_id: uuid.UUID, data: dict) -> TastyTradeBalance:
+    # Stages a snapshot without committing, for use inside a larger sync transaction.
+    balance = TastyTradeBalance(account_id=account_id, user_id=user_id, **data)
+    db.add(balance)
+    return balance
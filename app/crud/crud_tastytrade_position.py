@@ -1,7 +1,9 @@
 import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import delete
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.db.models.tastytrade_balance import TastyTradeBalance
 from app.db.models.tastytrade_position import TastyTradePosition
 from typing import List
 from datetime import datetime
@@ -30,6 +32,42 @@ async def get_positions_by_account(db: AsyncSession, account_id: uuid.UUID) -> L
     result = await db.execute(stmt)
     return result.scalars().all()
 
+async def get_latest_positions(db: AsyncSession, account_id: uuid.UUID) -> List[TastyTradePosition]:
+    # Every row of a sync shares one created_at. The latest sync is dated by its
+    # balance rows, which every sync writes: a sync that found no open positions
+    # leaves none at that timestamp, so the book reads as empty.
+    latest = select(func.max(TastyTradeBalance.created_at)).where(
+        TastyTradeBalance.account_id == account_id
+    ).scalar_subquery()
+    stmt = select(TastyTradePosition).where(
+        TastyTradePosition.account_id == account_id,
+        TastyTradePosition.created_at == latest,
+    )
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
 async def delete_positions_by_account(db: AsyncSession, account_id: uuid.UUID) -> None:
     await db.execute(delete(TastyTradePosition).where(TastyTradePosition.account_id == account_id))
     await db.commit()
+
+POSITION_KEY = ("account_number", "symbol", "created_at")
+# Rows per INSERT statement; keeps bind parameters under the asyncpg limit.
+BULK_CHUNK_SIZE = 1000
+
+async def bulk_upsert_positions(db: AsyncSession, account_id: uuid.UUID, user_id: uuid.UUID, rows: List[dict]) -> int:
+    # Caller owns the transaction: nothing is committed here.
+    staged = {tuple(r.get(k) for k in POSITION_KEY): r for r in rows}
+    values = [{"account_id": account_id, "user_id": user_id, **r} for r in staged.values()]
+    for start in range(0, len(values), BULK_CHUNK_SIZE):
+        stmt = pg_insert(TastyTradePosition).values(values[start:start + BULK_CHUNK_SIZE])
+        update_cols = {
+            c: stmt.excluded[c]
+            for c in values[0]
+            if c not in ("account_id", "user_id", "created_at", *POSITION_KEY)
+        }
+        update_cols["updated_at"] = func.now()
+        await db.execute(stmt.on_conflict_do_update(
+            constraint="uq_tastytrade_positions_snapshot",
+            set_=update_cols,
+        ))
+    return len(values)
@@ -1,18 +1,19 @@
 import uuid
+from collections import defaultdict
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import delete
+from sqlalchemy import delete, func, or_, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.crud.crud_tastytrade_account import bump_transactions_version
 from app.db.models.tastytrade_transaction import TastyTradeTransaction
-from typing import List
+from sqlalchemy.engine import Row
+from typing import AsyncIterator, List, Optional
 from datetime import datetime
 
 async def upsert_transaction(db: AsyncSession, account_id: uuid.UUID, user_id: uuid.UUID, data: dict) -> TastyTradeTransaction:
     stmt = select(TastyTradeTransaction).where(
         TastyTradeTransaction.account_id == account_id,
-        TastyTradeTransaction.user_id == user_id,
-        TastyTradeTransaction.symbol == data.get("symbol"),
-        TastyTradeTransaction.transaction_type == data["transaction_type"],
-        TastyTradeTransaction.date == data.get("date")
+        TastyTradeTransaction.transaction_id == data["transaction_id"],
     )
     result = await db.execute(stmt)
     transaction = result.scalars().first()
@@ -22,6 +23,7 @@ async def upsert_transaction(db: AsyncSession, account_id: uuid.UUID, user_id: u
     else:
         transaction = TastyTradeTransaction(account_id=account_id, user_id=user_id, **data)
         db.add(transaction)
+    await bump_transactions_version(db, account_id)
     await db.commit()
     await db.refresh(transaction)
     return transaction
@@ -33,4 +35,204 @@ async def get_transactions_by_account(db: AsyncSession, account_id: uuid.UUID) -
 
 async def delete_transactions_by_account(db: AsyncSession, account_id: uuid.UUID) -> None:
     await db.execute(delete(TastyTradeTransaction).where(TastyTradeTransaction.account_id == account_id))
+    await bump_transactions_version(db, account_id)
     await db.commit()
+
+async def get_latest_transaction_date(db: AsyncSession, account_id: uuid.UUID, account_number: str) -> Optional[datetime]:
+    # Backward scan of the (account_id, date) index, stopping at the sub-account's newest row.
+    stmt = (
+        select(TastyTradeTransaction.date)
+        .where(
+            TastyTradeTransaction.account_id == account_id,
+            TastyTradeTransaction.account_number == account_number,
+            TastyTradeTransaction.date.is_not(None),
+            # Until placeholder rows are adopted, the full history has to be fetched.
+            TastyTradeTransaction.transaction_id.not_like(f"{LEGACY_ID_PREFIX}%"),
+        )
+        .order_by(TastyTradeTransaction.date.desc())
+        .limit(1)
+    )
+    result = await db.execute(stmt)
+    return result.scalar_one_or_none()
+
+TRANSACTION_KEY = ("transaction_id",)
+# Rows per INSERT statement; keeps bind parameters under the asyncpg limit.
+BULK_CHUNK_SIZE = 1000
+# Placeholder ids given to rows synced before broker ids were stored.
+LEGACY_ID_PREFIX = "legacy-"
+# The natural key those rows were unique on, and the values that break ties.
+LEGACY_KEY = ("symbol", "transaction_type", "date")
+LEGACY_VALUES = ("quantity", "price", "amount")
+
+async def adopt_legacy_transactions(db: AsyncSession, account_id: uuid.UUID, rows: List[dict]) -> int:
+    """Give rows keyed 'legacy-<id>' the broker transaction_id of the synced row they stand for.
+
+    Such rows were unique on (account_number, symbol, transaction_type, date);
+    each takes one broker row with that key, preferring the one whose quantity,
+    price and amount match, since the old key merged same-timestamp fills into
+    one row. The upsert that follows then updates the row in place instead of
+    inserting the transaction beside it. Returns the number of rows adopted.
+    Caller owns the transaction.
+    """
+    legacy = (await db.execute(
+        select(
+            TastyTradeTransaction.id,
+            TastyTradeTransaction.account_number,
+            *(getattr(TastyTradeTransaction, c) for c in LEGACY_KEY + LEGACY_VALUES),
+        ).where(
+            TastyTradeTransaction.account_id == account_id,
+            TastyTradeTransaction.transaction_id.like(f"{LEGACY_ID_PREFIX}%"),
+        )
+    )).all()
+    if not legacy:
+        return 0
+    legacy_keys = {tuple(getattr(r, k) for k in LEGACY_KEY) for r in legacy}
+    candidates = defaultdict(list)
+    for row in rows:
+        key = tuple(row.get(k) for k in LEGACY_KEY)
+        if key in legacy_keys:
+            candidates[key].append(row)
+    ids = [row["transaction_id"] for group in candidates.values() for row in group]
+    # Broker ids stored by an earlier sync are already taken.
+    taken = set()
+    for start in range(0, len(ids), BULK_CHUNK_SIZE):
+        taken.update((await db.execute(
+            select(TastyTradeTransaction.transaction_id).where(
+                TastyTradeTransaction.account_id == account_id,
+                TastyTradeTransaction.transaction_id.in_(ids[start:start + BULK_CHUNK_SIZE]),
+            )
+        )).scalars())
+    adopted = []
+    for old in legacy:
+        pool = [
+            row for row in candidates.get(tuple(getattr(old, k) for k in LEGACY_KEY), ())
+            if row["transaction_id"] not in taken
+            # Rows synced before sub-accounts were told apart have no account number.
+            and old.account_number in (None, row.get("account_number"))
+        ]
+        if not pool:
+            continue
+        match = next((row for row in pool if all(row.get(c) == getattr(old, c) for c in LEGACY_VALUES)), pool[0])
+        taken.add(match["transaction_id"])
+        adopted.append({"id": old.id, "transaction_id": match["transaction_id"]})
+    if adopted:
+        await db.execute(update(TastyTradeTransaction), adopted)
+    return len(adopted)
+
+async def bulk_upsert_transactions(db: AsyncSession, account_id: uuid.UUID, user_id: uuid.UUID, rows: List[dict]) -> List[Optional[datetime]]:
+    """Upsert rows and return the dates of those that were inserted or actually changed.
+
+    Re-synced rows identical to what is stored are left untouched, so callers
+    can tell which part of the history needs derived data recomputed.
+    Caller owns the transaction: nothing is committed here.
+    """
+    staged = {tuple(r.get(k) for k in TRANSACTION_KEY): r for r in rows}
+    await adopt_legacy_transactions(db, account_id, list(staged.values()))
+    values = [{"account_id": account_id, "user_id": user_id, **r} for r in staged.values()]
+    changed: List[Optional[datetime]] = []
+    table = TastyTradeTransaction.__table__
+    for start in range(0, len(values), BULK_CHUNK_SIZE):
+        stmt = pg_insert(TastyTradeTransaction).values(values[start:start + BULK_CHUNK_SIZE])
+        compared = [
+            c for c in values[0]
+            if c not in ("account_id", "user_id", "created_at", *TRANSACTION_KEY)
+        ]
+        update_cols = {c: stmt.excluded[c] for c in compared}
+        update_cols["updated_at"] = func.now()
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_tastytrade_transactions_account_transaction_id",
+            set_=update_cols,
+            where=or_(*(table.c[c].is_distinct_from(stmt.excluded[c]) for c in compared)),
+        ).returning(TastyTradeTransaction.date)
+        result = await db.execute(stmt)
+        changed.extend(result.scalars().all())
+    return changed
+
+EXPORT_COLUMNS = (
+    "id", "account_number", "transaction_id", "transaction_type", "transaction_sub_type",
+    "action", "symbol", "underlying_symbol", "instrument_type", "quantity", "price",
+    "amount", "value", "fees", "date", "created_at", "updated_at",
+)
+
+async def stream_transactions(
+    db: AsyncSession,
+    account_id: uuid.UUID,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    symbol: Optional[str] = None,
+    batch_size: int = 1000,
+) -> AsyncIterator[Row]:
+    # Plain column rows from a server-side cursor: no ORM identity map, and
+    # only `batch_size` rows are held in memory at a time.
+    stmt = select(*(getattr(TastyTradeTransaction, c) for c in EXPORT_COLUMNS)).where(
+        TastyTradeTransaction.account_id == account_id
+    )
+    if start is not None:
+        stmt = stmt.where(TastyTradeTransaction.date >= start)
+    if end is not None:
+        stmt = stmt.where(TastyTradeTransaction.date < end)
+    if symbol is not None:
+        stmt = stmt.where(TastyTradeTransaction.symbol == symbol)
+    stmt = stmt.order_by(TastyTradeTransaction.date, TastyTradeTransaction.id)
+    result = await db.stream(stmt.execution_options(yield_per=batch_size))
+    async for partition in result.partitions():
+        for row in partition:
+            yield row
+
+PNL_COLUMNS = (
+    "date", "symbol", "underlying_symbol", "transaction_type", "transaction_sub_type",
+    "action", "instrument_type", "quantity", "price", "value", "amount", "fees", "account_number",
+)
+
+async def get_transaction_columns(
+    db: AsyncSession,
+    account_id: uuid.UUID,
+    columns: tuple = PNL_COLUMNS,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    after: Optional[tuple] = None,
+) -> List[Row]:
+    # Column tuples in (date, id) order for analytics; skips ORM object construction.
+    # `after` is a (date, id) position to resume from, exclusive.
+    stmt = select(*(getattr(TastyTradeTransaction, c) for c in columns)).where(
+        TastyTradeTransaction.account_id == account_id
+    )
+    if start is not None:
+        stmt = stmt.where(TastyTradeTransaction.date >= start)
+    if end is not None:
+        stmt = stmt.where(TastyTradeTransaction.date < end)
+    if after is not None:
+        stmt = stmt.where(tuple_(TastyTradeTransaction.date, TastyTradeTransaction.id) > tuple(after))
+    stmt = stmt.order_by(TastyTradeTransaction.date, TastyTradeTransaction.id)
+    result = await db.execute(stmt)
+    return result.all()
+
+async def get_cash_flow_totals(
+    db: AsyncSession,
+    account_id: uuid.UUID,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+) -> List[Row]:
+    """Per (transaction_type, transaction_sub_type) over [start, end): fees, credits, debits and row count.
+
+    Cash is the gross value, or net amount plus fees for rows without one;
+    credits and debits are summed separately so inflows and outflows of one
+    type can be told apart.
+    """
+    fees = func.coalesce(TastyTradeTransaction.fees, 0.0)
+    cash = func.coalesce(TastyTradeTransaction.value, TastyTradeTransaction.amount + fees, 0.0)
+    stmt = select(
+        TastyTradeTransaction.transaction_type,
+        TastyTradeTransaction.transaction_sub_type,
+        func.sum(fees).label("fees"),
+        func.coalesce(func.sum(cash).filter(cash > 0), 0.0).label("credits"),
+        func.coalesce(func.sum(cash).filter(cash < 0), 0.0).label("debits"),
+        func.count().label("transactions"),
+    ).where(TastyTradeTransaction.account_id == account_id)
+    if start is not None:
+        stmt = stmt.where(TastyTradeTransaction.date >= start)
+    if end is not None:
+        stmt = stmt.where(TastyTradeTransaction.date < end)
+    stmt = stmt.group_by(TastyTradeTransaction.transaction_type, TastyTradeTransaction.transaction_sub_type)
+    result = await db.execute(stmt)
+    return result.all()
@@ -3,15 +3,21 @@ from sqlalchemy.future import select
 from sqlalchemy import update
 from app.db.models.user import User
 from app.schemas.user import UserCreate
-from app.core.security import get_password_hash
+from app.core.security import hash_password_async
+from app.services.user_cache import user_cache
 from datetime import datetime, timezone
+import uuid
 
 async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
     result = await db.execute(select(User).where(User.email == email))
     return result.scalars().first()
 
+async def get_user_by_id(db: AsyncSession, user_id: uuid.UUID) -> User | None:
+    result = await db.execute(select(User).where(User.id == user_id))
+    return result.scalars().first()
+
 async def create_user(db: AsyncSession, user_in: UserCreate) -> User:
-    hashed_password = get_password_hash(user_in.password)
+    hashed_password = await hash_password_async(user_in.password)
     db_user = User(
         email=user_in.email,
         hashed_password=hashed_password,
@@ -23,9 +29,28 @@ async def create_user(db: AsyncSession, user_in: UserCreate) -> User:
     await db.refresh(db_user)
     return db_user
 
-async def update_user_last_login(db: AsyncSession, user: User) -> User:
+async def update_user_last_login(db: AsyncSession, user: User, new_password_hash: str | None = None) -> User:
     user.last_login_at = datetime.now(timezone.utc)
+    if new_password_hash:
+        user.hashed_password = new_password_hash
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    user_cache.invalidate(user.id)
+    return user
+
+async def set_user_active(db: AsyncSession, user: User, is_active: bool) -> User:
+    user.is_active = is_active
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    user_cache.invalidate(user.id)
+    return user
+
+async def set_user_role(db: AsyncSession, user: User, role: str) -> User:
+    user.role = role
     db.add(user)
     await db.commit()
     await db.refresh(user)
+    user_cache.invalidate(user.id)
     return user
@@ -6,3 +6,6 @@ from .tastytrade_transaction import *
 from .strategy import *
 from .position_group import *
 from .position_group_transaction import *
+from .sync_job import *
+from .pnl_snapshot import *
+from .balance_history import *
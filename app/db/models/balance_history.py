@@ -0,0 +1,27 @@
+import uuid
+from datetime import date, datetime, timezone
+from sqlalchemy import String, Date, DateTime, Float, ForeignKey, Integer, UniqueConstraint, text
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.models.user import Base
+
+class BalanceDailyOhlc(Base):
+    """Net liquidating value per UTC day, rolled up from raw balance snapshots past retention."""
+    __tablename__ = "balance_daily_ohlc"
+    __table_args__ = (
+        UniqueConstraint(
+            "account_id", "account_number", "day",
+            name="uq_balance_daily_ohlc_account_day",
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, server_default=text("gen_random_uuid()"))
+    account_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("tastytrade_accounts.id", ondelete="CASCADE"), nullable=False)
+    account_number: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    open: Mapped[float] = mapped_column(Float, nullable=False)
+    high: Mapped[float] = mapped_column(Float, nullable=False)
+    low: Mapped[float] = mapped_column(Float, nullable=False)
+    close: Mapped[float] = mapped_column(Float, nullable=False)
+    samples: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=text("now()"))
@@ -0,0 +1,35 @@
+import uuid
+from datetime import date, datetime, timezone
+from sqlalchemy import String, Date, DateTime, Float, ForeignKey, Integer, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.models.user import Base
+
+class PnlDailySnapshot(Base):
+    """Realized P&L booked on one UTC day for one underlying."""
+    __tablename__ = "pnl_daily_snapshots"
+    __table_args__ = (
+        # Also serves day-range scans for an account.
+        UniqueConstraint("account_id", "day", "underlying_symbol", name="uq_pnl_daily_snapshots_account_day_underlying"),
+    )
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    account_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("tastytrade_accounts.id", ondelete="CASCADE"), nullable=False)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    underlying_symbol: Mapped[str] = mapped_column(String(64), nullable=False)
+    realized_pnl: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    fees: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+    closing_transactions: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+
+class PnlCheckpoint(Base):
+    """FIFO open-lot state at the end of `day`, so recomputation can resume there."""
+    __tablename__ = "pnl_checkpoints"
+    __table_args__ = (
+        UniqueConstraint("account_id", "day", name="uq_pnl_checkpoints_account_day"),
+    )
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    account_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("tastytrade_accounts.id", ondelete="CASCADE"), nullable=False)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    # {account_number or "": {symbol: [[signed quantity, cash per unit, opened-at epoch seconds], ...]}}
+    open_lots: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
@@ -1,16 +1,43 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import String, DateTime, ForeignKey
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import String, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.models.user import Base
 
 class PositionGroup(Base):
     __tablename__ = "position_groups"
+    __table_args__ = (
+        UniqueConstraint("account_id", "match_key", name="uq_position_groups_account_match_key"),
+        Index("ix_position_groups_user_created_id", "user_id", "created_at", "id"),
+    )
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     account_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("tastytrade_accounts.id", ondelete="CASCADE"), nullable=False, index=True)
     strategy_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("strategies.id", ondelete="SET NULL"), nullable=True, index=True)
     name: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # Set on groups created automatically (strategy identification, trade tagging); NULL for hand-made groups.
+    match_key: Mapped[str | None] = mapped_column(String(255), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    # Never lazy-loaded: queries that need links must selectinload them, so
+    # serialising a list cannot fall into a query per group.
+    links: Mapped[list["PositionGroupTransaction"]] = relationship(
+        lazy="raise", passive_deletes=True, order_by="PositionGroupTransaction.created_at",
+    )
+
+    @property
+    def transaction_ids(self) -> list[uuid.UUID]:
+        return [link.transaction_id for link in self.links]
+
+class PositionGroupWatermark(Base):
+    """Last transaction tagged into trade groups for an account, and the trades still open there."""
+    __tablename__ = "position_group_watermarks"
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    account_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("tastytrade_accounts.id", ondelete="CASCADE"), nullable=False, unique=True)
+    # Tagging resumes after (last_date, last_transaction_id), the history's sort order.
+    last_date: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    last_transaction_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    # {"<account number>|<underlying>": {"group_id": str, "positions": {symbol: signed quantity}}}
+    open_trades: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
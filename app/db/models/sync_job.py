@@ -0,0 +1,33 @@
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import String, DateTime, ForeignKey, Integer, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.models.user import Base
+
+SYNC_JOB_QUEUED = "queued"
+SYNC_JOB_RUNNING = "running"
+SYNC_JOB_COMPLETED = "completed"
+SYNC_JOB_FAILED = "failed"
+
+class SyncJob(Base):
+    __tablename__ = "sync_jobs"
+    __table_args__ = (
+        # Workers claim the oldest queued job; this keeps that lookup an index scan.
+        Index("ix_sync_jobs_status_created_at", "status", "created_at"),
+    )
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    account_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("tastytrade_accounts.id", ondelete="CASCADE"), nullable=False, index=True)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default=SYNC_JOB_QUEUED)
+    progress: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    detail: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    error: Mapped[str | None] = mapped_column(String(1024), nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    balances_written: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    positions_written: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    transactions_written: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
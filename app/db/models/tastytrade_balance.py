@@ -1,18 +1,27 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import String, DateTime, ForeignKey, Float
+from sqlalchemy import String, DateTime, ForeignKey, Float, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.models.user import Base
 
 class TastyTradeBalance(Base):
     __tablename__ = "tastytrade_balances"
+    __table_args__ = (
+        # Serves keyset pagination and latest-snapshot lookups per account.
+        Index("ix_tastytrade_balances_account_created_id", "account_id", "created_at", "id"),
+    )
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     account_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("tastytrade_accounts.id", ondelete="CASCADE"), nullable=False, index=True)
     user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Broker account number; one login can hold several sub-accounts.
+    account_number: Mapped[str | None] = mapped_column(String(32), nullable=True)
     cash: Mapped[float] = mapped_column(Float, nullable=True)
     long_equity_value: Mapped[float] = mapped_column(Float, nullable=True)
     short_equity_value: Mapped[float] = mapped_column(Float, nullable=True)
     net_liquidating_value: Mapped[float] = mapped_column(Float, nullable=True)
+    derivative_buying_power: Mapped[float] = mapped_column(Float, nullable=True)
+    equity_buying_power: Mapped[float] = mapped_column(Float, nullable=True)
+    maintenance_requirement: Mapped[float] = mapped_column(Float, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
@@ -1,17 +1,27 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import String, DateTime, ForeignKey, Float, Integer
+from sqlalchemy import String, DateTime, ForeignKey, Float, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.models.user import Base
 
 class TastyTradePosition(Base):
     __tablename__ = "tastytrade_positions"
+    __table_args__ = (
+        Index("ix_tastytrade_positions_account_created_id", "account_id", "created_at", "id"),
+        UniqueConstraint(
+            "account_id", "user_id", "account_number", "symbol", "created_at",
+            name="uq_tastytrade_positions_snapshot",
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     account_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("tastytrade_accounts.id", ondelete="CASCADE"), nullable=False, index=True)
     user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Broker account number; one login can hold several sub-accounts.
+    account_number: Mapped[str | None] = mapped_column(String(32), nullable=True)
     symbol: Mapped[str] = mapped_column(String(64), nullable=False)
-    quantity: Mapped[int] = mapped_column(Integer, nullable=False)
+    quantity: Mapped[float] = mapped_column(Float, nullable=False)
     average_price: Mapped[float] = mapped_column(Float, nullable=True)
     market_value: Mapped[float] = mapped_column(Float, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
@@ -1,20 +1,44 @@
 import uuid
 from datetime import datetime, timezone
-from sqlalchemy import String, DateTime, ForeignKey, Float, Integer
+from sqlalchemy import String, DateTime, ForeignKey, Float, UniqueConstraint, Index, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.models.user import Base
 
 class TastyTradeTransaction(Base):
     __tablename__ = "tastytrade_transactions"
+    __table_args__ = (
+        Index("ix_tastytrade_transactions_account_created_id", "account_id", "created_at", "id"),
+        # Date-ordered scans: exports, date-range filters and analytics.
+        Index("ix_tastytrade_transactions_account_date", "account_id", "date"),
+        # Broker transaction ids are unique per linked account; syncs upsert on this.
+        UniqueConstraint("account_id", "transaction_id", name="uq_tastytrade_transactions_account_transaction_id"),
+        # Rows still holding a pre-migration placeholder id, matched to broker ids by the next sync.
+        Index(
+            "ix_tastytrade_transactions_legacy_id", "account_id",
+            postgresql_where=text("transaction_id LIKE 'legacy-%'"),
+        ),
+    )
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     account_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("tastytrade_accounts.id", ondelete="CASCADE"), nullable=False, index=True)
     user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # Broker account number; one login can hold several sub-accounts.
+    account_number: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    transaction_id: Mapped[str] = mapped_column(String(64), nullable=False)
     transaction_type: Mapped[str] = mapped_column(String(64), nullable=False)
+    transaction_sub_type: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    # Order action, e.g. "Buy to Open"; empty for expirations and cash movements.
+    action: Mapped[str | None] = mapped_column(String(32), nullable=True)
     symbol: Mapped[str] = mapped_column(String(64), nullable=True)
-    quantity: Mapped[int] = mapped_column(Integer, nullable=True)
+    underlying_symbol: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    instrument_type: Mapped[str | None] = mapped_column(String(32), nullable=True)
+    quantity: Mapped[float | None] = mapped_column(Float, nullable=True)
     price: Mapped[float] = mapped_column(Float, nullable=True)
     amount: Mapped[float] = mapped_column(Float, nullable=True)
+    # Signed principal (price * quantity * multiplier) before fees; credits are positive.
+    value: Mapped[float | None] = mapped_column(Float, nullable=True)
+    # Commissions plus clearing, regulatory and index-option fees, as a positive cost.
+    fees: Mapped[float | None] = mapped_column(Float, nullable=True)
     date: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
@@ -1,10 +1,59 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker, AsyncSession
 from app.core.config import settings
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 
-engine = create_async_engine(settings.database_uri, echo=False, future=True)
+def _create_engine(uri: str) -> AsyncEngine:
+    return create_async_engine(
+        uri,
+        echo=False,
+        future=True,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        connect_args={
+            # asyncpg's own statement cache and SQLAlchemy's prepared-statement cache;
+            # set DB_STATEMENT_CACHE_SIZE=0 behind pgbouncer in transaction mode.
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        },
+    )
+
+engine = _create_engine(settings.database_uri)
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
+# GET endpoints read from the replica when one is configured, otherwise the primary.
+read_engine: Optional[AsyncEngine] = (
+    _create_engine(settings.DB_READ_REPLICA_URI) if settings.DB_READ_REPLICA_URI else None
+)
+read_session_maker = (
+    async_sessionmaker(read_engine, expire_on_commit=False, class_=AsyncSession)
+    if read_engine is not None
+    else async_session_maker
+)
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as session:
         yield session
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    async with read_session_maker() as session:
+        yield session
+
+def _engine_pool_stats(engine: AsyncEngine) -> dict:
+    pool = engine.sync_engine.pool
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "timeout": settings.DB_POOL_TIMEOUT,
+    }
+
+def pool_stats() -> dict:
+    stats = {"primary": _engine_pool_stats(engine)}
+    if read_engine is not None:
+        stats["replica"] = _engine_pool_stats(read_engine)
+    return stats
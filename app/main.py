@@ -1,9 +1,46 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
-from app.api.v1.endpoints import auth_router, tastytrade_router, strategy_router, position_group_router
+from app.api.v1.endpoints import auth_router, tastytrade_router, strategy_router, position_group_router, monitoring_router, reports_router, market_data_router, portfolio_router, dashboard_router
+from app.background_tasks.tastytrade_sync import sync_job_runner
+from app.background_tasks.market_data_tasks import market_data_refresher
+from app.services.market_data import market_data_service
+from app.core.security import PasswordHasherBusy, password_hasher
+from app.core.metrics import MetricsMiddleware, instrument_engine, register_route_templates, render_metrics
+from app.db.session import engine, read_engine, pool_stats
 
-app = FastAPI(title="TastyTrade Tracker API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await sync_job_runner.start()
+    if settings.MARKET_DATA_REFRESHER_ENABLED:
+        await market_data_refresher.start()
+    yield
+    await market_data_refresher.stop()
+    await market_data_service.close()
+    await sync_job_runner.stop()
+    password_hasher.shutdown()
+
+app = FastAPI(title="TastyTrade Tracker API", lifespan=lifespan)
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Authentication is busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+if settings.METRICS_ENABLED:
+    instrument_engine(engine)
+    if read_engine is not None:
+        instrument_engine(read_engine)
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return PlainTextResponse(render_metrics(pool_stats()), media_type="text/plain; version=0.0.4")
 
 app.add_middleware(
     CORSMiddleware,
@@ -11,9 +48,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Total-Count-Estimated", "X-Next-Cursor"],
 )
 
-app.include_router(auth_router, prefix=settings.API_V1_STR)
-app.include_router(tastytrade_router, prefix=settings.API_V1_STR)
-app.include_router(strategy_router, prefix=settings.API_V1_STR)
-app.include_router(position_group_router, prefix=settings.API_V1_STR)
+for router in (
+    auth_router, tastytrade_router, strategy_router, position_group_router, monitoring_router,
+    reports_router, market_data_router, portfolio_router, dashboard_router,
+):
+    app.include_router(router, prefix=settings.API_V1_STR)
+    register_route_templates(router, settings.API_V1_STR)
@@ -0,0 +1,32 @@
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import datetime
+from typing import Dict, Optional
+
+class DashboardPnlRead(BaseModel):
+    realized_pnl: float
+    fees_total: float
+    net_realized_pnl: float
+    closing_transactions: int
+
+class DashboardRead(BaseModel):
+    account_id: UUID
+    net_liquidity: Optional[float] = None
+    cash: Optional[float] = None
+    derivative_buying_power: Optional[float] = None
+    equity_buying_power: Optional[float] = None
+    maintenance_requirement: Optional[float] = None
+    # maintenance_requirement / net_liquidity
+    buying_power_usage: Optional[float] = None
+    portfolio_delta: Optional[float] = None
+    portfolio_gamma: Optional[float] = None
+    portfolio_theta: Optional[float] = None
+    portfolio_vega: Optional[float] = None
+    open_positions_count: int
+    priced_positions_count: int
+    # Keyed by period: daily, mtd, ytd, all_time
+    pnl: Dict[str, DashboardPnlRead]
+    balances_updated_at: Optional[datetime] = None
+    positions_updated_at: Optional[datetime] = None
+    last_updated_at: Optional[datetime] = None
+    generated_at: datetime
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+class MarketIndexSchema(BaseModel):
+    name: str
+    symbol: str
+    current_value: float
+    change_value: float
+    percent_change: float
+    last_updated_at: datetime
+
+class MarketOverviewSchema(BaseModel):
+    indices: List[MarketIndexSchema]
+    data_source_timestamp: Optional[datetime] = None
+    # True when the cached quotes are past their refresh interval (a refresh is pending or failing).
+    stale: bool = False
@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import datetime
+from typing import Optional
+
+class NetLiquidityReconciliationRead(BaseModel):
+    account_id: UUID
+    period_start: Optional[datetime] = None
+    period_end: datetime
+    starting_net_liquidity: Optional[float] = None
+    # When the balances reconciled between were reported; flows are counted between them
+    starting_balance_at: Optional[datetime] = None
+    realized_pnl: float
+    fees_and_commissions: float
+    cash_deposits: float
+    cash_withdrawals: float
+    other_adjustments: float
+    transactions: int
+    calculated_ending_net_liquidity: Optional[float] = None
+    unrealized_pnl_change: Optional[float] = None
+    ending_net_liquidity: Optional[float] = None
+    ending_balance_at: Optional[datetime] = None
@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import datetime
+
+class PnlSummaryRead(BaseModel):
+    account_id: UUID
+    period_start: datetime | None = None
+    period_end: datetime
+    realized_pnl: float
+    fees_total: float
+    net_realized_pnl: float
+    closing_transactions: int
+
+class PnlByUnderlyingRead(BaseModel):
+    underlying_symbol: str
+    realized_pnl: float
+    fees_total: float
+    net_realized_pnl: float
+    closing_transactions: int
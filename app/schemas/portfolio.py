@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import datetime
+from typing import List, Optional
+
+class PositionGreeksRead(BaseModel):
+    account_number: Optional[str] = None
+    symbol: str
+    quantity: float
+    instrument: str
+    underlying: str
+    underlying_price: Optional[float] = None
+    implied_volatility: Optional[float] = None
+    # Position totals (quantity x multiplier); None when the position could not be priced
+    delta: Optional[float] = None
+    gamma: Optional[float] = None
+    theta: Optional[float] = None
+    vega: Optional[float] = None
+
+class PortfolioMetricsRead(BaseModel):
+    account_id: UUID
+    net_liquidity: Optional[float] = None
+    cash: Optional[float] = None
+    portfolio_delta: Optional[float] = None
+    portfolio_gamma: Optional[float] = None
+    portfolio_theta: Optional[float] = None
+    portfolio_vega: Optional[float] = None
+    open_positions_count: int
+    priced_positions_count: int
+    last_updated_at: Optional[datetime] = None
+    positions: List[PositionGreeksRead]
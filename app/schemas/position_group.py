@@ -1,6 +1,6 @@
 from pydantic import BaseModel, ConfigDict
 from uuid import UUID
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, List
 
 class PositionGroupTransactionRead(BaseModel):
@@ -31,3 +31,25 @@ class PositionGroupUpdate(BaseModel):
     strategy_id: Optional[UUID] = None
     name: Optional[str] = None
     transaction_ids: Optional[List[UUID]] = None
+
+class StrategyLegRead(BaseModel):
+    symbol: str
+    quantity: float
+
+class IdentifiedStrategyRead(BaseModel):
+    group_id: UUID
+    created: bool
+    strategy: str
+    strategy_id: Optional[UUID] = None
+    name: str
+    account_number: Optional[str] = None
+    underlying_symbol: str
+    expiry: Optional[date] = None
+    legs: List[StrategyLegRead]
+
+class TradeTaggingRead(BaseModel):
+    transactions: int
+    groups_created: int
+    links_created: int
+    open_trades: int
+    rebuilt: bool
@@ -0,0 +1,21 @@
+from pydantic import BaseModel, ConfigDict
+from uuid import UUID
+from datetime import datetime
+
+class SyncJobRead(BaseModel):
+    id: UUID
+    account_id: UUID
+    status: str
+    progress: int
+    detail: str | None = None
+    error: str | None = None
+    attempts: int
+    balances_written: int
+    positions_written: int
+    transactions_written: int
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    updated_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
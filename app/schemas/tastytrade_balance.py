@@ -6,11 +6,22 @@ class TastyTradeBalanceRead(BaseModel):
     id: UUID
     account_id: UUID
     user_id: UUID
+    account_number: str | None = None
     cash: float | None = None
     long_equity_value: float | None = None
     short_equity_value: float | None = None
     net_liquidating_value: float | None = None
+    derivative_buying_power: float | None = None
+    equity_buying_power: float | None = None
+    maintenance_requirement: float | None = None
     created_at: datetime
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+class BalanceHistoryPoint(BaseModel):
+    timestamp: datetime
+    open: float
+    high: float
+    low: float
+    close: float
@@ -6,8 +6,9 @@ class TastyTradePositionRead(BaseModel):
     id: UUID
     account_id: UUID
     user_id: UUID
+    account_number: str | None = None
     symbol: str
-    quantity: int
+    quantity: float
     average_price: float | None = None
     market_value: float | None = None
     created_at: datetime
@@ -6,11 +6,19 @@ class TastyTradeTransactionRead(BaseModel):
     id: UUID
     account_id: UUID
     user_id: UUID
+    account_number: str | None = None
+    transaction_id: str
     transaction_type: str
+    transaction_sub_type: str | None = None
+    action: str | None = None
     symbol: str | None = None
-    quantity: int | None = None
+    underlying_symbol: str | None = None
+    instrument_type: str | None = None
+    quantity: float | None = None
     price: float | None = None
     amount: float | None = None
+    value: float | None = None
+    fees: float | None = None
     date: datetime | None = None
     created_at: datetime
     updated_at: datetime
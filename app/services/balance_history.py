@@ -0,0 +1,149 @@
+"""
+Balance history for charting.
+
+Raw balance rows (one per sync) are kept for BALANCE_RAW_RETENTION_DAYS and
+then folded into daily OHLC rows of net liquidating value. Reads combine both
+into one array-backed series and bucket it to a fixed number of points, so a
+chart costs the same whether it spans a day or five years.
+
+Daily rows are kept per sub-account. Summed across sub-accounts, a rolled-up
+day's high and low are therefore upper and lower bounds rather than exact
+extremes of the account total; raw rows are summed per timestamp and exact.
+"""
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta, timezone
+from typing import Optional
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud.crud_balance_history import (
+    delete_daily_ohlc_before,
+    get_balance_points,
+    get_daily_ohlc,
+    rollup_balances_before,
+)
+
+
+@dataclass
+class BalanceSeries:
+    """Parallel float64 arrays, sorted by timestamp (epoch seconds)."""
+    timestamps: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @classmethod
+    def empty(cls) -> "BalanceSeries":
+        return cls(*(np.empty(0) for _ in range(5)))
+
+    @classmethod
+    def from_daily(cls, rows) -> "BalanceSeries":
+        if not rows:
+            return cls.empty()
+        days, o, h, l, c = zip(*rows)
+        ts = [datetime.combine(d, time.min, tzinfo=timezone.utc).timestamp() for d in days]
+        return cls(*(np.asarray(a, dtype=np.float64) for a in (ts, o, h, l, c)))
+
+    @classmethod
+    def from_points(cls, rows) -> "BalanceSeries":
+        if not rows:
+            return cls.empty()
+        ts, values = zip(*rows)
+        values = np.asarray(values, dtype=np.float64)
+        return cls(np.array([t.timestamp() for t in ts]), values, values, values, values)
+
+    def concat(self, other: "BalanceSeries") -> "BalanceSeries":
+        merged = [np.concatenate((a, b)) for a, b in zip(self._arrays(), other._arrays())]
+        order = np.argsort(merged[0], kind="stable")
+        return BalanceSeries(*(a[order] for a in merged))
+
+    def _arrays(self) -> tuple:
+        return self.timestamps, self.open, self.high, self.low, self.close
+
+    def downsample(self, start: float, end: float, points: int) -> "BalanceSeries":
+        """OHLC per equal-width bucket over [start, end).
+
+        Buckets before the first sample are dropped; later empty buckets repeat
+        the previous close, so a series with data from `start` has exactly
+        `points` entries.
+        """
+        if not len(self) or end <= start:
+            return BalanceSeries.empty()
+        width = (end - start) / points
+        buckets = np.clip(((self.timestamps - start) // width).astype(np.int64), 0, points - 1)
+        firsts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        lasts = np.r_[firsts[1:] - 1, len(self) - 1]
+        ids = buckets[firsts]
+        o, c = self.open[firsts], self.close[lasts]
+        h = np.maximum.reduceat(self.high, firsts)
+        l = np.minimum.reduceat(self.low, firsts)
+
+        all_ids = np.arange(ids[0], points)
+        pos = np.searchsorted(ids, all_ids, side="right") - 1
+        present = ids[pos] == all_ids
+        carried = c[pos]
+        return BalanceSeries(
+            start + all_ids * width,
+            np.where(present, o[pos], carried),
+            np.where(present, h[pos], carried),
+            np.where(present, l[pos], carried),
+            carried,
+        )
+
+    def to_points(self) -> list[dict]:
+        return [
+            {
+                "timestamp": datetime.fromtimestamp(t, tz=timezone.utc),
+                "open": o, "high": h, "low": l, "close": c,
+            }
+            for t, o, h, l, c in zip(*(a.tolist() for a in self._arrays()))
+        ]
+
+
+async def load_balance_series(
+    db: AsyncSession,
+    account_id: uuid.UUID,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    account_number: Optional[str] = None,
+) -> BalanceSeries:
+    start_day = start.astimezone(timezone.utc).date() if start else None
+    end_day = end.astimezone(timezone.utc).date() + timedelta(days=1) if end else None
+    daily = BalanceSeries.from_daily(await get_daily_ohlc(db, account_id, start_day, end_day, account_number))
+    raw = BalanceSeries.from_points(await get_balance_points(db, account_id, start, end, account_number))
+    return daily.concat(raw)
+
+
+async def get_balance_history(
+    db: AsyncSession,
+    account_id: uuid.UUID,
+    points: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    account_number: Optional[str] = None,
+) -> list[dict]:
+    series = await load_balance_series(db, account_id, start, end, account_number)
+    if not len(series):
+        return []
+    start_ts = start.timestamp() if start else float(series.timestamps[0])
+    # Open-ended ranges stop just after the newest sample so it lands in the last bucket.
+    end_ts = end.timestamp() if end else float(series.timestamps[-1]) + 1
+    return series.downsample(start_ts, end_ts, points).to_points()
+
+
+async def apply_balance_retention(db: AsyncSession, account_id: uuid.UUID, now: Optional[datetime] = None) -> int:
+    """Roll raw rows older than the raw retention window into daily OHLC. Does not commit."""
+    now = now or datetime.now(timezone.utc)
+    today = datetime.combine(now.date(), time.min, tzinfo=timezone.utc)
+    # Cut on a day boundary so each day is rolled up from a complete set of samples.
+    rolled = await rollup_balances_before(db, account_id, today - timedelta(days=settings.BALANCE_RAW_RETENTION_DAYS))
+    if settings.BALANCE_DAILY_RETENTION_DAYS > 0:
+        await delete_daily_ohlc_before(db, account_id, (today - timedelta(days=settings.BALANCE_DAILY_RETENTION_DAYS)).date())
+    return rolled
@@ -0,0 +1,68 @@
+"""
+Dashboard summary for one account.
+
+The balance, position and P&L sections each come from a fixed number of
+queries, run concurrently in their own sessions (a session runs one
+statement at a time). The assembled summary is cached per account until the
+account's next sync completes or DASHBOARD_CACHE_TTL passes, whichever is
+first; the TTL only bounds how long the greeks and the "daily" period can
+drift with the clock. The cache is per process, so each read first looks up
+the account's latest sync time (one index probe) and drops an entry built
+before it, whichever worker ran the sync.
+"""
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import SwrCache
+from app.core.config import settings
+from app.crud.crud_tastytrade_balance import get_latest_balance_time, get_latest_balances
+from app.db.session import async_session_maker
+from app.services.pnl import get_pnl_periods
+from app.services.portfolio import balance_totals, get_position_metrics, last_updated
+
+
+async def _in_session(query: Callable[..., Awaitable[Any]], *args) -> Any:
+    # The primary, not the replica: a fill right after a sync must see the sync.
+    async with async_session_maker() as db:
+        return await query(db, *args)
+
+
+async def _balances(db: AsyncSession, account_id: uuid.UUID) -> dict:
+    return balance_totals(await get_latest_balances(db, account_id))
+
+
+async def build_dashboard(account_id: uuid.UUID) -> dict:
+    balances, positions, pnl = await asyncio.gather(
+        _in_session(_balances, account_id),
+        _in_session(get_position_metrics, account_id),
+        _in_session(get_pnl_periods, account_id),
+    )
+    positions.pop("positions")
+    summary = {"account_id": account_id, **balances, **positions, "pnl": pnl}
+    summary["last_updated_at"] = last_updated(summary)
+    summary["generated_at"] = datetime.now(timezone.utc)
+    return summary
+
+
+class DashboardService:
+    def __init__(self, cache: Optional[SwrCache] = None):
+        self.cache = cache or SwrCache(fresh_ttl=settings.DASHBOARD_CACHE_TTL, maxsize=settings.DASHBOARD_CACHE_SIZE)
+
+    async def get(self, account_id: uuid.UUID) -> dict:
+        synced_at = await _in_session(get_latest_balance_time, account_id)
+        entry = self.cache.peek(account_id)
+        if entry is not None and entry.value["balances_updated_at"] != synced_at:
+            self.cache.invalidate(account_id)
+        summary, _ = await self.cache.get(account_id, lambda: build_dashboard(account_id))
+        return summary
+
+    def invalidate(self, account_id: uuid.UUID) -> None:
+        # Also discards a build already in flight, which may predate the sync.
+        self.cache.invalidate(account_id)
+
+
+dashboard_service = DashboardService()
@@ -0,0 +1,10 @@
+from .providers import (
+    FileMarketDataProvider,
+    FinnhubMarketDataProvider,
+    MarketDataError,
+    MarketDataProvider,
+    Quote,
+    create_provider,
+    parse_quote,
+)
+from .service import MarketDataService, is_market_open, market_data_service, next_market_open, refresh_interval
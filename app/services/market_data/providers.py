@@ -0,0 +1,133 @@
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Sequence
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class MarketDataError(Exception):
+    """The provider returned no usable quotes."""
+
+
+@dataclass(frozen=True)
+class Quote:
+    symbol: str
+    price: float
+    change: float
+    percent_change: float
+    timestamp: Optional[datetime] = None    # provider's quote time, when it reports one
+
+
+def parse_quote(symbol: str, data: dict) -> Quote:
+    """Parse a Finnhub-style quote ({"c": last, "d": change, "dp": percent, "t": epoch seconds})."""
+    price = data.get("c")
+    if not price:
+        # Finnhub answers unknown symbols with zeros rather than an error.
+        raise MarketDataError(f"No quote for {symbol}")
+    change = data.get("d")
+    percent = data.get("dp")
+    previous_close = data.get("pc")
+    if change is None and previous_close:
+        change = price - previous_close
+    if percent is None and previous_close:
+        percent = (change or 0.0) / previous_close * 100
+    timestamp = data.get("t")
+    return Quote(
+        symbol=symbol,
+        price=float(price),
+        change=float(change or 0.0),
+        percent_change=float(percent or 0.0),
+        timestamp=datetime.fromtimestamp(timestamp, tz=timezone.utc) if timestamp else None,
+    )
+
+
+class MarketDataProvider(ABC):
+    name: str
+
+    @abstractmethod
+    async def fetch_quotes(self, symbols: Sequence[str]) -> dict[str, Quote]:
+        """Quotes for as many of `symbols` as possible; raises MarketDataError if none."""
+
+    async def close(self) -> None:
+        pass
+
+
+class FileMarketDataProvider(MarketDataProvider):
+    """Reads quotes from a JSON file of {symbol: quote}; for offline use and tests.
+
+    The file is re-read on every fetch, so editing it simulates new prices.
+    """
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    async def fetch_quotes(self, symbols: Sequence[str]) -> dict[str, Quote]:
+        try:
+            raw = await asyncio.to_thread(self.path.read_text)
+            data = json.loads(raw)
+        except (OSError, ValueError) as e:
+            raise MarketDataError(f"Cannot read quotes from {self.path}: {e}") from e
+        quotes = {}
+        for symbol in symbols:
+            if symbol not in data:
+                logger.warning("No quote for %s in %s", symbol, self.path)
+                continue
+            quotes[symbol] = parse_quote(symbol, data[symbol])
+        if not quotes:
+            raise MarketDataError(f"No quotes in {self.path}")
+        return quotes
+
+
+class FinnhubMarketDataProvider(MarketDataProvider):
+    """Finnhub /quote, one request per symbol, all in flight at once over one client."""
+    name = "finnhub"
+
+    def __init__(self, api_key: Optional[str], base_url: str, timeout: float):
+        if not api_key:
+            raise MarketDataError("EXTERNAL_MARKET_DATA_API_KEY is not set")
+        self._api_key = api_key
+        self._client = httpx.AsyncClient(base_url=base_url, timeout=timeout)
+
+    async def _fetch(self, symbol: str) -> Quote:
+        response = await self._client.get("/quote", params={"symbol": symbol, "token": self._api_key})
+        response.raise_for_status()
+        return parse_quote(symbol, response.json())
+
+    async def fetch_quotes(self, symbols: Sequence[str]) -> dict[str, Quote]:
+        results = await asyncio.gather(*(self._fetch(s) for s in symbols), return_exceptions=True)
+        quotes = {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                # Never log the request URL: it carries the API key.
+                logger.warning("Market data fetch for %s failed: %s", symbol, type(result).__name__)
+                continue
+            quotes[symbol] = result
+        if not quotes:
+            raise MarketDataError("Market data provider returned no quotes")
+        return quotes
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def create_provider(name: Optional[str] = None) -> MarketDataProvider:
+    name = name or settings.MARKET_DATA_PROVIDER
+    if name == "file":
+        return FileMarketDataProvider(settings.MARKET_DATA_FILE)
+    if name == "finnhub":
+        return FinnhubMarketDataProvider(
+            settings.EXTERNAL_MARKET_DATA_API_KEY,
+            settings.EXTERNAL_MARKET_DATA_API_BASE_URL,
+            settings.MARKET_DATA_TIMEOUT,
+        )
+    raise ValueError(f"Unknown market data provider: {name}")
@@ -0,0 +1,147 @@
+"""
+Market overview for the dashboard.
+
+Quotes come from a pluggable provider and live in an in-process
+stale-while-revalidate cache. A background refresher (app.background_tasks.
+market_data_tasks) normally keeps it fresh; requests only reach the provider
+when the refresher has fallen behind, and then all concurrent requests share
+one fetch.
+"""
+import asyncio
+import logging
+from datetime import datetime, time, timedelta, timezone
+from typing import Optional, Sequence
+from zoneinfo import ZoneInfo
+
+from app.core.cache import SwrCache
+from app.core.config import settings
+from app.core.metrics import MARKET_DATA_FETCHES
+from app.services.market_data.providers import MarketDataError, MarketDataProvider, Quote, create_provider
+
+logger = logging.getLogger(__name__)
+
+MARKET_TZ = ZoneInfo("America/New_York")
+MARKET_OPEN = time(9, 30)
+MARKET_CLOSE = time(16, 0)
+# Cached quotes count as fresh for this many refresh intervals, so a healthy
+# refresher always replaces them before a request has to.
+FRESH_TTL_FACTOR = 1.5
+OVERVIEW_KEY = "overview"
+
+
+def is_market_open(now: Optional[datetime] = None) -> bool:
+    """US equity regular hours, Monday to Friday. Exchange holidays are not modelled."""
+    local = (now or datetime.now(timezone.utc)).astimezone(MARKET_TZ)
+    return local.weekday() < 5 and MARKET_OPEN <= local.time() < MARKET_CLOSE
+
+
+def next_market_open(now: Optional[datetime] = None) -> datetime:
+    local = (now or datetime.now(timezone.utc)).astimezone(MARKET_TZ)
+    day = local.date() if local.time() < MARKET_OPEN else local.date() + timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return datetime.combine(day, MARKET_OPEN, tzinfo=MARKET_TZ)
+
+
+def refresh_interval(now: Optional[datetime] = None) -> float:
+    """Seconds until the next scheduled refresh; outside hours, never past the next open."""
+    now = now or datetime.now(timezone.utc)
+    if is_market_open(now):
+        return settings.MARKET_DATA_REFRESH_OPEN
+    until_open = (next_market_open(now) - now).total_seconds()
+    return max(1.0, min(settings.MARKET_DATA_REFRESH_CLOSED, until_open))
+
+
+class MarketDataService:
+    def __init__(
+        self,
+        provider: Optional[MarketDataProvider] = None,
+        symbols: Optional[dict[str, str]] = None,
+        cache: Optional[SwrCache] = None,
+    ):
+        self._provider = provider
+        self.symbols = symbols if symbols is not None else dict(settings.MARKET_INDEX_SYMBOLS)
+        self.cache = cache or SwrCache(
+            fresh_ttl=lambda: refresh_interval() * FRESH_TTL_FACTOR,
+            max_stale=settings.MARKET_DATA_MAX_STALE,
+            maxsize=1,
+        )
+        # Single-symbol quotes (underlyings for option pricing), on the same schedule.
+        self.quote_cache = SwrCache(
+            fresh_ttl=lambda: refresh_interval() * FRESH_TTL_FACTOR,
+            max_stale=settings.MARKET_DATA_MAX_STALE,
+        )
+
+    @property
+    def provider(self) -> MarketDataProvider:
+        # Created on first use so a misconfigured provider fails requests, not imports.
+        if self._provider is None:
+            self._provider = create_provider()
+        return self._provider
+
+    async def set_provider(self, provider: MarketDataProvider) -> None:
+        if self._provider is not None:
+            await self._provider.close()
+        self._provider = provider
+        self.cache.clear()
+        self.quote_cache.clear()
+
+    async def get_overview(self) -> dict:
+        overview, stale = await self.cache.get(OVERVIEW_KEY, self._fetch)
+        return {**overview, "stale": stale}
+
+    async def refresh(self) -> dict:
+        """Fetch now (joining a fetch already in flight) and cache the result."""
+        return await self.cache.load(OVERVIEW_KEY, self._fetch)
+
+    async def get_quotes(self, symbols: Sequence[str]) -> dict[str, Quote]:
+        """Cached quotes for `symbols`; symbols the provider has no quote for are left out."""
+        symbols = list(dict.fromkeys(symbols))
+        results = await asyncio.gather(*(self._get_quote(s) for s in symbols))
+        return {symbol: quote for symbol, quote in zip(symbols, results) if quote is not None}
+
+    async def _get_quote(self, symbol: str) -> Optional[Quote]:
+        async def load() -> Quote:
+            return (await self.provider.fetch_quotes([symbol]))[symbol]
+        try:
+            quote, _ = await self.quote_cache.get(symbol, load)
+        except (MarketDataError, KeyError):
+            return None
+        return quote
+
+    async def _fetch(self) -> dict:
+        provider = self.provider
+        try:
+            quotes = await provider.fetch_quotes(list(self.symbols))
+        except Exception:
+            MARKET_DATA_FETCHES.inc(1, provider.name, "error")
+            raise
+        MARKET_DATA_FETCHES.inc(1, provider.name, "ok")
+        fetched_at = datetime.now(timezone.utc)
+        # Symbols missing from this fetch keep their last known quote (and its older timestamp).
+        previous = self.cache.peek(OVERVIEW_KEY)
+        previous_indices = {i["symbol"]: i for i in previous.value["indices"]} if previous else {}
+        indices = []
+        for symbol, name in self.symbols.items():
+            quote = quotes.get(symbol)
+            if quote is None:
+                if symbol in previous_indices:
+                    indices.append(previous_indices[symbol])
+                continue
+            indices.append({
+                "name": name,
+                "symbol": symbol,
+                "current_value": quote.price,
+                "change_value": quote.change,
+                "percent_change": quote.percent_change,
+                "last_updated_at": quote.timestamp or fetched_at,
+            })
+        logger.info("Fetched %d of %d market quotes from %s", len(quotes), len(self.symbols), provider.name)
+        return {"indices": indices, "data_source_timestamp": fetched_at}
+
+    async def close(self) -> None:
+        if self._provider is not None:
+            await self._provider.close()
+
+
+market_data_service = MarketDataService()
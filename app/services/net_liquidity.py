@@ -0,0 +1,98 @@
+"""
+Net liquidity reconciliation.
+
+Explains the change in an account's net liquidity over a period:
+
+    ending = starting + realized P&L - fees + deposits - withdrawals
+             + other adjustments + change in unrealized P&L
+
+Starting and ending values are the broker-reported balances nearest the
+period boundaries, from raw snapshots or, for older periods, rolled-up days.
+Cash flows are summed per transaction type in SQL over the window between
+those two balances, realized P&L comes from the materialised daily P&L, and
+the change in unrealized P&L is whatever the reported ending value leaves
+unexplained. The cost is a fixed handful of indexed aggregate queries,
+whatever the length of the period.
+"""
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.crud_balance_history import get_net_liquidity_near
+from app.crud.crud_tastytrade_transaction import get_cash_flow_totals
+from app.services.pnl import get_pnl_summary
+from app.services.pnl.engine import TRADE_TYPES
+
+MONEY_MOVEMENT = "Money Movement"
+# Money movements that move funds in or out; other sub-types (interest,
+# dividends, fees, adjustments) are reported as other adjustments.
+TRANSFER_SUB_TYPES = ("Deposit", "Withdrawal", "Transfer")
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+async def _boundaries(db: AsyncSession, account_id: uuid.UUID, start: Optional[datetime], end: datetime):
+    """The balances to reconcile between: the last one at or before each boundary.
+
+    An account linked after `start` starts from its first balance instead.
+    """
+    starting = await get_net_liquidity_near(db, account_id, start) if start is not None else None
+    if starting is None:
+        starting = await get_net_liquidity_near(db, account_id, start or EPOCH, after=True)
+        if starting is not None and starting.at > end:
+            starting = None
+    ending = await get_net_liquidity_near(db, account_id, end)
+    if ending is not None and starting is not None and ending.at < starting.at:
+        ending = None
+    return starting, ending
+
+
+def classify_cash_flows(rows) -> dict:
+    """Fold per-type totals from get_cash_flow_totals into reconciliation components."""
+    flows = {"fees_and_commissions": 0.0, "cash_deposits": 0.0, "cash_withdrawals": 0.0, "other_adjustments": 0.0, "transactions": 0}
+    for row in rows:
+        flows["fees_and_commissions"] += float(row.fees)
+        flows["transactions"] += int(row.transactions)
+        if row.transaction_type in TRADE_TYPES:
+            # Trade cash is explained by realized P&L and the unrealized change.
+            continue
+        if row.transaction_type == MONEY_MOVEMENT and row.transaction_sub_type in TRANSFER_SUB_TYPES:
+            flows["cash_deposits"] += float(row.credits)
+            flows["cash_withdrawals"] -= float(row.debits)
+        else:
+            flows["other_adjustments"] += float(row.credits) + float(row.debits)
+    return flows
+
+
+async def reconcile_net_liquidity(
+    db: AsyncSession, account_id: uuid.UUID, start: Optional[datetime], end: datetime
+) -> dict:
+    starting, ending = await _boundaries(db, account_id, start, end)
+    # Flows are counted between the two balances actually reconciled.
+    window_start = starting.at if starting is not None else start
+    window_end = ending.at if ending is not None else end
+    flows = classify_cash_flows(await get_cash_flow_totals(db, account_id, window_start, window_end))
+    realized = (await get_pnl_summary(db, account_id, window_start, window_end))["realized_pnl"]
+
+    calculated = unrealized = None
+    if starting is not None:
+        calculated = (
+            starting.net_liquidity + realized - flows["fees_and_commissions"]
+            + flows["cash_deposits"] - flows["cash_withdrawals"] + flows["other_adjustments"]
+        )
+        if ending is not None:
+            unrealized = ending.net_liquidity - calculated
+    return {
+        "account_id": account_id,
+        "period_start": start,
+        "period_end": end,
+        "starting_net_liquidity": starting.net_liquidity if starting is not None else None,
+        "starting_balance_at": starting.at if starting is not None else None,
+        "realized_pnl": realized,
+        **flows,
+        "calculated_ending_net_liquidity": calculated,
+        "unrealized_pnl_change": unrealized,
+        "ending_net_liquidity": ending.net_liquidity if ending is not None else None,
+        "ending_balance_at": ending.at if ending is not None else None,
+    }
@@ -0,0 +1,4 @@
+from .engine import PnlResult, TransactionColumns, compute_realized_pnl
+from .service import PERIODS, compute_account_pnl, get_pnl_by_underlying, get_pnl_periods, get_pnl_summary, resolve_period
+from .snapshots import refresh_pnl_snapshots
+from .transaction_cache import TransactionCache, TransactionFrame, transaction_cache
@@ -0,0 +1,259 @@
+"""
+FIFO realized P&L over an account's transaction history.
+
+Input columns are converted to numpy arrays once; direction, cash and fee
+normalisation are vectorised, and the only per-row Python work left is the
+lot queue itself, run over plain lists one (sub-account, symbol) at a time:
+one login holds several sub-accounts, and a sale in one never closes a lot
+bought in another. Results are per row, so any period or grouping is a
+masked sum over the same arrays.
+
+Cash is taken from the broker's signed `value` (credits positive), which
+already includes the contract multiplier; `price * quantity * multiplier` is
+only a fallback for rows synced before `value` was stored.
+"""
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional, Sequence
+
+import numpy as np
+
+TRADE_TYPES = ("Trade", "Receive Deliver")
+# Receive Deliver sub-types that close an option position without an order action.
+CLOSING_SUB_TYPES = ("Expiration", "Assignment", "Exercise", "Cash Settled Assignment", "Cash Settled Exercise")
+BUY_ACTIONS = ("Buy to Open", "Buy to Close", "Buy")
+SELL_ACTIONS = ("Sell to Open", "Sell to Close", "Sell")
+MULTIPLIERS = {"Equity Option": 100.0}
+
+# Position-size comparisons are done with a tolerance; quantities are floats.
+EPSILON = 1e-9
+
+
+@dataclass
+class TransactionColumns:
+    """Column-oriented transaction history, sorted by (date, id)."""
+    timestamps: np.ndarray          # float64 epoch seconds
+    symbols: list
+    underlyings: list
+    transaction_types: list
+    sub_types: list
+    actions: list
+    instrument_types: list
+    account_numbers: list
+    quantities: np.ndarray          # float64, unsigned as reported
+    prices: np.ndarray              # float64, NaN when missing
+    values: np.ndarray              # float64 signed principal, NaN when missing
+    amounts: np.ndarray             # float64 signed net cash, NaN when missing
+    fees: np.ndarray                # float64, 0 when missing
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def slice(self, start: int, stop: int) -> "TransactionColumns":
+        return TransactionColumns(**{
+            name: value[start:stop] for name, value in vars(self).items()
+        })
+
+    @classmethod
+    def from_rows(cls, rows: Sequence) -> "TransactionColumns":
+        """Build from (date, symbol, underlying_symbol, transaction_type,
+        transaction_sub_type, action, instrument_type, quantity, price, value,
+        amount, fees, account_number) tuples."""
+        if rows:
+            (dates, symbols, underlyings, types, sub_types, actions, instruments,
+             quantities, prices, values, amounts, fees, accounts) = (list(c) for c in zip(*rows))
+        else:
+            dates = symbols = underlyings = types = sub_types = actions = instruments = accounts = []
+            quantities = prices = values = amounts = fees = []
+
+        def floats(column, fill=np.nan):
+            return np.array([fill if v is None else v for v in column], dtype=np.float64)
+
+        return cls(
+            timestamps=np.array([d.timestamp() if d is not None else np.nan for d in dates], dtype=np.float64),
+            symbols=symbols,
+            underlyings=underlyings,
+            transaction_types=types,
+            sub_types=sub_types,
+            actions=actions,
+            instrument_types=instruments,
+            account_numbers=accounts,
+            quantities=np.abs(floats(quantities, 0.0)),
+            prices=floats(prices),
+            values=floats(values),
+            amounts=floats(amounts),
+            fees=np.abs(floats(fees, 0.0)),
+        )
+
+
+@dataclass
+class OpenLot:
+    quantity: float                 # signed: positive long, negative short
+    cash_per_unit: float            # signed cash of the opening fill per unit
+    opened_at: float
+
+
+@dataclass
+class PnlResult:
+    """Per-row realized P&L plus the open lots left at the end of the history."""
+    timestamps: np.ndarray
+    underlyings: np.ndarray         # object array of underlying symbols ("" for cash rows)
+    realized: np.ndarray            # realized P&L booked on each row, before fees
+    closed_quantity: np.ndarray     # units closed by each row
+    fees: np.ndarray
+    open_lots: dict = field(default_factory=dict)   # {(account_number, symbol): deque of OpenLot}
+
+    def mask(self, start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+        mask = ~np.isnan(self.timestamps)
+        if start is not None:
+            mask &= self.timestamps >= start
+        if end is not None:
+            mask &= self.timestamps < end
+        return mask
+
+    def summary(self, start: Optional[float] = None, end: Optional[float] = None) -> dict:
+        mask = self.mask(start, end)
+        realized = float(self.realized[mask].sum())
+        fees = float(self.fees[mask].sum())
+        return {
+            "realized_pnl": realized,
+            "fees_total": fees,
+            "net_realized_pnl": realized - fees,
+            "closing_transactions": int(np.count_nonzero(self.closed_quantity[mask])),
+        }
+
+    def by_underlying(self, start: Optional[float] = None, end: Optional[float] = None) -> list[dict]:
+        mask = self.mask(start, end) & (self.underlyings != "")
+        names, codes = np.unique(self.underlyings[mask], return_inverse=True)
+        realized = np.bincount(codes, weights=self.realized[mask], minlength=len(names))
+        fees = np.bincount(codes, weights=self.fees[mask], minlength=len(names))
+        closing = np.bincount(codes, weights=(self.closed_quantity[mask] > 0), minlength=len(names))
+        return [
+            {
+                "underlying_symbol": str(name),
+                "realized_pnl": float(r),
+                "fees_total": float(f),
+                "net_realized_pnl": float(r - f),
+                "closing_transactions": int(c),
+            }
+            for name, r, f, c in zip(names, realized, fees, closing)
+        ]
+
+
+def underlying_of(symbol: Optional[str], underlying: Optional[str]) -> str:
+    if underlying:
+        return underlying
+    if not symbol:
+        return ""
+    # OCC option symbols pad the root to six characters: "AAPL  240119C00150000".
+    return symbol.split()[0]
+
+
+def _signed_quantities(cols: TransactionColumns, cash: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Signed position change per row and a flag for action-less closing rows."""
+    actions = np.array(cols.actions, dtype=object)
+    sub_types = np.array(cols.sub_types, dtype=object)
+    buys = np.isin(actions, BUY_ACTIONS)
+    sells = np.isin(actions, SELL_ACTIONS)
+    closing_only = ~buys & ~sells & np.isin(sub_types, CLOSING_SUB_TYPES)
+    # No action recorded (legacy rows): a debit is a buy, a credit a sell.
+    inferred = np.where(cash < 0, 1.0, np.where(cash > 0, -1.0, 0.0))
+    direction = np.where(buys, 1.0, np.where(sells, -1.0, np.where(closing_only, 0.0, inferred)))
+    return direction * cols.quantities, closing_only
+
+
+def _cash(cols: TransactionColumns) -> np.ndarray:
+    multipliers = np.array([MULTIPLIERS.get(t, 1.0) for t in cols.instrument_types], dtype=np.float64)
+    gross_from_amount = cols.amounts + cols.fees
+    actions = np.array(cols.actions, dtype=object)
+    sign = np.where(np.isin(actions, BUY_ACTIONS), -1.0, 1.0)
+    from_price = sign * cols.prices * cols.quantities * multipliers
+    cash = np.where(~np.isnan(cols.values), cols.values,
+                    np.where(~np.isnan(cols.amounts), gross_from_amount, from_price))
+    return np.nan_to_num(cash)
+
+
+def compute_realized_pnl(cols: TransactionColumns, initial_lots: Optional[dict] = None) -> PnlResult:
+    """`initial_lots` ({(account_number, symbol): [OpenLot, ...]}) resumes from a checkpoint; it is not mutated."""
+    n = len(cols)
+    symbols = np.array([s or "" for s in cols.symbols], dtype=object)
+    resolved: dict = {}
+    underlyings = np.array(
+        [resolved.get(k) or resolved.setdefault(k, underlying_of(*k)) for k in zip(cols.symbols, cols.underlyings)],
+        dtype=object,
+    ) if n else np.array([], dtype=object)
+    realized = np.zeros(n)
+    closed = np.zeros(n)
+    open_lots: dict[tuple, deque] = {
+        key: deque(OpenLot(l.quantity, l.cash_per_unit, l.opened_at) for l in lots)
+        for key, lots in (initial_lots or {}).items()
+        if lots
+    }
+    if n == 0:
+        return PnlResult(cols.timestamps, underlyings, realized, closed, cols.fees, open_lots)
+
+    cash = _cash(cols)
+    signed_qty, closing_only = _signed_quantities(cols, cash)
+    tradable = (
+        np.isin(np.array(cols.transaction_types, dtype=object), TRADE_TYPES)
+        & (symbols != "")
+        & ((signed_qty != 0) | closing_only)
+    )
+    rows = np.flatnonzero(tradable)
+    books = np.array([f"{a or ''}|{s}" for a, s in zip(cols.account_numbers, symbols)], dtype=object)
+    # Stable sort keeps each book's rows in date order.
+    rows = rows[np.argsort(books[rows], kind="stable")]
+    row_books = books[rows]
+    boundaries = np.flatnonzero(row_books[1:] != row_books[:-1]) + 1
+
+    qty_list = signed_qty.tolist()
+    cash_list = cash.tolist()
+    abs_qty_list = cols.quantities.tolist()
+    closing_list = closing_only.tolist()
+    ts_list = cols.timestamps.tolist()
+
+    for group in np.split(rows, boundaries):
+        if not len(group):
+            continue
+        key = (cols.account_numbers[group[0]] or None, str(symbols[group[0]]))
+        lots: deque = open_lots.pop(key, deque())
+        position = sum(l.quantity for l in lots)
+        for i in group.tolist():
+            if closing_list[i]:
+                if abs(position) < EPSILON:
+                    continue
+                # Expiry/assignment closes toward flat at the reported cash (usually zero).
+                qty = -np.sign(position) * min(abs_qty_list[i], abs(position))
+            else:
+                qty = qty_list[i]
+            units = abs(qty)
+            if units < EPSILON:
+                # Adjustment and expiry rows may report no quantity; nothing to close.
+                continue
+            cash_per_unit = cash_list[i] / units
+            if abs(position) < EPSILON or (qty > 0) == (position > 0):
+                lots.append(OpenLot(qty, cash_per_unit, ts_list[i]))
+                position += qty
+                continue
+            remaining = units
+            pnl = 0.0
+            while remaining > EPSILON and lots:
+                lot = lots[0]
+                matched = min(remaining, abs(lot.quantity))
+                pnl += matched * (lot.cash_per_unit + cash_per_unit)
+                remaining -= matched
+                lot.quantity -= matched if lot.quantity > 0 else -matched
+                if abs(lot.quantity) < EPSILON:
+                    lots.popleft()
+            realized[i] += pnl
+            closed[i] += units - remaining
+            position += qty
+            if remaining > EPSILON:
+                # The fill went through flat: the excess opens a position the other way.
+                lots.append(OpenLot(np.sign(qty) * remaining, cash_per_unit, ts_list[i]))
+            if abs(position) < EPSILON:
+                position = 0.0
+        if lots:
+            open_lots[key] = lots
+
+    return PnlResult(cols.timestamps, underlyings, realized, closed, cols.fees, open_lots)
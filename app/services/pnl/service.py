@@ -0,0 +1,78 @@
+import uuid
+from datetime import datetime, time, timedelta, timezone
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud.crud_pnl_snapshot import get_latest_checkpoint
+from app.services.pnl.engine import PnlResult, compute_realized_pnl
+from app.services.pnl.snapshots import get_materialized_by_underlying, get_materialized_periods, get_materialized_summary
+from app.services.pnl.transaction_cache import transaction_cache
+
+PERIODS = ("daily", "mtd", "ytd", "all_time")
+
+def resolve_period(
+    period: Optional[str],
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    now: Optional[datetime] = None,
+) -> tuple[Optional[datetime], datetime]:
+    """Turn a named period or explicit dates into a UTC [start, end) range."""
+    now = now or datetime.now(timezone.utc)
+    if start_date is not None or end_date is not None:
+        start = _utc(start_date) if start_date else None
+        end = _utc(end_date) if end_date else now
+        if start is not None and start >= end:
+            raise ValueError("start_date must be before end_date")
+        return start, end
+    today = datetime.combine(now.date(), time.min, tzinfo=timezone.utc)
+    period = period or "all_time"
+    if period == "daily":
+        return today, today + timedelta(days=1)
+    if period == "mtd":
+        return today.replace(day=1), now
+    if period == "ytd":
+        return today.replace(month=1, day=1), now
+    if period == "all_time":
+        return None, now
+    raise ValueError(f"Unknown period {period!r}")
+
+def _utc(value: datetime) -> datetime:
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+async def compute_account_pnl(db: AsyncSession, account_id: uuid.UUID, end: Optional[datetime] = None) -> PnlResult:
+    # FIFO needs every opening lot, so history is always read from the start.
+    frame = await transaction_cache.get(db, account_id)
+    return compute_realized_pnl(frame.columns(end=end))
+
+async def _is_materialized(db: AsyncSession, account_id: uuid.UUID) -> bool:
+    return await get_latest_checkpoint(db, account_id) is not None
+
+async def get_pnl_summary(
+    db: AsyncSession, account_id: uuid.UUID, start: Optional[datetime], end: datetime
+) -> dict:
+    # Daily snapshots when the account has been materialised, the full engine otherwise.
+    if await _is_materialized(db, account_id):
+        summary = await get_materialized_summary(db, account_id, start, end)
+    else:
+        result = await compute_account_pnl(db, account_id, end=end)
+        summary = result.summary(start.timestamp() if start else None, end.timestamp())
+    return {"account_id": account_id, "period_start": start, "period_end": end, **summary}
+
+async def get_pnl_by_underlying(
+    db: AsyncSession, account_id: uuid.UUID, start: Optional[datetime], end: datetime
+) -> list[dict]:
+    if await _is_materialized(db, account_id):
+        return await get_materialized_by_underlying(db, account_id, start, end)
+    result = await compute_account_pnl(db, account_id, end=end)
+    return result.by_underlying(start.timestamp() if start else None, end.timestamp())
+
+async def get_pnl_periods(db: AsyncSession, account_id: uuid.UUID, now: Optional[datetime] = None) -> dict[str, dict]:
+    """Summaries for every named period, computed together."""
+    now = now or datetime.now(timezone.utc)
+    ranges = {period: resolve_period(period, now=now) for period in PERIODS}
+    if await _is_materialized(db, account_id):
+        return await get_materialized_periods(db, account_id, ranges)
+    result = await compute_account_pnl(db, account_id, end=max(end for _, end in ranges.values()))
+    return {
+        period: result.summary(start.timestamp() if start else None, end.timestamp())
+        for period, (start, end) in ranges.items()
+    }
@@ -0,0 +1,174 @@
+"""
+Materialised daily P&L.
+
+Realized P&L is stored per (account, UTC day, underlying) in
+pnl_daily_snapshots, and the FIFO open-lot state is checkpointed at the end of
+each calendar month of history (and at the last transaction day). A sync that
+changes transactions from day D onward resumes from the latest checkpoint
+before D and rewrites only the snapshots after it. Reports become range sums
+over the snapshot table.
+"""
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.crud_pnl_snapshot import (
+    add_checkpoint,
+    bulk_insert_snapshots,
+    delete_pnl_from,
+    get_latest_checkpoint,
+    get_pnl_period_totals,
+    get_pnl_totals,
+)
+from app.services.pnl.engine import OpenLot, PnlResult, compute_realized_pnl
+from app.services.pnl.transaction_cache import TransactionFrame, transaction_cache
+
+EPOCH = date(1970, 1, 1)
+SECONDS_PER_DAY = 86400
+
+
+def _lots_to_json(open_lots: dict) -> dict:
+    # JSON keys are strings, so lots nest by sub-account ("" when unknown), then symbol.
+    data: dict = {}
+    for (account_number, symbol), lots in open_lots.items():
+        data.setdefault(account_number or "", {})[symbol] = [
+            [lot.quantity, lot.cash_per_unit, lot.opened_at] for lot in lots
+        ]
+    return data
+
+
+def _lots_from_json(data: dict) -> dict:
+    return {
+        (account_number or None, symbol): [OpenLot(*lot) for lot in lots]
+        for account_number, books in data.items()
+        for symbol, lots in books.items()
+    }
+
+
+def _daily_rows(result: PnlResult) -> list[dict]:
+    """Collapse per-row results into one row per (day, underlying)."""
+    keep = (result.underlyings != "") & (
+        (result.realized != 0) | (result.fees != 0) | (result.closed_quantity > 0)
+    )
+    if not keep.any():
+        return []
+    days = np.floor(result.timestamps[keep] / SECONDS_PER_DAY).astype(np.int64)
+    names, name_codes = np.unique(result.underlyings[keep], return_inverse=True)
+    keys, codes = np.unique(days * len(names) + name_codes, return_inverse=True)
+    realized = np.bincount(codes, weights=result.realized[keep])
+    fees = np.bincount(codes, weights=result.fees[keep])
+    closing = np.bincount(codes, weights=(result.closed_quantity[keep] > 0))
+    return [
+        {
+            "day": EPOCH + timedelta(days=int(key // len(names))),
+            "underlying_symbol": str(names[key % len(names)]),
+            "realized_pnl": float(r),
+            "fees": float(f),
+            "closing_transactions": int(c),
+        }
+        for key, r, f, c in zip(keys.tolist(), realized, fees, closing)
+    ]
+
+
+async def refresh_pnl_snapshots(
+    db: AsyncSession,
+    account_id: uuid.UUID,
+    changed_since: Optional[datetime] = None,
+    force: bool = False,
+    frame: Optional[TransactionFrame] = None,
+) -> Optional[date]:
+    """Recompute snapshots affected by transactions dated at or after `changed_since`.
+
+    Returns the first day rewritten, or None when nothing needed doing. An
+    account that has never been materialised is rebuilt from the start.
+    History comes from `frame` when given (a sync passes the one holding its
+    uncommitted writes), otherwise from the transaction cache. Does not commit.
+    """
+    checkpoint = None
+    if not force:
+        latest = await get_latest_checkpoint(db, account_id)
+        if latest is not None:
+            if changed_since is None:
+                return None
+            changed_day = changed_since.astimezone(timezone.utc).date()
+            checkpoint = latest if latest.day < changed_day else await get_latest_checkpoint(db, account_id, before=changed_day)
+    resume_day = checkpoint.day + timedelta(days=1) if checkpoint else None
+    resume_at = datetime.combine(resume_day, time.min, tzinfo=timezone.utc) if resume_day else None
+
+    await delete_pnl_from(db, account_id, resume_day)
+    if frame is None:
+        frame = await transaction_cache.get(db, account_id)
+    cols = frame.dated_columns(start=resume_at)
+    if not len(cols):
+        return None
+    lots = _lots_from_json(checkpoint.open_lots) if checkpoint else {}
+
+    # One engine pass per calendar month, checkpointing the lots carried between them.
+    months = cols.timestamps.astype("datetime64[s]").astype("datetime64[M]")
+    boundaries = np.flatnonzero(months[1:] != months[:-1]) + 1
+    snapshot_rows: list[dict] = []
+    for start, stop in zip(np.r_[0, boundaries], np.r_[boundaries, len(cols)]):
+        result = compute_realized_pnl(cols.slice(int(start), int(stop)), initial_lots=lots)
+        snapshot_rows.extend(_daily_rows(result))
+        lots = result.open_lots
+        last_day = EPOCH + timedelta(days=int(cols.timestamps[stop - 1] // SECONDS_PER_DAY))
+        await add_checkpoint(db, account_id, last_day, _lots_to_json(lots))
+    await bulk_insert_snapshots(db, account_id, snapshot_rows)
+    return resume_day or EPOCH + timedelta(days=int(cols.timestamps[0] // SECONDS_PER_DAY))
+
+
+def day_range(start: Optional[datetime], end: Optional[datetime]) -> tuple[Optional[date], Optional[date]]:
+    """[start, end) datetimes to whole UTC days; a partial end day is included."""
+    start_day = start.astimezone(timezone.utc).date() if start else None
+    end_day = None
+    if end is not None:
+        end = end.astimezone(timezone.utc)
+        end_day = end.date() if end.time() == time.min else end.date() + timedelta(days=1)
+    return start_day, end_day
+
+
+def _summary(realized, fees, closing) -> dict:
+    return {
+        "realized_pnl": float(realized),
+        "fees_total": float(fees),
+        "net_realized_pnl": float(realized) - float(fees),
+        "closing_transactions": int(closing),
+    }
+
+
+async def get_materialized_summary(
+    db: AsyncSession, account_id: uuid.UUID, start: Optional[datetime], end: Optional[datetime]
+) -> dict:
+    start_day, end_day = day_range(start, end)
+    (realized, fees, closing), = await get_pnl_totals(db, account_id, start_day, end_day)
+    return _summary(realized, fees, closing)
+
+
+async def get_materialized_periods(
+    db: AsyncSession, account_id: uuid.UUID, ranges: dict[str, tuple[Optional[datetime], datetime]]
+) -> dict[str, dict]:
+    """Summaries for several ranges sharing one end, from a single scan of the snapshots."""
+    days = {name: day_range(start, end) for name, (start, end) in ranges.items()}
+    end_day = max(end for _, end in days.values())
+    totals = await get_pnl_period_totals(db, account_id, {name: start for name, (start, _) in days.items()}, end_day)
+    return {name: _summary(*totals[name]) for name in ranges}
+
+
+async def get_materialized_by_underlying(
+    db: AsyncSession, account_id: uuid.UUID, start: Optional[datetime], end: Optional[datetime]
+) -> list[dict]:
+    start_day, end_day = day_range(start, end)
+    rows = await get_pnl_totals(db, account_id, start_day, end_day, by_underlying=True)
+    return [
+        {
+            "underlying_symbol": underlying,
+            "realized_pnl": float(realized),
+            "fees_total": float(fees),
+            "net_realized_pnl": float(realized) - float(fees),
+            "closing_transactions": int(closing),
+        }
+        for underlying, realized, fees, closing in rows
+    ]
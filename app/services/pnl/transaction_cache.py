@@ -0,0 +1,230 @@
+"""
+Per-account columnar cache of transaction history for analytics.
+
+An account's history is loaded once, on first use, into a TransactionFrame:
+one float64 timestamp array, an int32 matrix of dictionary-encoded string
+columns (symbol, underlying, type, sub-type, action, instrument, sub-account)
+and a float64 matrix of numeric columns. Frames are immutable, so a reader
+keeps a consistent view while the cache moves on. Accounts are evicted
+least-recently-used once the cache exceeds TRANSACTION_CACHE_MAX_BYTES.
+
+Every sync that changes transactions bumps the account's transactions_version
+in the same database transaction, and each entry remembers the version it was
+loaded at. A read compares the two with a primary-key lookup, so a sync
+committed by any worker makes every other process reload. The syncing worker
+itself splices the changed rows into its cached frame inside the sync
+transaction (the daily P&L rebuild reads that frame) and publishes it once the
+sync commits.
+"""
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional, Sequence
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud.crud_tastytrade_account import get_transactions_version
+from app.crud.crud_tastytrade_transaction import PNL_COLUMNS, get_transaction_columns
+from app.services.pnl.engine import TransactionColumns
+
+logger = logging.getLogger(__name__)
+
+STRING_COLUMNS = ("symbols", "underlyings", "transaction_types", "sub_types", "actions", "instrument_types", "account_numbers")
+NUMBER_COLUMNS = ("quantities", "prices", "values", "amounts", "fees")
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# Rough per-string cost of a vocabulary entry (object, list slot and dict entry).
+STRING_OVERHEAD_BYTES = 120
+
+
+class Vocabulary:
+    """Append-only string dictionary shared by every string column of one account; code 0 is None."""
+
+    def __init__(self):
+        self._values: list = [None]
+        self._codes: dict = {None: 0}
+        self._array: Optional[np.ndarray] = None
+        self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def encode(self, column: Sequence) -> np.ndarray:
+        codes = self._codes
+        out = np.empty(len(column), dtype=np.int32)
+        for i, value in enumerate(column):
+            code = codes.get(value)
+            if code is None:
+                code = codes[value] = len(self._values)
+                self._values.append(value)
+                self.nbytes += STRING_OVERHEAD_BYTES + len(value)
+                self._array = None
+            out[i] = code
+        return out
+
+    def decode(self, codes: np.ndarray) -> list:
+        if self._array is None or len(self._array) != len(self._values):
+            self._array = np.array(self._values, dtype=object)
+        return self._array[codes].tolist()
+
+
+@dataclass(frozen=True)
+class TransactionFrame:
+    """Rows in (date, id) order; undated rows, if any, follow the `dated` dated ones."""
+    timestamps: np.ndarray          # float64 epoch seconds, NaN when undated
+    strings: np.ndarray             # int32 (n, len(STRING_COLUMNS)) vocabulary codes
+    numbers: np.ndarray             # float64 (n, len(NUMBER_COLUMNS)), normalised as in TransactionColumns
+    vocabulary: Vocabulary
+    dated: int
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def nbytes(self) -> int:
+        return self.timestamps.nbytes + self.strings.nbytes + self.numbers.nbytes + self.vocabulary.nbytes
+
+    @classmethod
+    def from_rows(cls, rows: Sequence, vocabulary: Optional[Vocabulary] = None) -> "TransactionFrame":
+        """Build from get_transaction_columns rows (PNL_COLUMNS) in (date, id) order."""
+        vocabulary = vocabulary or Vocabulary()
+        cols = TransactionColumns.from_rows(rows)
+        strings = np.empty((len(cols), len(STRING_COLUMNS)), dtype=np.int32)
+        for j, name in enumerate(STRING_COLUMNS):
+            strings[:, j] = vocabulary.encode(getattr(cols, name))
+        numbers = np.column_stack([getattr(cols, name) for name in NUMBER_COLUMNS]) if len(cols) else np.empty((0, len(NUMBER_COLUMNS)))
+        return cls(cols.timestamps, strings, numbers, vocabulary, int(np.count_nonzero(~np.isnan(cols.timestamps))))
+
+    def _take(self, index) -> tuple:
+        return self.timestamps[index], self.strings[index], self.numbers[index]
+
+    def replace_from(self, since: float, rows: Sequence) -> "TransactionFrame":
+        """Drop dated rows at or after `since` and splice in `rows` (dated, sorted, all at or after it)."""
+        keep = int(np.searchsorted(self.timestamps[:self.dated], since, side="left"))
+        fresh = TransactionFrame.from_rows(rows, self.vocabulary)
+        parts = [self._take(slice(0, keep)), (fresh.timestamps, fresh.strings, fresh.numbers), self._take(slice(self.dated, None))]
+        timestamps, strings, numbers = (np.concatenate([p[k] for p in parts]) for k in range(3))
+        return TransactionFrame(timestamps, strings, numbers, self.vocabulary, keep + fresh.dated)
+
+    def columns(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> TransactionColumns:
+        """Rows dated in [start, end), or every row (undated ones too) when neither is given."""
+        if start is None and end is None:
+            return self._columns(slice(None))
+        return self.dated_columns(start, end)
+
+    def dated_columns(self, start: Optional[datetime] = None, end: Optional[datetime] = None) -> TransactionColumns:
+        """Rows dated in [start, end); either bound may be open."""
+        dated = self.timestamps[:self.dated]
+        lo = int(np.searchsorted(dated, start.timestamp(), side="left")) if start is not None else 0
+        hi = int(np.searchsorted(dated, end.timestamp(), side="left")) if end is not None else self.dated
+        return self._columns(slice(lo, max(lo, hi)))
+
+    def _columns(self, index: slice) -> TransactionColumns:
+        timestamps, strings, numbers = self._take(index)
+        return TransactionColumns(
+            timestamps=timestamps,
+            **{name: self.vocabulary.decode(strings[:, j]) for j, name in enumerate(STRING_COLUMNS)},
+            **{name: numbers[:, j] for j, name in enumerate(NUMBER_COLUMNS)},
+        )
+
+
+class TransactionCache:
+    """LRU of TransactionFrames keyed by account id, bounded by total bytes."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        # Frame, the transactions_version it reflects and its size when stored;
+        # the shared vocabulary may grow later.
+        self._entries: "OrderedDict[uuid.UUID, tuple[TransactionFrame, int, int]]" = OrderedDict()
+        self._locks: dict[uuid.UUID, asyncio.Lock] = {}
+        self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, account_id: uuid.UUID) -> bool:
+        return account_id in self._entries
+
+    def _lock(self, account_id: uuid.UUID) -> asyncio.Lock:
+        lock = self._locks.get(account_id)
+        if lock is None:
+            lock = self._locks[account_id] = asyncio.Lock()
+        return lock
+
+    def _cached(self, account_id: uuid.UUID, version: Optional[int]) -> Optional[TransactionFrame]:
+        entry = self._entries.get(account_id)
+        if entry is None or entry[1] != version:
+            return None
+        self._entries.move_to_end(account_id)
+        return entry[0]
+
+    def _store(self, account_id: uuid.UUID, frame: TransactionFrame, version: Optional[int]) -> None:
+        self._drop(account_id)
+        size = frame.nbytes
+        if size > self.max_bytes:
+            logger.info("Transaction history of %s (%d bytes) exceeds the cache budget", account_id, size)
+            return
+        self._entries[account_id] = (frame, version, size)
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, account_id: uuid.UUID) -> None:
+        entry = self._entries.pop(account_id, None)
+        if entry is not None:
+            self.nbytes -= entry[2]
+            lock = self._locks.get(account_id)
+            if lock is not None and not lock.locked():
+                del self._locks[account_id]
+
+    async def get(self, db: AsyncSession, account_id: uuid.UUID) -> TransactionFrame:
+        """The account's history as of the latest sync committed by any worker."""
+        # The version is read before the rows: a sync committing in between
+        # leaves the entry looking stale, never a stale entry looking current.
+        version = await get_transactions_version(db, account_id)
+        frame = self._cached(account_id, version)
+        if frame is not None:
+            return frame
+        # Concurrent reads of one changed account share a single load.
+        async with self._lock(account_id):
+            frame = self._cached(account_id, version)
+            if frame is None:
+                frame = TransactionFrame.from_rows(await get_transaction_columns(db, account_id, PNL_COLUMNS))
+                self._store(account_id, frame, version)
+            return frame
+
+    async def pending(
+        self, db: AsyncSession, account_id: uuid.UUID, changed_since: datetime, version: int
+    ) -> TransactionFrame:
+        """Inside a sync transaction that bumped the account to `version`: the history including its writes.
+
+        The cached frame is reused when it is at the version just before, and
+        only rows dated at or after `changed_since` are re-read; otherwise the
+        whole history is. Nothing is stored until `publish`.
+        """
+        entry = self._entries.get(account_id)
+        if entry is None or entry[1] != version - 1 or changed_since <= EPOCH:
+            # Undated rows changed too: their order is unknown, so reload everything.
+            return TransactionFrame.from_rows(await get_transaction_columns(db, account_id, PNL_COLUMNS))
+        rows = await get_transaction_columns(db, account_id, PNL_COLUMNS, start=changed_since)
+        return entry[0].replace_from(changed_since.timestamp(), rows)
+
+    def publish(self, account_id: uuid.UUID, frame: TransactionFrame, version: int) -> None:
+        """Cache a `pending` frame once its sync has committed."""
+        entry = self._entries.get(account_id)
+        if entry is None or entry[1] is None or entry[1] < version:
+            self._store(account_id, frame, version)
+
+    def invalidate(self, account_id: uuid.UUID) -> None:
+        self._drop(account_id)
+
+    def clear(self) -> None:
+        for account_id in list(self._entries):
+            self._drop(account_id)
+
+
+transaction_cache = TransactionCache(max_bytes=settings.TRANSACTION_CACHE_MAX_BYTES)
@@ -0,0 +1,9 @@
+from .greeks import Greeks, black_scholes, implied_volatility, norm_cdf
+from .metrics import (
+    aggregate_greeks,
+    balance_totals,
+    get_current_portfolio_metrics,
+    get_position_metrics,
+    last_updated,
+    price_positions,
+)
@@ -0,0 +1,183 @@
+"""
+Current portfolio metrics for an account: balances from the latest sync and
+greeks for the latest position snapshot.
+
+The sync stores positions without greeks, so options are priced here. Each
+leg's implied volatility is solved from its synced mark and the underlying's
+price, then Black-Scholes greeks are computed for the whole book in one
+vectorised pass. Underlying prices come from the market data provider.
+"""
+import uuid
+from datetime import date, datetime, timezone
+from typing import Any, Optional, Sequence
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud.crud_tastytrade_balance import get_latest_balances
+from app.crud.crud_tastytrade_position import get_latest_positions
+from app.services.market_data import market_data_service
+from app.services.market_data.service import MARKET_CLOSE, MARKET_TZ
+from app.services.portfolio.greeks import DAYS_PER_YEAR, black_scholes, implied_volatility
+from app.services.strategies.occ import parse_occ_symbol
+
+OPTION_MULTIPLIER = 100
+GREEKS = ("delta", "gamma", "theta", "vega")
+SECONDS_PER_YEAR = DAYS_PER_YEAR * 86400
+
+
+def years_to_expiry(expiry: date, now: datetime) -> float:
+    # Equity options stop trading at the close on their expiry date.
+    expires_at = datetime.combine(expiry, MARKET_CLOSE, tzinfo=MARKET_TZ)
+    return (expires_at - now).total_seconds() / SECONDS_PER_YEAR
+
+
+def _is_future(symbol: str) -> bool:
+    return symbol.startswith("/")
+
+
+def price_positions(
+    positions: Sequence[Any],
+    spots: dict[str, float],
+    now: Optional[datetime] = None,
+    rate: Optional[float] = None,
+) -> list[dict]:
+    """Greeks per position, already scaled by quantity and contract multiplier.
+
+    `positions` need symbol, quantity (signed), market_value and
+    account_number; `spots` maps underlying symbols to prices. Stock has a
+    delta of its share count. Options are priced at the volatility implied by
+    their mark; options without a mark or an underlying price, and futures,
+    are returned with greeks of None.
+    """
+    now = now or datetime.now(timezone.utc)
+    rate = settings.RISK_FREE_RATE if rate is None else rate
+    legs = []
+    options = []
+    columns: dict[str, list] = {"mark": [], "spot": [], "strike": [], "years": [], "is_call": []}
+    for position in positions:
+        if not position.quantity:
+            continue
+        quantity = float(position.quantity)
+        leg = {
+            "account_number": position.account_number,
+            "symbol": position.symbol,
+            "quantity": quantity,
+            "instrument": "option",
+            "underlying": position.symbol,
+            "underlying_price": None,
+            "implied_volatility": None,
+            **dict.fromkeys(GREEKS),
+        }
+        legs.append(leg)
+        option = parse_occ_symbol(position.symbol)
+        if option is None:
+            if _is_future(position.symbol):
+                leg["instrument"] = "future"
+                continue
+            leg.update(instrument="equity", underlying_price=spots.get(position.symbol), delta=quantity, gamma=0.0, theta=0.0, vega=0.0)
+            continue
+        leg["underlying"] = option.root
+        spot = leg["underlying_price"] = spots.get(option.root)
+        if spot is None or not position.market_value:
+            continue
+        options.append(leg)
+        # market_value is the synced mark price times size and multiplier.
+        columns["mark"].append(abs(position.market_value) / abs(quantity) / OPTION_MULTIPLIER)
+        columns["spot"].append(spot)
+        columns["strike"].append(float(option.strike))
+        columns["years"].append(years_to_expiry(option.expiry, now))
+        columns["is_call"].append(option.option_type == "C")
+
+    if not options:
+        return legs
+    mark, spot, strike, years = (np.array(columns[c], dtype=np.float64) for c in ("mark", "spot", "strike", "years"))
+    is_call = np.array(columns["is_call"], dtype=bool)
+    volatility = implied_volatility(mark, spot, strike, years, is_call, rate)
+    expired = years <= 0
+    # Expired legs are valued at intrinsic; black_scholes ignores their volatility.
+    priced = expired | ~np.isnan(volatility)
+    greeks = black_scholes(spot, strike, years, np.where(priced, np.nan_to_num(volatility), 0.0), is_call, rate)
+    size = np.array([leg["quantity"] for leg in options]) * OPTION_MULTIPLIER
+    scaled = {name: (getattr(greeks, name) * size).tolist() for name in GREEKS}
+    volatility_list = volatility.tolist()
+    for i in np.flatnonzero(priced).tolist():
+        leg = options[i]
+        leg["implied_volatility"] = None if expired[i] else volatility_list[i]
+        for name in GREEKS:
+            leg[name] = scaled[name][i]
+    return legs
+
+
+def aggregate_greeks(legs: Sequence[dict]) -> dict[str, Optional[float]]:
+    """Portfolio greeks over the priced legs; None when no leg could be priced."""
+    priced = [leg for leg in legs if leg["delta"] is not None]
+    if not priced:
+        return {f"portfolio_{name}": None for name in GREEKS}
+    values = np.array([[leg[name] for name in GREEKS] for leg in priced], dtype=np.float64)
+    totals = values.sum(axis=0).tolist()
+    return {f"portfolio_{name}": total for name, total in zip(GREEKS, totals)}
+
+
+async def _underlying_prices(positions: Sequence[Any]) -> dict[str, float]:
+    # Quotes for option roots and stock legs; futures have no equity quote.
+    symbols = set()
+    for position in positions:
+        option = parse_occ_symbol(position.symbol)
+        if option is not None:
+            symbols.add(option.root)
+        elif position.quantity and not _is_future(position.symbol):
+            symbols.add(position.symbol)
+    if not symbols:
+        return {}
+    quotes = await market_data_service.get_quotes(sorted(symbols))
+    return {symbol: quote.price for symbol, quote in quotes.items()}
+
+
+def balance_totals(balances: Sequence[Any]) -> dict:
+    """Sum the latest balance rows (one per sub-account)."""
+    def total(field: str) -> Optional[float]:
+        values = [getattr(b, field) for b in balances if getattr(b, field) is not None]
+        return sum(values) if values else None
+
+    net_liquidity = total("net_liquidating_value")
+    maintenance = total("maintenance_requirement")
+    return {
+        "net_liquidity": net_liquidity,
+        "cash": total("cash"),
+        "derivative_buying_power": total("derivative_buying_power"),
+        "equity_buying_power": total("equity_buying_power"),
+        "maintenance_requirement": maintenance,
+        # Share of net liquidity held as margin, as the broker reports BP usage.
+        "buying_power_usage": maintenance / net_liquidity if maintenance is not None and net_liquidity else None,
+        "balances_updated_at": balances[0].created_at if balances else None,
+    }
+
+
+async def get_position_metrics(db: AsyncSession, account_id: uuid.UUID) -> dict:
+    """Greeks and counts for the latest position snapshot."""
+    positions = await get_latest_positions(db, account_id)
+    legs = price_positions(positions, await _underlying_prices(positions))
+    return {
+        **aggregate_greeks(legs),
+        "open_positions_count": len(legs),
+        "priced_positions_count": sum(1 for leg in legs if leg["delta"] is not None),
+        "positions_updated_at": positions[0].created_at if positions else None,
+        "positions": legs,
+    }
+
+
+def last_updated(metrics: dict) -> Optional[datetime]:
+    updated = [t for t in (metrics.get("balances_updated_at"), metrics.get("positions_updated_at")) if t]
+    return max(updated) if updated else None
+
+
+async def get_current_portfolio_metrics(db: AsyncSession, account_id: uuid.UUID) -> dict:
+    metrics = {
+        "account_id": account_id,
+        **balance_totals(await get_latest_balances(db, account_id)),
+        **await get_position_metrics(db, account_id),
+    }
+    metrics["last_updated_at"] = last_updated(metrics)
+    return metrics
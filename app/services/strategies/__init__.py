@@ -0,0 +1,4 @@
+from .matcher import PositionLeg, StrategyMatch, identify_strategies
+from .occ import OptionSymbol, parse_occ_symbol
+from .service import identify_position_groups
+from .tagging import tag_transaction_history
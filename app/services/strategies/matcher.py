@@ -0,0 +1,328 @@
+"""
+Rule-based identification of option strategies in a set of open positions.
+
+Legs are grouped by (account number, underlying). Each group becomes a book
+of remaining signed quantity per (expiry, type, strike), indexed by sorted
+strike lists per (expiry, type, side) and sorted expiry lists per
+(type, strike, side). Rules run from the most to the least specific
+structure; each one walks its anchor legs and finds partner legs by
+bisection or exact lookup, so a book with hundreds of legs costs roughly
+O(n log n) rather than trying every leg combination. Matched quantity is
+consumed, so a leg can be split across several strategies. A rule that
+cannot take a whole unit (e.g. a fractional partner leg) moves on to the
+next anchor rather than retrying.
+"""
+import math
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from typing import Iterable, Optional
+
+from app.services.strategies.occ import CALL, PUT, parse_occ_symbol
+
+LONG = 1
+SHORT = -1
+SHARES_PER_CONTRACT = 100
+# The underlying's shares live in the book under this key.
+STOCK = None
+
+EPSILON = 1e-9
+
+@dataclass(frozen=True)
+class PositionLeg:
+    account_number: Optional[str]
+    symbol: str
+    quantity: float                 # signed: negative when short
+
+
+@dataclass
+class StrategyMatch:
+    strategy: str
+    account_number: Optional[str]
+    underlying: str
+    expiry: Optional[date]          # nearest expiry among the option legs
+    legs: list = field(default_factory=list)   # [(symbol, signed quantity), ...]
+
+    @property
+    def key(self) -> str:
+        """Stable identity across syncs: strategy, sub-account and leg symbols (not sizes)."""
+        symbols = ",".join(sorted("".join(symbol.split()) for symbol, _ in self.legs))
+        return f"{self.strategy}|{self.account_number or ''}|{symbols}"
+
+    @property
+    def name(self) -> str:
+        return f"{self.strategy} {self.underlying} {self.expiry.isoformat()}" if self.expiry else f"{self.strategy} {self.underlying}"
+
+
+def _below(values: list, value):
+    i = bisect_left(values, value)
+    return values[i - 1] if i else None
+
+
+def _above(values: list, value):
+    i = bisect_right(values, value)
+    return values[i] if i < len(values) else None
+
+
+def _side(quantity: float) -> int:
+    return LONG if quantity > 0 else SHORT
+
+
+class _Book:
+    """Remaining quantity of one underlying in one sub-account."""
+
+    def __init__(self, account_number: Optional[str], underlying: str):
+        self.account_number = account_number
+        self.underlying = underlying
+        self.qty: dict = {}
+        self.symbols: dict = {}
+        self.expiries: list[date] = []
+        self._strikes: dict[tuple, list] = defaultdict(list)
+        self._expiry_index: dict[tuple, list] = defaultdict(list)
+        self.matches: list[StrategyMatch] = []
+
+    def add(self, key, symbol: str, quantity: float) -> None:
+        self.qty[key] = self.qty.get(key, 0.0) + quantity
+        self.symbols[key] = symbol
+
+    def build_indexes(self) -> None:
+        for key, quantity in list(self.qty.items()):
+            if abs(quantity) < EPSILON:
+                del self.qty[key]
+                continue
+            if key is STOCK:
+                continue
+            expiry, option_type, strike = key
+            self._strikes[(expiry, option_type, _side(quantity))].append(strike)
+            self._expiry_index[(option_type, strike, _side(quantity))].append(expiry)
+        for values in (*self._strikes.values(), *self._expiry_index.values()):
+            values.sort()
+        self.expiries = sorted({key[0] for key in self.qty if key is not STOCK})
+
+    def available(self, key, side: int) -> float:
+        quantity = self.qty.get(key, 0.0)
+        return abs(quantity) if quantity * side > 0 else 0.0
+
+    def strikes(self, expiry: date, option_type: str, side: int) -> list:
+        # A copy: rules consume legs while iterating.
+        return list(self._strikes.get((expiry, option_type, side), ()))
+
+    def strike_below(self, expiry: date, option_type: str, side: int, strike: Decimal) -> Optional[Decimal]:
+        return _below(self._strikes.get((expiry, option_type, side), []), strike)
+
+    def strike_above(self, expiry: date, option_type: str, side: int, strike: Decimal) -> Optional[Decimal]:
+        return _above(self._strikes.get((expiry, option_type, side), []), strike)
+
+    def nearest_strike(self, expiry: date, option_type: str, side: int, strike: Decimal) -> Optional[Decimal]:
+        candidates = [
+            k for k in (self.strike_below(expiry, option_type, side, strike),
+                        self.strike_above(expiry, option_type, side, strike))
+            if k is not None
+        ]
+        return min(candidates, key=lambda k: abs(k - strike), default=None)
+
+    def other_expiry(self, option_type: str, strike: Decimal, side: int, expiry: date) -> Optional[date]:
+        expiries = self._expiry_index.get((option_type, strike, side), [])
+        return _above(expiries, expiry) or _below(expiries, expiry)
+
+    def record(self, strategy: str, legs: list[tuple]) -> bool:
+        """Consume as many whole units of `legs` ([(key, per-unit quantity), ...]) as remain."""
+        units = math.floor(min(abs(self.qty.get(key, 0.0)) / ratio for key, ratio in legs) + EPSILON)
+        if units < 1:
+            return False
+        taken = []
+        for key, ratio in legs:
+            quantity = self.qty[key]
+            amount = math.copysign(units * ratio, quantity)
+            taken.append((self.symbols[key], amount))
+            self._consume(key, amount)
+        expiries = [key[0] for key, _ in legs if key is not STOCK]
+        self.matches.append(StrategyMatch(
+            strategy, self.account_number, self.underlying, min(expiries, default=None), taken,
+        ))
+        return True
+
+    def _consume(self, key, amount: float) -> None:
+        side = _side(self.qty[key])
+        remaining = self.qty[key] - amount
+        if abs(remaining) > EPSILON:
+            self.qty[key] = remaining
+            return
+        del self.qty[key]
+        if key is STOCK:
+            return
+        expiry, option_type, strike = key
+        strikes = self._strikes[(expiry, option_type, side)]
+        del strikes[bisect_left(strikes, strike)]
+        expiries = self._expiry_index[(option_type, strike, side)]
+        del expiries[bisect_left(expiries, expiry)]
+
+
+def _iron_condors(book: _Book) -> None:
+    for expiry in book.expiries:
+        for short_put in book.strikes(expiry, PUT, SHORT):
+            while book.available((expiry, PUT, short_put), SHORT):
+                long_put = book.strike_below(expiry, PUT, LONG, short_put)
+                short_call = book.strike_above(expiry, CALL, SHORT, short_put)
+                if long_put is None or short_call is None:
+                    break
+                long_call = book.strike_above(expiry, CALL, LONG, short_call)
+                if long_call is None or not book.record("Iron Condor", [
+                    ((expiry, PUT, long_put), 1), ((expiry, PUT, short_put), 1),
+                    ((expiry, CALL, short_call), 1), ((expiry, CALL, long_call), 1),
+                ]):
+                    break
+
+
+def _butterflies(book: _Book) -> None:
+    for expiry in book.expiries:
+        for option_type in (CALL, PUT):
+            for body in book.strikes(expiry, option_type, SHORT):
+                # Nearest wings first; the upper wing is an exact lookup.
+                for lower in reversed(book.strikes(expiry, option_type, LONG)):
+                    if book.available((expiry, option_type, body), SHORT) < 2:
+                        break
+                    if lower >= body:
+                        continue
+                    upper = 2 * body - lower
+                    if book.available((expiry, option_type, upper), LONG):
+                        book.record("Butterfly", [
+                            ((expiry, option_type, lower), 1),
+                            ((expiry, option_type, body), 2),
+                            ((expiry, option_type, upper), 1),
+                        ])
+
+
+def _collars(book: _Book) -> None:
+    if book.available(STOCK, LONG) < SHARES_PER_CONTRACT:
+        return
+    for expiry in book.expiries:
+        for put in reversed(book.strikes(expiry, PUT, LONG)):
+            while book.available((expiry, PUT, put), LONG):
+                call = book.strike_above(expiry, CALL, SHORT, put)
+                if call is None or not book.record("Collar", [
+                    (STOCK, SHARES_PER_CONTRACT), ((expiry, PUT, put), 1), ((expiry, CALL, call), 1),
+                ]):
+                    break
+
+
+def _covered_calls(book: _Book) -> None:
+    if book.available(STOCK, LONG) < SHARES_PER_CONTRACT:
+        return
+    for expiry in book.expiries:
+        for call in book.strikes(expiry, CALL, SHORT):
+            book.record("Covered Call", [(STOCK, SHARES_PER_CONTRACT), ((expiry, CALL, call), 1)])
+
+
+def _verticals(book: _Book) -> None:
+    for expiry in book.expiries:
+        for option_type in (CALL, PUT):
+            for short in book.strikes(expiry, option_type, SHORT):
+                while book.available((expiry, option_type, short), SHORT):
+                    long = book.nearest_strike(expiry, option_type, LONG, short)
+                    if long is None or not book.record(
+                        "Vertical Spread", [((expiry, option_type, short), 1), ((expiry, option_type, long), 1)]
+                    ):
+                        break
+
+
+def _calendars(book: _Book) -> None:
+    for expiry in book.expiries:
+        for option_type in (CALL, PUT):
+            for strike in book.strikes(expiry, option_type, SHORT):
+                while book.available((expiry, option_type, strike), SHORT):
+                    other = book.other_expiry(option_type, strike, LONG, expiry)
+                    if other is None or not book.record(
+                        "Calendar Spread", [((expiry, option_type, strike), 1), ((other, option_type, strike), 1)]
+                    ):
+                        break
+
+
+def _straddles(book: _Book) -> None:
+    for expiry in book.expiries:
+        for side in (SHORT, LONG):
+            for strike in book.strikes(expiry, PUT, side):
+                if book.available((expiry, CALL, strike), side):
+                    book.record("Straddle", [((expiry, PUT, strike), 1), ((expiry, CALL, strike), 1)])
+
+
+def _strangles(book: _Book) -> None:
+    for expiry in book.expiries:
+        for side in (SHORT, LONG):
+            for put in book.strikes(expiry, PUT, side):
+                while book.available((expiry, PUT, put), side):
+                    call = book.strike_above(expiry, CALL, side, put)
+                    if call is None or not book.record("Strangle", [((expiry, PUT, put), 1), ((expiry, CALL, call), 1)]):
+                        break
+
+
+def _synthetics(book: _Book) -> None:
+    for expiry in book.expiries:
+        for strike in book.strikes(expiry, CALL, LONG):
+            if book.available((expiry, PUT, strike), SHORT):
+                book.record("Synthetic Long", [((expiry, CALL, strike), 1), ((expiry, PUT, strike), 1)])
+        for strike in book.strikes(expiry, PUT, LONG):
+            if book.available((expiry, CALL, strike), SHORT):
+                book.record("Synthetic Short", [((expiry, PUT, strike), 1), ((expiry, CALL, strike), 1)])
+
+
+def _naked(book: _Book) -> None:
+    for expiry in book.expiries:
+        for strike in book.strikes(expiry, PUT, SHORT):
+            book.record("Naked Put", [((expiry, PUT, strike), 1)])
+        for strike in book.strikes(expiry, CALL, SHORT):
+            book.record("Naked Call", [((expiry, CALL, strike), 1)])
+
+
+# Most specific first: a leg is claimed by the first rule that can use it.
+RULES = (
+    _iron_condors,
+    _butterflies,
+    _collars,
+    _covered_calls,
+    _verticals,
+    _calendars,
+    _straddles,
+    _strangles,
+    _synthetics,
+    _naked,
+)
+
+
+def identify_strategies(legs: Iterable[PositionLeg]) -> list[StrategyMatch]:
+    """Match open legs against the default strategy definitions.
+
+    Long options and shares left over after every rule has run are not
+    reported. Option legs must use OCC symbols; any other symbol is treated as
+    shares of the underlying it names.
+    """
+    books: dict[tuple, _Book] = {}
+    for leg in legs:
+        if not leg.symbol or not leg.quantity:
+            continue
+        option = parse_occ_symbol(leg.symbol)
+        underlying = option.root if option else leg.symbol
+        book = books.get((leg.account_number, underlying))
+        if book is None:
+            book = books[(leg.account_number, underlying)] = _Book(leg.account_number, underlying)
+        key = (option.expiry, option.option_type, option.strike) if option else STOCK
+        book.add(key, leg.symbol, float(leg.quantity))
+
+    matches: dict[str, StrategyMatch] = {}
+    for _, book in sorted(books.items(), key=lambda item: (item[0][0] or "", item[0][1])):
+        book.build_indexes()
+        for rule in RULES:
+            rule(book)
+        for match in book.matches:
+            existing = matches.get(match.key)
+            if existing is None:
+                matches[match.key] = match
+                continue
+            # The same legs matched twice (e.g. a partial fill of a ratio): one group.
+            sizes = dict(existing.legs)
+            for symbol, quantity in match.legs:
+                sizes[symbol] = sizes.get(symbol, 0.0) + quantity
+            existing.legs = list(sizes.items())
+    return list(matches.values())
@@ -0,0 +1,44 @@
+"""
+OCC option symbols: root padded to six characters, expiry as YYMMDD, C/P and
+the strike in thousandths over eight digits, e.g. "SPY   240119P00450000".
+"""
+import re
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from functools import lru_cache
+from typing import Optional
+
+CALL = "C"
+PUT = "P"
+
+OCC_PATTERN = re.compile(r"^(?P<root>[A-Z0-9./]{1,6})\s*(?P<expiry>\d{6})(?P<type>[CP])(?P<strike>\d{8})$")
+
+
+@dataclass(frozen=True)
+class OptionSymbol:
+    root: str
+    expiry: date
+    option_type: str                # CALL or PUT
+    strike: Decimal                 # exact, so strike arithmetic can be compared
+
+
+@lru_cache(maxsize=65536)
+def parse_occ_symbol(symbol: Optional[str]) -> Optional[OptionSymbol]:
+    """Parse an OCC option symbol; returns None for anything else (stock, futures, ...)."""
+    if not symbol:
+        return None
+    match = OCC_PATTERN.match(symbol.strip())
+    if match is None:
+        return None
+    expiry = match["expiry"]
+    try:
+        expires = date(2000 + int(expiry[:2]), int(expiry[2:4]), int(expiry[4:]))
+    except ValueError:
+        return None
+    return OptionSymbol(
+        root=match["root"],
+        expiry=expires,
+        option_type=match["type"],
+        strike=Decimal(int(match["strike"])) / 1000,
+    )
@@ -0,0 +1,56 @@
+import uuid
+from typing import Iterable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.crud_position_group import retire_identified_groups, upsert_identified_groups
+from app.crud.crud_strategy import get_default_strategy_ids
+from app.crud.crud_tastytrade_position import get_latest_positions
+from app.services.strategies.matcher import PositionLeg, StrategyMatch, identify_strategies
+
+
+def _legs(positions: Iterable) -> list[PositionLeg]:
+    # Accepts ORM rows or the dicts built by sync_service.position_row.
+    def get(p, name):
+        return p.get(name) if isinstance(p, dict) else getattr(p, name, None)
+    return [PositionLeg(get(p, "account_number"), get(p, "symbol"), get(p, "quantity") or 0) for p in positions]
+
+
+async def identify_position_groups(
+    db: AsyncSession,
+    account_id: uuid.UUID,
+    user_id: uuid.UUID,
+    positions: Optional[Iterable] = None,
+) -> list[dict]:
+    """Identify strategies in the account's open positions and ensure a PositionGroup for each.
+
+    `positions` defaults to the latest synced snapshot. Groups are keyed by
+    StrategyMatch.key, so re-running keeps existing groups; groups whose
+    legs are no longer open together are retired. Does not commit.
+    """
+    if positions is None:
+        positions = await get_latest_positions(db, account_id)
+    matches: list[StrategyMatch] = identify_strategies(_legs(positions))
+    await retire_identified_groups(db, account_id, [m.key for m in matches])
+    if not matches:
+        return []
+    strategy_ids = await get_default_strategy_ids(db, sorted({m.strategy for m in matches}))
+    saved = await upsert_identified_groups(db, user_id, account_id, [
+        {"strategy_id": strategy_ids.get(m.strategy), "name": m.name[:64], "match_key": m.key}
+        for m in matches
+    ])
+    groups = {match_key: (group_id, created) for group_id, match_key, created in saved}
+    return [
+        {
+            "group_id": groups[m.key][0],
+            "created": bool(groups[m.key][1]),
+            "strategy": m.strategy,
+            "strategy_id": strategy_ids.get(m.strategy),
+            "name": m.name,
+            "account_number": m.account_number,
+            "underlying_symbol": m.underlying,
+            "expiry": m.expiry,
+            "legs": [{"symbol": symbol, "quantity": quantity} for symbol, quantity in m.legs],
+        }
+        for m in matches
+    ]
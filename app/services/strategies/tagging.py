@@ -0,0 +1,159 @@
+"""
+Tag an account's transaction history into trade position groups.
+
+Fills are walked in (date, id) order and tracked per (sub-account,
+underlying). A trade opens when that underlying goes from flat to holding
+something and closes when every symbol under it is flat again; each trade is
+one PositionGroup linked to all of its fills. The strategy is identified from
+the legs filled within OPENING_WINDOW of the trade's first fill: the legs of
+one multi-leg order are filled separately and rarely share a timestamp.
+
+Progress is kept as a watermark: the last (date, id) processed plus the
+trades still open there, so a re-run only reads newer transactions. A change
+at or before the watermark (a backdated or corrected fill) rebuilds the
+account's trade groups from the start.
+"""
+import math
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.crud_position_group import (
+    TRADE_MATCH_KEY_PREFIX,
+    bulk_insert_group_links,
+    bulk_insert_groups,
+    delete_trade_groups,
+    get_tag_watermark,
+    save_tag_watermark,
+)
+from app.crud.crud_strategy import get_default_strategy_ids
+from app.crud.crud_tastytrade_transaction import get_transaction_columns
+from app.services.pnl.engine import BUY_ACTIONS, CLOSING_SUB_TYPES, EPSILON, SELL_ACTIONS, TRADE_TYPES, underlying_of
+from app.services.strategies.matcher import PositionLeg, identify_strategies
+
+TAG_COLUMNS = (
+    "id", "account_number", "date", "symbol", "underlying_symbol", "transaction_type",
+    "transaction_sub_type", "action", "quantity", "value", "amount",
+)
+CLOSE_ACTIONS = ("Buy to Close", "Sell to Close")
+# Fills this soon after a trade's first fill count as its opening legs.
+OPENING_WINDOW = timedelta(seconds=60)
+
+
+def _position_change(row, position: float) -> float:
+    """Signed change a fill makes to its symbol's position; closes never go through flat."""
+    quantity = abs(row.quantity or 0)
+    action = row.action
+    if action in CLOSE_ACTIONS or (action not in BUY_ACTIONS + SELL_ACTIONS and row.transaction_sub_type in CLOSING_SUB_TYPES):
+        return -math.copysign(min(quantity, abs(position)), position) if abs(position) > EPSILON else 0.0
+    if action in BUY_ACTIONS:
+        return quantity
+    if action in SELL_ACTIONS:
+        return -quantity
+    # No action recorded (legacy rows): a debit is a buy, a credit a sell.
+    cash = row.value if row.value is not None else row.amount
+    if not cash:
+        return 0.0
+    return quantity if cash < 0 else -quantity
+
+
+def _strategy_of(account_number: Optional[str], opening_legs: dict) -> Optional[str]:
+    legs = [PositionLeg(account_number, symbol, quantity) for symbol, quantity in opening_legs.items() if quantity]
+    matches = identify_strategies(legs)
+    # Only name the trade when one strategy explains every opening leg.
+    if len(matches) == 1 and len(matches[0].legs) == len(legs):
+        return matches[0].strategy
+    return None
+
+
+async def tag_transaction_history(
+    db: AsyncSession,
+    account_id: uuid.UUID,
+    user_id: uuid.UUID,
+    changed_since: Optional[datetime] = None,
+    rebuild: bool = False,
+) -> dict:
+    """Link transactions after the account's watermark into trade groups.
+
+    `changed_since` is the earliest date the caller has just inserted or
+    modified; if it is not after the watermark the account is rebuilt.
+    Does not commit.
+    """
+    watermark = None if rebuild else await get_tag_watermark(db, account_id)
+    if watermark is not None and changed_since is not None and changed_since <= watermark.last_date:
+        watermark = None
+    if watermark is None:
+        await delete_trade_groups(db, account_id)
+
+    after = (watermark.last_date, watermark.last_transaction_id) if watermark else None
+    rows = [r for r in await get_transaction_columns(db, account_id, TAG_COLUMNS, after=after) if r.date is not None]
+    summary = {"transactions": len(rows), "groups_created": 0, "links_created": 0, "open_trades": 0, "rebuilt": watermark is None}
+    if not rows:
+        summary["open_trades"] = len(watermark.open_trades) if watermark else 0
+        return summary
+
+    # {trade key: {"group_id": str, "positions": {symbol: signed quantity}}}
+    open_trades: dict = {
+        key: {"group_id": trade["group_id"], "positions": dict(trade["positions"])}
+        for key, trade in (watermark.open_trades if watermark else {}).items()
+    }
+    new_trades: dict[str, dict] = {}
+    links: list[tuple] = []
+    for row in rows:
+        if row.transaction_type not in TRADE_TYPES or not row.symbol:
+            continue
+        underlying = underlying_of(row.symbol, row.underlying_symbol)
+        key = f"{row.account_number or ''}|{underlying}"
+        trade = open_trades.get(key)
+        change = _position_change(row, trade["positions"].get(row.symbol, 0.0) if trade else 0.0)
+        if trade is None:
+            if not change:
+                # Closes a position opened before the history starts.
+                continue
+            trade = open_trades[key] = {"group_id": str(uuid.uuid4()), "positions": {}}
+            new_trades[trade["group_id"]] = {
+                "account_number": row.account_number, "underlying": underlying,
+                "opened_at": row.date, "first_transaction_id": row.id, "opening_legs": {},
+            }
+        opening = new_trades.get(trade["group_id"])
+        if opening is not None and row.date - opening["opened_at"] <= OPENING_WINDOW:
+            legs = opening["opening_legs"]
+            legs[row.symbol] = legs.get(row.symbol, 0.0) + change
+        positions = trade["positions"]
+        position = positions.get(row.symbol, 0.0) + change
+        if abs(position) > EPSILON:
+            positions[row.symbol] = position
+        else:
+            positions.pop(row.symbol, None)
+        links.append((uuid.UUID(trade["group_id"]), row.id))
+        if not positions:
+            del open_trades[key]
+
+    strategies = {
+        group_id: _strategy_of(new["account_number"], new["opening_legs"])
+        for group_id, new in new_trades.items()
+    }
+    strategy_ids = await get_default_strategy_ids(db, sorted({s for s in strategies.values() if s}))
+    now = datetime.now(timezone.utc)
+    groups = []
+    for group_id, new in new_trades.items():
+        strategy = strategies[group_id]
+        opened = new["opened_at"].astimezone(timezone.utc).date().isoformat()
+        groups.append({
+            "id": uuid.UUID(group_id),
+            "user_id": user_id,
+            "account_id": account_id,
+            "strategy_id": strategy_ids.get(strategy),
+            "name": " ".join(filter(None, (strategy, new["underlying"], opened)))[:64],
+            "match_key": f"{TRADE_MATCH_KEY_PREFIX}{new['account_number'] or ''}|{new['first_transaction_id']}",
+            "created_at": now,
+            "updated_at": now,
+        })
+    summary["groups_created"] = await bulk_insert_groups(db, groups)
+    summary["links_created"] = await bulk_insert_group_links(db, links)
+    summary["open_trades"] = len(open_trades)
+    last = rows[-1]
+    await save_tag_watermark(db, account_id, last.date, last.id, open_trades)
+    return summary
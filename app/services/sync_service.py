@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, List, Optional
+import tastytrade
+from tastytrade.utils import TastytradeError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models.tastytrade_account import TastyTradeAccount
+from app.services.tastytrade_service import tastytrade_session_pool
+from app.crud.crud_sync_job import lock_account_sync_write
+from app.crud.crud_tastytrade_account import bump_transactions_version
+from app.crud.crud_tastytrade_balance import add_balance
+from app.crud.crud_tastytrade_position import bulk_upsert_positions
+from app.crud.crud_tastytrade_transaction import bulk_upsert_transactions, get_latest_transaction_date
+from app.core.config import settings
+from app.services.pnl import refresh_pnl_snapshots, transaction_cache
+from app.services.balance_history import apply_balance_retention
+from app.services.strategies import identify_position_groups, tag_transaction_history
+from app.services.dashboard import dashboard_service
+
+logger = logging.getLogger(__name__)
+
+# Map TastyTrade API objects to table rows. All rows from one sync share a
+# single timestamp so a run is written (and can be queried) as one snapshot.
+
+def balance_row(account_number: str, balances: Any, synced_at: datetime) -> dict:
+    return {
+        "account_number": account_number,
+        "cash": getattr(balances, "cash", None),
+        "long_equity_value": getattr(balances, "long_equity_value", None),
+        "short_equity_value": getattr(balances, "short_equity_value", None),
+        "net_liquidating_value": getattr(balances, "net_liquidating_value", None),
+        "derivative_buying_power": getattr(balances, "derivative_buying_power", None),
+        "equity_buying_power": getattr(balances, "equity_buying_power", None),
+        "maintenance_requirement": getattr(balances, "maintenance_requirement", None),
+        "created_at": synced_at,
+    }
+
+def _market_value(pos: Any, quantity: Any) -> float | None:
+    # Positions fetched with include_marks carry a per-unit mark_price and the
+    # position's total mark; close_price (per unit) covers legs without a quote.
+    # Signed like quantity, so shorts are negative.
+    if quantity is None:
+        return None
+    sign = -1.0 if quantity < 0 else 1.0
+    price = getattr(pos, "mark_price", None)
+    if price is None and getattr(pos, "mark", None) is not None:
+        return sign * abs(float(pos.mark))
+    if price is None:
+        price = getattr(pos, "close_price", None)
+    if price is None:
+        return None
+    multiplier = getattr(pos, "multiplier", None) or 1
+    return sign * abs(float(price) * float(quantity) * float(multiplier))
+
+def position_row(account_number: str, pos: Any, synced_at: datetime) -> dict:
+    # The API reports size and direction separately; stored quantity is signed.
+    quantity = _float(getattr(pos, "quantity", None))
+    if quantity is not None and getattr(pos, "quantity_direction", None) == "Short":
+        quantity = -abs(quantity)
+    return {
+        "account_number": account_number,
+        "symbol": getattr(pos, "symbol", None),
+        "quantity": quantity,
+        "average_price": _float(getattr(pos, "average_open_price", None)),
+        "market_value": _market_value(pos, quantity),
+        "created_at": synced_at,
+    }
+
+def _enum_value(value: Any) -> Any:
+    return getattr(value, "value", value)
+
+def _float(value: Any) -> float | None:
+    return float(value) if value is not None else None
+
+TRANSACTION_FEE_FIELDS = ("commission", "clearing_fees", "regulatory_fees", "proprietary_index_option_fees")
+
+def transaction_row(account_number: str, txn: Any, synced_at: datetime) -> dict:
+    quantity = getattr(txn, "quantity", None)
+    fees = [getattr(txn, f, None) for f in TRANSACTION_FEE_FIELDS]
+    # The API reports executed_at / net_value; older rows and fakes use date / amount.
+    executed_at = getattr(txn, "executed_at", None) or getattr(txn, "date", None)
+    net_value = getattr(txn, "net_value", None)
+    return {
+        "account_number": account_number,
+        "transaction_id": str(txn.id),
+        "transaction_type": getattr(txn, "transaction_type", None),
+        "transaction_sub_type": getattr(txn, "transaction_sub_type", None),
+        "action": _enum_value(getattr(txn, "action", None)),
+        "symbol": getattr(txn, "symbol", None),
+        "underlying_symbol": getattr(txn, "underlying_symbol", None),
+        "instrument_type": _enum_value(getattr(txn, "instrument_type", None)),
+        "quantity": _float(quantity),
+        "price": _float(getattr(txn, "price", None)),
+        "amount": _float(net_value if net_value is not None else getattr(txn, "amount", None)),
+        "value": _float(getattr(txn, "value", None)),
+        "fees": sum(abs(float(f)) for f in fees if f is not None) if any(f is not None for f in fees) else None,
+        "date": executed_at,
+        "created_at": synced_at,
+    }
+
+@dataclass
+class AccountSnapshot:
+    """Everything fetched for one broker sub-account during a sync."""
+    account_number: str
+    balances: Any
+    positions: List[Any]
+    transactions: List[Any]
+
+async def write_sync_batch(
+    db: AsyncSession,
+    account_id: uuid.UUID,
+    user_id: uuid.UUID,
+    snapshots: List[AccountSnapshot],
+) -> dict:
+    """Stage a full sync result and write it in a single database transaction.
+
+    Positions and transactions go through multi-row INSERT ... ON CONFLICT DO
+    UPDATE statements, so the number of round trips depends on the batch size
+    rather than the number of rows. Daily P&L is refreshed from the earliest
+    changed transaction, expired balance rows are rolled up, strategies in the
+    new positions get position groups and new fills are tagged into trade
+    groups, all in the same transaction. Changed rows are spliced into this
+    worker's cached transaction history, published once the batch commits. Nothing is written if any statement
+    fails. Concurrent syncs of one account wait for each other here.
+    """
+    synced_at = datetime.now(timezone.utc)
+    balance_list = [balance_row(s.account_number, s.balances, synced_at) for s in snapshots]
+    pos_list = [position_row(s.account_number, p, synced_at) for s in snapshots for p in s.positions]
+    txn_list = [transaction_row(s.account_number, t, synced_at) for s in snapshots for t in s.transactions]
+    try:
+        await lock_account_sync_write(db, account_id)
+        for balance_data in balance_list:
+            await add_balance(db, account_id, user_id, balance_data)
+        await bulk_upsert_positions(db, account_id, user_id, pos_list)
+        changed_dates = await bulk_upsert_transactions(db, account_id, user_id, txn_list)
+        # Undated changes are rare; treat them as touching the whole history.
+        changed_since = (
+            datetime(1970, 1, 1, tzinfo=timezone.utc) if None in changed_dates
+            else min(changed_dates, default=None)
+        )
+        frame = version = None
+        if changed_since is not None:
+            version = await bump_transactions_version(db, account_id)
+            frame = await transaction_cache.pending(db, account_id, changed_since, version)
+        await refresh_pnl_snapshots(db, account_id, changed_since, frame=frame)
+        await apply_balance_retention(db, account_id, now=synced_at)
+        await identify_position_groups(db, account_id, user_id, pos_list)
+        await tag_transaction_history(db, account_id, user_id, changed_since)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    try:
+        dashboard_service.invalidate(account_id)
+    except Exception:
+        # The batch is committed; failing the sync now would only prompt a retry.
+        logger.exception("Dashboard cache invalidation failed after syncing account %s", account_id)
+    if frame is not None:
+        try:
+            transaction_cache.publish(account_id, frame, version)
+        except Exception:
+            # The batch is committed; other readers reload on the bumped version.
+            logger.exception("Transaction cache update failed after syncing account %s", account_id)
+    return {"balances": balance_list, "positions": pos_list, "transactions": txn_list}
+
+class SyncError(Exception):
+    """A sync failure whose message is safe to show to the user."""
+
+ProgressCallback = Callable[[int, str], Awaitable[None]]
+
+async def history_start_date(db: AsyncSession, account_id: uuid.UUID, account_number: str) -> Optional[date]:
+    """First day of history to fetch: a lookback window before the newest stored transaction.
+
+    None (the full history) for a sub-account that has never been synced.
+    Re-fetched rows that are unchanged are left untouched by the upsert.
+    """
+    latest = await get_latest_transaction_date(db, account_id, account_number)
+    if latest is None:
+        return None
+    return latest.date() - timedelta(days=settings.SYNC_HISTORY_LOOKBACK_DAYS)
+
+async def fetch_account_snapshot(
+    session: tastytrade.Session, tasty_account: tastytrade.Account, start_date: Optional[date] = None
+) -> AccountSnapshot:
+    # The three calls are independent, so wall time tracks the slowest one.
+    balances, positions, transactions = await asyncio.gather(
+        tasty_account.a_get_balances(session),
+        tasty_account.a_get_positions(session, include_marks=True),
+        tasty_account.a_get_history(session, start_date=start_date),
+    )
+    return AccountSnapshot(tasty_account.account_number, balances, positions, transactions)
+
+async def run_account_sync(db: AsyncSession, account: TastyTradeAccount, on_progress: ProgressCallback) -> dict:
+    """Log in to TastyTrade, fetch every sub-account under the login and write them in one batch."""
+    try:
+        await on_progress(5, "Logging in to TastyTrade")
+        session = await tastytrade_session_pool.get(account)
+        accounts = await tastytrade.Account.a_get(session)
+        if not accounts:
+            raise SyncError("No TastyTrade accounts found")
+        # One session runs one statement at a time, so the watermarks are read in turn.
+        start_dates = [await history_start_date(db, account.id, a.account_number) for a in accounts]
+        await on_progress(20, f"Fetching data for {len(accounts)} accounts")
+        snapshots = await asyncio.gather(*(
+            fetch_account_snapshot(session, a, start) for a, start in zip(accounts, start_dates)
+        ))
+    except TastytradeError as e:
+        # The cached session may be the problem; the next sync logs in fresh.
+        tastytrade_session_pool.invalidate(account.id)
+        if "invalid_credentials" in str(e):
+            raise SyncError("TastyTrade login failed") from e
+        raise
+    n_positions = sum(len(s.positions) for s in snapshots)
+    n_transactions = sum(len(s.transactions) for s in snapshots)
+    await on_progress(70, f"Writing {n_positions} positions and {n_transactions} transactions")
+    return await write_sync_batch(db, account.id, account.user_id, list(snapshots))
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Set
+import tastytrade
+from app.core.config import settings
+from app.core.encryption import decrypt
+from app.db.models.tastytrade_account import TastyTradeAccount
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class _PooledSession:
+    session: tastytrade.Session
+    remember_token: Optional[str]
+    last_used: float
+
+class TastytradeSessionPool:
+    """Reuses logged-in TastyTrade sessions across syncs of the same account.
+
+    Sessions are keyed by TastyTradeAccount.id. A cached session is returned
+    until it nears its expiration; it is then renewed with the remember-me
+    token from the previous login, and only falls back to the stored password
+    if that fails. Entries unused for `idle_ttl` seconds are dropped. A
+    per-account lock ensures concurrent requests trigger at most one login.
+    Sessions dropped from the pool are logged out in the background, so they
+    do not stay live at the broker until they expire.
+    """
+
+    def __init__(self, idle_ttl: float, expiry_margin: timedelta):
+        self.idle_ttl = idle_ttl
+        self.expiry_margin = expiry_margin
+        self._entries: Dict[uuid.UUID, _PooledSession] = {}
+        self._locks: Dict[uuid.UUID, asyncio.Lock] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Pending logouts; holding the tasks keeps them from being garbage collected.
+        self._closing: Set[asyncio.Task] = set()
+
+    async def get(self, account: TastyTradeAccount) -> tastytrade.Session:
+        self._bind_loop()
+        self._evict_idle()
+        lock = self._locks.setdefault(account.id, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(account.id)
+            if entry and not self._expired(entry.session):
+                entry.last_used = time.monotonic()
+                return entry.session
+            session = await self._login(account, entry.remember_token if entry else None)
+            self._entries[account.id] = _PooledSession(
+                session=session,
+                remember_token=getattr(session, "remember_token", None),
+                last_used=time.monotonic(),
+            )
+            return session
+
+    def invalidate(self, account_id: uuid.UUID) -> None:
+        entry = self._entries.pop(account_id, None)
+        if entry is not None:
+            self._discard(entry.session)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expired(self, session: tastytrade.Session) -> bool:
+        expiration = getattr(session, "session_expiration", None)
+        if not isinstance(expiration, datetime):
+            return False
+        return expiration - self.expiry_margin <= datetime.now(timezone.utc)
+
+    def _evict_idle(self) -> None:
+        cutoff = time.monotonic() - self.idle_ttl
+        for account_id in [k for k, e in self._entries.items() if e.last_used < cutoff]:
+            lock = self._locks.get(account_id)
+            if lock is None or not lock.locked():
+                self._discard(self._entries.pop(account_id).session)
+                self._locks.pop(account_id, None)
+
+    def _bind_loop(self) -> None:
+        # Sessions hold async HTTP clients tied to the loop that created them.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            for entry in self._entries.values():
+                # Their async client belongs to the old loop; log out over the blocking one.
+                self._discard(entry.session, blocking=True)
+            self._entries.clear()
+            self._locks.clear()
+            self._closing.clear()
+            self._loop = loop
+
+    def _discard(self, session: tastytrade.Session, blocking: bool = False) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self._destroy(session, blocking))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _destroy(session: tastytrade.Session, blocking: bool) -> None:
+        # Best effort: a failed logout only leaves the session to expire on its own.
+        try:
+            if blocking:
+                await asyncio.to_thread(session.destroy)
+            else:
+                await session.a_destroy()
+        except Exception as e:
+            logger.info("Could not log out a dropped TastyTrade session: %s", e)
+
+    async def _login(self, account: TastyTradeAccount, remember_token: Optional[str]) -> tastytrade.Session:
+        # Session() logs in with a blocking HTTP call; keep it off the event loop.
+        if remember_token:
+            try:
+                return await asyncio.to_thread(
+                    tastytrade.Session, account.tasty_username, remember_token=remember_token, remember_me=True
+                )
+            except Exception as e:
+                logger.info("Remember-token login failed for account %s, using password: %s", account.id, e)
+        password = decrypt(account.tasty_password_encrypted)
+        return await asyncio.to_thread(tastytrade.Session, account.tasty_username, password, remember_me=True)
+
+tastytrade_session_pool = TastytradeSessionPool(
+    idle_ttl=settings.TASTYTRADE_SESSION_IDLE_TTL,
+    expiry_margin=timedelta(seconds=settings.TASTYTRADE_SESSION_EXPIRY_MARGIN),
+)
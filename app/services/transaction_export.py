@@ -0,0 +1,55 @@
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+from typing import AsyncIterator, Optional
+from app.db.session import read_session_maker
+from app.crud.crud_tastytrade_transaction import EXPORT_COLUMNS, stream_transactions
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+# Rows serialized per chunk written to the response.
+ROWS_PER_CHUNK = 500
+
+def _json_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+async def export_transactions(
+    account_id: uuid.UUID,
+    fmt: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    symbol: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """Yield an account's transactions as NDJSON or CSV text chunks.
+
+    Uses its own session rather than the request's, because the response body
+    is produced after the endpoint (and its dependencies) have returned.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == "csv" else None
+    if writer:
+        writer.writerow(EXPORT_COLUMNS)
+    pending = 0
+    async with read_session_maker() as db:
+        async for row in stream_transactions(db, account_id, start=start, end=end, symbol=symbol):
+            if writer:
+                writer.writerow(["" if v is None else _json_value(v) for v in row])
+            else:
+                buffer.write(json.dumps({c: _json_value(v) for c, v in zip(EXPORT_COLUMNS, row)}))
+                buffer.write("\n")
+            pending += 1
+            if pending >= ROWS_PER_CHUNK:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                pending = 0
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,83 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from app.core.config import settings
+from app.db.models.user import User
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """Detached, read-only view of a User row; never carries the password hash."""
+    id: uuid.UUID
+    email: str
+    role: str
+    is_active: bool
+    created_at: Optional[datetime] = None
+    last_login_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "CachedUser":
+        return cls(
+            id=user.id,
+            email=user.email,
+            role=user.role,
+            is_active=user.is_active,
+            created_at=user.created_at,
+            last_login_at=user.last_login_at,
+        )
+
+
+class UserCache:
+    """
+    Bounded LRU of authenticated users keyed by id. Entries expire after
+    `ttl` seconds so changes made by another process show up eventually;
+    changes made through crud_user invalidate immediately.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[uuid.UUID, tuple[float, CachedUser]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: uuid.UUID) -> Optional[CachedUser]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, user = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user
+
+    def set(self, user: User) -> CachedUser:
+        cached = CachedUser.from_user(user)
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return cached
+        with self._lock:
+            self._entries[cached.id] = (time.monotonic() + self.ttl, cached)
+            self._entries.move_to_end(cached.id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return cached
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+user_cache = UserCache(maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL)
@@ -72,3 +72,153 @@ async def test_register_and_login_and_me():
         # Logout (no-op)
         resp8 = await ac.post("/api/v1/auth/logout")
         assert resp8.status_code == 204
+
+@pytest.mark.asyncio
+async def test_current_user_cache_is_invalidated_on_deactivation():
+    from unittest.mock import patch
+    from app.api.v1 import deps as deps_module
+    from app.crud.crud_user import get_user_by_email, set_user_active
+    from app.services.user_cache import user_cache
+    import uuid
+
+    email = f"cache_{uuid.uuid4().hex[:8]}@example.com"
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        resp = await ac.post("/api/v1/auth/register-user", json={
+            "email": email,
+            "password": "TestPassword123!",
+            "role": "user"
+        })
+        assert resp.status_code == 201, resp.text
+        resp = await ac.post("/api/v1/auth/login", json={"email": email, "password": "TestPassword123!"})
+        headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+        resp = await ac.get("/api/v1/auth/me", headers=headers)
+        assert resp.status_code == 200
+        user_id = uuid.UUID(resp.json()["id"])
+        assert user_cache.get(user_id) is not None
+
+        # Served from the cache: no user lookup on the second request
+        with patch.object(deps_module, "get_user_by_id", side_effect=AssertionError("cache miss")):
+            resp = await ac.get("/api/v1/auth/me", headers=headers)
+            assert resp.status_code == 200
+
+        async with async_session_maker() as session:
+            user = await get_user_by_email(session, email)
+            await set_user_active(session, user, False)
+        assert user_cache.get(user_id) is None
+        resp = await ac.get("/api/v1/auth/me", headers=headers)
+        assert resp.status_code == 403
+
+        # Trusted claims: read-only endpoints skip the lookup entirely
+        with patch.object(deps_module.settings, "AUTH_TRUST_TOKEN_CLAIMS", True), \
+                patch.object(deps_module, "get_user_by_id", side_effect=AssertionError("db lookup")):
+            resp = await ac.get("/api/v1/tastytrade/accounts/", headers=headers)
+            assert resp.status_code == 200
+            assert resp.json() == []
+
+@pytest.mark.asyncio
+async def test_login_refreshes_cached_user():
+    from app.services.user_cache import user_cache
+    import uuid
+
+    email = f"relogin_{uuid.uuid4().hex[:8]}@example.com"
+    credentials = {"email": email, "password": "TestPassword123!"}
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await ac.post("/api/v1/auth/register-user", json={**credentials, "role": "user"})
+        resp = await ac.post("/api/v1/auth/login", json=credentials)
+        headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        first = (await ac.get("/api/v1/auth/me", headers=headers)).json()
+        assert user_cache.get(uuid.UUID(first["id"])) is not None
+
+        # Logging in again writes last_login_at, which drops the cached copy.
+        await ac.post("/api/v1/auth/login", json=credentials)
+        assert user_cache.get(uuid.UUID(first["id"])) is None
+        second = (await ac.get("/api/v1/auth/me", headers=headers)).json()
+        assert second["last_login_at"] > first["last_login_at"]
+
+def test_user_cache_is_bounded_and_expires():
+    import time
+    import uuid
+    from types import SimpleNamespace
+    from app.services.user_cache import UserCache
+
+    def fake_user():
+        return SimpleNamespace(id=uuid.uuid4(), email="a@example.com", role="user",
+                               is_active=True, created_at=None, last_login_at=None)
+
+    cache = UserCache(maxsize=2, ttl=60)
+    a, b, c = fake_user(), fake_user(), fake_user()
+    cache.set(a)
+    cache.set(b)
+    assert cache.get(a.id) is not None  # a is now most recently used
+    cache.set(c)
+    assert len(cache) == 2
+    assert cache.get(b.id) is None
+    assert cache.get(a.id) is not None
+
+    cache = UserCache(maxsize=2, ttl=0.01)
+    cache.set(a)
+    time.sleep(0.02)
+    assert cache.get(a.id) is None
+
+@pytest.mark.asyncio
+async def test_login_rehashes_outdated_password_hash():
+    import uuid
+    from passlib.context import CryptContext
+    from app.crud.crud_user import get_user_by_email
+    from app.db.models.user import User
+
+    email = f"rehash_{uuid.uuid4().hex[:8]}@example.com"
+    weak = CryptContext(schemes=["argon2"], argon2__time_cost=1, argon2__memory_cost=1024, argon2__parallelism=1)
+    old_hash = weak.hash("TestPassword123!")
+    async with async_session_maker() as session:
+        session.add(User(email=email, hashed_password=old_hash, role="user", is_active=True))
+        await session.commit()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        resp = await ac.post("/api/v1/auth/login", json={"email": email, "password": "TestPassword123!"})
+        assert resp.status_code == 200, resp.text
+
+    async with async_session_maker() as session:
+        user = await get_user_by_email(session, email)
+        assert user.hashed_password != old_hash
+        assert "m=1024" not in user.hashed_password
+
+@pytest.mark.asyncio
+async def test_login_returns_503_when_hasher_is_saturated():
+    from unittest.mock import patch
+    from app.core.security import password_hasher
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        resp = await ac.post("/api/v1/auth/register-user", json={
+            "email": "busy@example.com",
+            "password": "TestPassword123!",
+            "role": "user"
+        })
+        assert resp.status_code in (201, 400), resp.text
+        with patch.object(password_hasher, "max_pending", 0):
+            resp = await ac.post("/api/v1/auth/login", json={"email": "busy@example.com", "password": "TestPassword123!"})
+        assert resp.status_code == 503
+        assert resp.headers["Retry-After"] == "1"
+        assert password_hasher.stats()["rejected"] >= 1
+
+@pytest.mark.asyncio
+async def test_monitoring_pool_stats():
+    import uuid
+    email = f"pools_{uuid.uuid4().hex[:8]}@example.com"
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        resp = await ac.get("/api/v1/monitoring/pools")
+        assert resp.status_code == 401
+        await ac.post("/api/v1/auth/register-user", json={"email": email, "password": "TestPassword123!", "role": "user"})
+        resp = await ac.post("/api/v1/auth/login", json={"email": email, "password": "TestPassword123!"})
+        headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        resp = await ac.get("/api/v1/monitoring/pools", headers=headers)
+        assert resp.status_code == 200, resp.text
+        stats = resp.json()
+        assert {"size", "checked_in", "checked_out", "overflow"} <= set(stats["database"]["primary"])
+        assert "pending" in stats["password_hasher"]
@@ -0,0 +1,108 @@
+import json
+import uuid
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import event
+from app.main import app
+from app.crud.crud_tastytrade_account import get_tastytrade_account_by_id
+from app.crud.crud_tastytrade_balance import add_balance
+from app.db.session import async_session_maker, engine
+from app.services.dashboard import dashboard_service
+from app.services.market_data import FileMarketDataProvider, market_data_service
+from app.services.portfolio import black_scholes
+from app.services.portfolio.metrics import years_to_expiry
+from app.tests.utils import EXPIRY, FakeTradingAccount, GreeksAccount, broker_txn, setup_synced_account, sync_fake_account
+
+class GrowingAccount(GreeksAccount):
+    async def a_get_balances(self, session):
+        balances = await super().a_get_balances(session)
+        balances.net_liquidating_value = 1250.0
+        return balances
+
+    async def a_get_history(self, session, **kwargs):
+        history = await super().a_get_history(session)
+        return history + [
+            broker_txn(20, 40, "MSFT", "Buy to Open", 5, -2000.0, "MSFT"),
+            broker_txn(21, 41, "MSFT", "Sell to Close", 5, 2100.0, "MSFT"),
+        ]
+
+async def _owner(db, account_id):
+    return (await get_tastytrade_account_by_id(db, uuid.UUID(account_id))).user_id
+
+@pytest.mark.asyncio
+async def test_dashboard_is_cached_until_the_next_sync(tmp_path):
+    quotes = tmp_path / "quotes.json"
+    quotes.write_text(json.dumps({"AAPL": {"c": 190.0, "pc": 188.0}, "SPY": {"c": 500.0, "pc": 495.0}}))
+    await market_data_service.set_provider(FileMarketDataProvider(str(quotes)))
+    years = years_to_expiry(EXPIRY, datetime.now(timezone.utc))
+    call_value = float(black_scholes(190.0, 200.0, years, 0.3, True, rate=0.045).price)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        headers, account_id = await setup_synced_account(ac, "dashboard", GreeksAccount(call_value))
+
+        statements = []
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+        event.listen(engine.sync_engine, "before_cursor_execute", count)
+        try:
+            resp = await ac.get(f"/api/v1/dashboard/{account_id}", headers=headers)
+            miss = len(statements)
+            statements.clear()
+            cached = await ac.get(f"/api/v1/dashboard/{account_id}", headers=headers)
+            hit = len(statements)
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+        assert resp.status_code == 200, resp.text
+        dashboard = resp.json()
+        # Balances, positions, and the P&L checkpoint probe plus one aggregate over all periods;
+        # a hit costs only the ownership check and the latest-sync probe.
+        assert miss - hit == 4
+        assert hit == 2
+        assert cached.json() == dashboard
+
+        assert dashboard["net_liquidity"] == 1000.0
+        assert dashboard["derivative_buying_power"] == 800.0
+        assert dashboard["equity_buying_power"] == 1600.0
+        assert dashboard["maintenance_requirement"] == 200.0
+        assert dashboard["buying_power_usage"] == pytest.approx(0.2)
+        assert dashboard["open_positions_count"] == 3
+        assert dashboard["priced_positions_count"] == 3
+        assert 0 < dashboard["portfolio_delta"] < 200
+        assert set(dashboard["pnl"]) == {"daily", "mtd", "ytd", "all_time"}
+        assert dashboard["pnl"]["all_time"]["net_realized_pnl"] == pytest.approx(296.0)
+        assert dashboard["pnl"]["daily"]["closing_transactions"] == 0
+
+        # A sync committed by another worker (no local invalidation) makes the entry stale.
+        async with async_session_maker() as db:
+            newer = datetime.fromisoformat(dashboard["balances_updated_at"]) + timedelta(microseconds=1)
+            await add_balance(db, uuid.UUID(account_id), await _owner(db, account_id), {
+                "account_number": "5WT00077", "net_liquidating_value": 1100.0, "created_at": newer,
+            })
+            await db.commit()
+        resp = await ac.get(f"/api/v1/dashboard/{account_id}", headers=headers)
+        assert resp.json()["net_liquidity"] == 1100.0
+
+        # A completed sync drops the cached summary.
+        await sync_fake_account(ac, headers, account_id, GrowingAccount(call_value))
+        resp = await ac.get(f"/api/v1/dashboard/{account_id}", headers=headers)
+        refreshed = resp.json()
+        assert refreshed["generated_at"] > dashboard["generated_at"]
+        assert refreshed["net_liquidity"] == 1250.0
+        assert refreshed["pnl"]["all_time"]["net_realized_pnl"] == pytest.approx(394.0)
+
+        resp = await ac.get("/api/v1/dashboard/00000000-0000-0000-0000-0000000000ff", headers=headers)
+        assert resp.status_code == 404
+
+@pytest.mark.asyncio
+async def test_sync_completes_when_dashboard_invalidation_fails():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        # sync_fake_account asserts the job completed despite the post-commit failure.
+        with patch.object(dashboard_service, "invalidate", side_effect=RuntimeError("cache down")):
+            headers, account_id = await setup_synced_account(ac, "dashfail", FakeTradingAccount())
+        resp = await ac.get(f"/api/v1/tastytrade/accounts/{account_id}/transactions", headers=headers)
+        assert len(resp.json()) == 4
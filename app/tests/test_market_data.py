@@ -0,0 +1,132 @@
+import asyncio
+import json
+import time
+import uuid
+import pytest
+from datetime import datetime, timezone
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.core.cache import SwrCache
+from app.services.market_data import (
+    FileMarketDataProvider,
+    MarketDataError,
+    MarketDataService,
+    is_market_open,
+    market_data_service,
+    next_market_open,
+    parse_quote,
+    refresh_interval,
+)
+
+SYMBOLS = {"SPY": "S&P 500", "VIX": "CBOE Volatility Index"}
+
+class CountingProvider(FileMarketDataProvider):
+    def __init__(self, path, delay=0.05):
+        super().__init__(path)
+        self.calls = 0
+        self.delay = delay
+        self.fail = False
+
+    async def fetch_quotes(self, symbols):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise MarketDataError("upstream down")
+        return await super().fetch_quotes(symbols)
+
+def write_quotes(path, spy=500.0, vix=13.0):
+    path.write_text(json.dumps({
+        "SPY": {"c": spy, "d": 2.0, "dp": 0.4, "t": 1718049600},
+        "VIX": {"c": vix, "pc": 14.0},
+    }))
+
+def test_parse_quote():
+    quote = parse_quote("VIX", {"c": 13.0, "pc": 14.0})
+    assert quote.change == pytest.approx(-1.0)
+    assert quote.percent_change == pytest.approx(-100 / 14)
+    assert quote.timestamp is None
+    with pytest.raises(MarketDataError):
+        parse_quote("NOPE", {"c": 0, "d": None, "dp": None})
+
+def test_market_hours_schedule():
+    # 2024-06-10 is a Monday; 14:00 UTC is 10:00 in New York.
+    assert is_market_open(datetime(2024, 6, 10, 14, 0, tzinfo=timezone.utc))
+    assert not is_market_open(datetime(2024, 6, 10, 21, 0, tzinfo=timezone.utc))
+    assert not is_market_open(datetime(2024, 6, 8, 15, 0, tzinfo=timezone.utc))
+    friday_evening = datetime(2024, 6, 7, 22, 0, tzinfo=timezone.utc)
+    assert next_market_open(friday_evening) == datetime(2024, 6, 10, 13, 30, tzinfo=timezone.utc)
+    # Closed: wake at the open rather than a full closed interval later.
+    assert refresh_interval(datetime(2024, 6, 10, 13, 25, tzinfo=timezone.utc)) == 300.0
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_fetch(tmp_path):
+    path = tmp_path / "quotes.json"
+    write_quotes(path)
+    provider = CountingProvider(path)
+    service = MarketDataService(provider, SYMBOLS, SwrCache(fresh_ttl=60, max_stale=600))
+
+    results = await asyncio.gather(*(service.get_overview() for _ in range(1000)))
+    assert provider.calls == 1
+    assert all(r["indices"] == results[0]["indices"] for r in results)
+    assert [i["symbol"] for i in results[0]["indices"]] == ["SPY", "VIX"]
+    assert results[0]["indices"][1]["last_updated_at"] == results[0]["data_source_timestamp"]
+
+    # Fresh: served from the cache.
+    await service.get_overview()
+    assert provider.calls == 1
+
+@pytest.mark.asyncio
+async def test_stale_while_revalidate_and_stale_on_error(tmp_path):
+    path = tmp_path / "quotes.json"
+    write_quotes(path, spy=500.0)
+    provider = CountingProvider(path, delay=0.01)
+    service = MarketDataService(provider, SYMBOLS, SwrCache(fresh_ttl=0.05, max_stale=600))
+    await service.get_overview()
+
+    write_quotes(path, spy=501.0)
+    time.sleep(0.06)
+    # Past the fresh TTL: the old value is served at once while one refresh runs.
+    results = await asyncio.gather(*(service.get_overview() for _ in range(50)))
+    assert {r["indices"][0]["current_value"] for r in results} == {500.0}
+    assert all(r["stale"] for r in results)
+    await asyncio.sleep(0.05)
+    assert provider.calls == 2
+    overview = await service.get_overview()
+    assert overview["indices"][0]["current_value"] == 501.0 and not overview["stale"]
+
+    # Upstream down and the entry past max_stale: the caller waits, the fetch
+    # fails and the last good quotes are served, flagged stale.
+    service.cache.max_stale = 0
+    provider.fail = True
+    time.sleep(0.06)
+    overview = await service.get_overview()
+    assert overview["stale"] and overview["indices"][0]["current_value"] == 501.0
+
+    service.cache.clear()
+    with pytest.raises(MarketDataError):
+        await service.get_overview()
+
+@pytest.mark.asyncio
+async def test_market_overview_endpoint(tmp_path):
+    path = tmp_path / "quotes.json"
+    write_quotes(path, spy=499.5)
+    await market_data_service.set_provider(FileMarketDataProvider(str(path)))
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        email = f"market_{uuid.uuid4().hex[:8]}@example.com"
+        await ac.post("/api/v1/auth/register-user", json={"email": email, "password": "MarketPassword123!", "role": "user"})
+        resp = await ac.post("/api/v1/auth/login", json={"email": email, "password": "MarketPassword123!"})
+        headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+        resp = await ac.get("/api/v1/market-data/overview")
+        assert resp.status_code == 401
+        resp = await ac.get("/api/v1/market-data/overview", headers=headers)
+        assert resp.status_code == 200, resp.text
+        body = resp.json()
+        assert body["stale"] is False
+        assert {i["symbol"]: i["current_value"] for i in body["indices"]}["SPY"] == 499.5
+
+        path.write_text("not json")
+        await market_data_service.set_provider(FileMarketDataProvider(str(path)))
+        resp = await ac.get("/api/v1/market-data/overview", headers=headers)
+        assert resp.status_code == 503
@@ -0,0 +1,57 @@
+import pytest
+import uuid
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.core.metrics import REQUEST_DB_STATEMENTS
+
+@pytest.mark.asyncio
+async def test_metrics_record_route_latency_and_sql_statements():
+    email = f"metrics_{uuid.uuid4().hex[:8]}@example.com"
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        await ac.post("/api/v1/auth/register-user", json={"email": email, "password": "TestPassword123!", "role": "user"})
+        resp = await ac.post("/api/v1/auth/login", json={"email": email, "password": "TestPassword123!"})
+        headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+        resp = await ac.get("/api/v1/tastytrade/accounts/", headers=headers)
+        assert resp.status_code == 200
+
+        series = REQUEST_DB_STATEMENTS._series[("POST", "/api/v1/auth/login")]
+        assert series[-1] >= 2  # user lookup + last-login update
+
+        resp = await ac.get("/metrics")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/plain")
+        body = resp.text
+        assert 'http_request_duration_seconds_count{method="GET",route="/api/v1/tastytrade/accounts/",status="200"}' in body
+        assert 'http_request_db_statements_bucket{method="POST",route="/api/v1/auth/login",le="+Inf"}' in body
+        assert "db_statements_total " in body
+        assert 'db_pool_checked_out{engine="primary"}' in body
+        # Raw paths must never become label values
+        resp = await ac.get(f"/api/v1/tastytrade/accounts/{uuid.uuid4()}/balances", headers=headers)
+        assert resp.status_code == 404
+        body = (await ac.get("/metrics")).text
+        assert 'route="/api/v1/tastytrade/accounts/{account_id}/balances"' in body
+
+@pytest.mark.asyncio
+async def test_background_tasks_started_in_a_request_are_not_billed_to_it():
+    import asyncio
+    from app.background_tasks.market_data_tasks import MarketDataRefresher
+    from app.core.metrics import RequestDbStats, _request_db_stats
+
+    seen = asyncio.Event()
+    inherited = []
+
+    class Service:
+        async def refresh(self):
+            inherited.append(_request_db_stats.get())
+            seen.set()
+
+    refresher = MarketDataRefresher(Service())
+    token = _request_db_stats.set(RequestDbStats())
+    try:
+        await refresher.start()
+        await asyncio.wait_for(seen.wait(), timeout=5)
+    finally:
+        _request_db_stats.reset(token)
+        await refresher.stop()
+    assert inherited == [None]
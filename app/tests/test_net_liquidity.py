@@ -0,0 +1,92 @@
+import uuid
+import pytest
+from datetime import date, datetime, timezone
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import delete, event, insert
+from app.main import app
+from app.db.session import async_session_maker, engine
+from app.db.models.balance_history import BalanceDailyOhlc
+from app.db.models.tastytrade_account import TastyTradeAccount
+from app.db.models.tastytrade_balance import TastyTradeBalance
+from app.db.models.tastytrade_transaction import TastyTradeTransaction
+from app.tests.utils import FakeTradingAccount, setup_synced_account
+
+def utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+def money_movement(account, i, sub_type, value, day):
+    return {
+        "id": uuid.uuid4(), "account_id": account.id, "user_id": account.user_id,
+        "account_number": "5WT00077", "transaction_id": f"mm-{i}",
+        "transaction_type": "Money Movement", "transaction_sub_type": sub_type,
+        "value": value, "amount": value, "fees": 0.0, "date": utc(2024, 1, day),
+    }
+
+@pytest.mark.asyncio
+async def test_net_liquidity_reconciliation():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        # January 2024: the fake history realizes 300 with 4 in fees.
+        headers, account_id = await setup_synced_account(ac, "netliq", FakeTradingAccount())
+        async with async_session_maker() as db:
+            account = await db.get(TastyTradeAccount, uuid.UUID(account_id))
+            await db.execute(insert(TastyTradeTransaction).values([
+                money_movement(account, 1, "Deposit", 500.0, 10),
+                money_movement(account, 2, "Withdrawal", -200.0, 15),
+                money_movement(account, 3, "Credit Interest", 5.0, 31),
+            ]))
+            await db.execute(insert(TastyTradeBalance).values([
+                {"id": uuid.uuid4(), "account_id": account.id, "user_id": account.user_id,
+                 "account_number": "5WT00077", "net_liquidating_value": nlv, "created_at": at}
+                for at, nlv in ((utc(2024, 1, 1), 10000.0), (utc(2024, 2, 1), 10650.0))
+            ]))
+            await db.commit()
+
+        params = {"start_date": "2024-01-01T00:00:00Z", "end_date": "2024-02-01T00:00:00Z"}
+        statements = []
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+        event.listen(engine.sync_engine, "before_cursor_execute", count)
+        try:
+            resp = await ac.get(f"/api/v1/reports/net-liquidity/reconciliation/{account_id}", params=params, headers=headers)
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", count)
+        assert resp.status_code == 200, resp.text
+        report = resp.json()
+        assert report["starting_net_liquidity"] == 10000.0
+        assert report["ending_net_liquidity"] == 10650.0
+        assert report["realized_pnl"] == pytest.approx(300.0)
+        assert report["fees_and_commissions"] == pytest.approx(4.0)
+        assert report["cash_deposits"] == 500.0
+        assert report["cash_withdrawals"] == 200.0
+        assert report["other_adjustments"] == 5.0
+        assert report["transactions"] == 7
+        assert report["calculated_ending_net_liquidity"] == pytest.approx(10601.0)
+        assert report["unrealized_pnl_change"] == pytest.approx(49.0)
+        # Ownership, two boundary lookups, one grouped cash-flow scan and the materialised P&L.
+        assert len(statements) <= 6
+
+        # Once the starting snapshot is rolled up, the day's close stands in for it.
+        async with async_session_maker() as db:
+            await db.execute(delete(TastyTradeBalance).where(
+                TastyTradeBalance.account_id == account.id, TastyTradeBalance.created_at == utc(2024, 1, 1)
+            ))
+            await db.execute(insert(BalanceDailyOhlc).values(
+                account_id=account.id, account_number="5WT00077", day=date(2023, 12, 31),
+                open=9900.0, high=10100.0, low=9800.0, close=10000.0, samples=3,
+            ))
+            await db.commit()
+        resp = await ac.get(f"/api/v1/reports/net-liquidity/reconciliation/{account_id}", params=params, headers=headers)
+        rolled = resp.json()
+        assert rolled["starting_net_liquidity"] == 10000.0
+        assert rolled["starting_balance_at"] == report["starting_balance_at"]
+        assert rolled["unrealized_pnl_change"] == pytest.approx(49.0)
+
+        # Before any balance exists, reconciliation starts from the first one.
+        resp = await ac.get(
+            f"/api/v1/reports/net-liquidity/reconciliation/{account_id}",
+            params={"start_date": "2023-06-01T00:00:00Z", "end_date": "2023-12-01T00:00:00Z"}, headers=headers,
+        )
+        empty = resp.json()
+        assert empty["starting_net_liquidity"] is None and empty["unrealized_pnl_change"] is None
+        assert empty["transactions"] == 0
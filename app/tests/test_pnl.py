@@ -0,0 +1,240 @@
+import time
+import uuid
+import pytest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.services.pnl import TransactionColumns, compute_realized_pnl, resolve_period
+from app.tests.utils import T0, OPTION, FakeTradingAccount, broker_txn, row, setup_synced_account, sync_fake_account
+
+def pnl(rows):
+    return compute_realized_pnl(TransactionColumns.from_rows(rows))
+
+def test_fifo_stock_partial_closes():
+    result = pnl([
+        row(0, "AAPL", "Buy to Open", 10, -1000.0, fees=1.0),
+        row(1, "AAPL", "Buy to Open", 10, -1200.0),
+        row(2, "AAPL", "Sell to Close", 15, 1950.0, fees=1.0),
+    ])
+    # 10 @ 100 and 5 @ 120 closed at 130
+    assert result.summary()["realized_pnl"] == pytest.approx(300.0 + 50.0)
+    assert result.summary()["net_realized_pnl"] == pytest.approx(348.0)
+    lot = result.open_lots[(None, "AAPL")][0]
+    assert lot.quantity == 5 and lot.cash_per_unit == pytest.approx(-120.0)
+
+def test_sub_accounts_keep_separate_lots():
+    result = pnl([
+        row(0, "AAPL", "Buy to Open", 1, -100.0, account_number="IRA"),
+        row(1, "AAPL", "Buy to Open", 1, -200.0, account_number="MARGIN"),
+        row(2, "AAPL", "Sell to Close", 1, 210.0, account_number="MARGIN"),
+    ])
+    # The margin sale closes the margin lot, not the older IRA one.
+    assert result.summary()["realized_pnl"] == pytest.approx(10.0)
+    assert [lot.cash_per_unit for lot in result.open_lots[("IRA", "AAPL")]] == [-100.0]
+    assert ("MARGIN", "AAPL") not in result.open_lots
+
+def test_fractional_share_quantities():
+    result = pnl([
+        row(0, "AAPL", "Buy", 0.5, -50.0),
+        row(1, "AAPL", "Sell", 0.25, 30.0),
+    ])
+    assert result.summary()["realized_pnl"] == pytest.approx(5.0)
+    assert result.open_lots[(None, "AAPL")][0].quantity == pytest.approx(0.25)
+
+def test_short_option_expiration_keeps_premium():
+    result = pnl([
+        row(0, OPTION, "Sell to Open", 2, 300.0, fees=2.5, underlying="SPY", instrument="Equity Option"),
+        row(14, OPTION, None, 2, 0.0, sub_type="Expiration", txn_type="Receive Deliver",
+            underlying="SPY", instrument="Equity Option"),
+    ])
+    assert result.summary()["realized_pnl"] == pytest.approx(300.0)
+    assert result.summary()["closing_transactions"] == 1
+    assert (None, OPTION) not in result.open_lots
+
+def test_zero_quantity_closing_row_is_ignored():
+    import warnings
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        result = pnl([
+            row(0, OPTION, "Sell to Open", 2, 300.0, underlying="SPY", instrument="Equity Option"),
+            row(14, OPTION, None, 0, 0.0, sub_type="Expiration", txn_type="Receive Deliver",
+                underlying="SPY", instrument="Equity Option"),
+        ])
+    assert result.summary()["realized_pnl"] == 0.0
+    assert result.summary()["closing_transactions"] == 0
+    [lot] = result.open_lots[(None, OPTION)]
+    assert lot.quantity == -2 and lot.cash_per_unit == pytest.approx(150.0)
+
+def test_assignment_closes_option_and_opens_stock():
+    result = pnl([
+        row(0, OPTION, "Sell to Open", 1, 250.0, underlying="SPY", instrument="Equity Option"),
+        row(14, OPTION, None, 1, 0.0, sub_type="Assignment", txn_type="Receive Deliver",
+            underlying="SPY", instrument="Equity Option"),
+        row(14, "SPY", "Buy to Open", 100, -50000.0, sub_type="Buy to Open", txn_type="Receive Deliver"),
+        row(20, "SPY", "Sell to Close", 100, 49900.0),
+    ])
+    by_underlying = {r["underlying_symbol"]: r for r in result.by_underlying()}
+    assert list(by_underlying) == ["SPY"]
+    assert by_underlying["SPY"]["realized_pnl"] == pytest.approx(250.0 - 100.0)
+
+def test_position_flip_and_legacy_rows_without_value():
+    result = pnl([
+        row(0, "TSLA", "Buy", 1, None, price=200.0),
+        row(1, "TSLA", "Sell", 3, None, price=210.0),
+        row(2, "TSLA", "Buy", 2, None, price=205.0),
+        # Pre-migration row: no action or value, only net amount
+        row(3, "MSFT", None, 1, None, amount=-300.0),
+        row(4, "MSFT", None, 1, None, amount=310.0),
+    ])
+    realized = result.realized.tolist()
+    assert realized[1] == pytest.approx(10.0)      # long 1 closed at 210
+    assert realized[2] == pytest.approx(10.0)      # short 2 @ 210 covered at 205
+    assert realized[4] == pytest.approx(10.0)
+    assert result.open_lots == {}
+
+def test_period_summary_masks_rows_by_date():
+    result = pnl([
+        row(0, "AAPL", "Buy to Open", 1, -100.0),
+        row(1, "AAPL", "Sell to Close", 1, 110.0),
+        row(30, "AAPL", "Buy to Open", 1, -100.0),
+        row(31, "AAPL", "Sell to Close", 1, 90.0),
+    ])
+    assert result.summary()["realized_pnl"] == pytest.approx(0.0)
+    start, end = (T0 + timedelta(days=30)).timestamp(), (T0 + timedelta(days=40)).timestamp()
+    assert result.summary(start, end)["realized_pnl"] == pytest.approx(-10.0)
+
+def test_resolve_period():
+    now = datetime(2024, 5, 17, 12, tzinfo=timezone.utc)
+    assert resolve_period("mtd", now=now) == (datetime(2024, 5, 1, tzinfo=timezone.utc), now)
+    assert resolve_period("all_time", now=now) == (None, now)
+    with pytest.raises(ValueError):
+        resolve_period(None, start_date=now, end_date=now)
+
+def test_engine_handles_large_histories_quickly():
+    rows = []
+    for i in range(50_000):
+        symbol = f"SYM{i % 500}"
+        rows.append(row(i / 1000, symbol, "Buy to Open", 10, -1000.0, fees=0.5))
+        rows.append(row(i / 1000 + 0.0005, symbol, "Sell to Close", 10, 1010.0, fees=0.5))
+    started = time.perf_counter()
+    result = pnl(rows)
+    elapsed = time.perf_counter() - started
+    assert result.summary()["realized_pnl"] == pytest.approx(500_000.0)
+    assert elapsed < 2.0
+
+@pytest.mark.asyncio
+async def test_pnl_report_endpoints():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        headers, account_id = await setup_synced_account(ac, "pnl", FakeTradingAccount())
+
+        resp = await ac.get(f"/api/v1/reports/pnl/summary/{account_id}", headers=headers)
+        assert resp.status_code == 200, resp.text
+        summary = resp.json()
+        assert summary["realized_pnl"] == pytest.approx(300.0)
+        assert summary["fees_total"] == pytest.approx(4.0)
+        assert summary["net_realized_pnl"] == pytest.approx(296.0)
+
+        resp = await ac.get(f"/api/v1/reports/pnl/by-underlying/{account_id}", headers=headers,
+                            params={"start_date": "2024-01-01T00:00:00Z", "end_date": "2024-01-10T00:00:00Z"})
+        assert resp.status_code == 200, resp.text
+        assert [(r["underlying_symbol"], r["realized_pnl"]) for r in resp.json()] == [("AAPL", 100.0), ("SPY", 0.0)]
+
+        resp = await ac.get(f"/api/v1/reports/pnl/summary/{account_id}", headers=headers, params={"period": "weekly"})
+        assert resp.status_code == 422
+        resp = await ac.get(f"/api/v1/reports/pnl/summary/{uuid.uuid4()}", headers=headers)
+        assert resp.status_code == 404
+
+@pytest.mark.asyncio
+async def test_sync_refreshes_pnl_snapshots_incrementally():
+    from sqlalchemy import select
+    from app.db.session import async_session_maker
+    from app.db.models.pnl_snapshot import PnlCheckpoint, PnlDailySnapshot
+
+    async def checkpoints(account_id):
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(PnlCheckpoint.id, PnlCheckpoint.day, PnlCheckpoint.open_lots)
+                .where(PnlCheckpoint.account_id == uuid.UUID(account_id))
+                .order_by(PnlCheckpoint.day)
+            )
+            return result.all()
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        headers, account_id = await setup_synced_account(ac, "pnlinc", FakeTradingAccount())
+        first = await checkpoints(account_id)
+        # History spans Jan 2 - Jan 22: one monthly checkpoint, all lots closed
+        assert [(c.day.isoformat(), c.open_lots) for c in first] == [("2024-01-22", {})]
+
+        # Re-syncing identical history changes nothing
+        await sync_fake_account(ac, headers, account_id, FakeTradingAccount())
+        assert await checkpoints(account_id) == first
+
+        # A February trade resumes from the January checkpoint instead of rebuilding it
+        later = FakeTradingAccount(extra=[
+            broker_txn(5, 40, "MSFT", "Buy to Open", 5, -2000.0, "MSFT"),
+            broker_txn(6, 41, "MSFT", "Sell to Close", 2, 900.0, "MSFT"),
+        ])
+        await sync_fake_account(ac, headers, account_id, later)
+        second = await checkpoints(account_id)
+        assert second[0] == first[0]
+        assert second[1].day.isoformat() == "2024-02-12"
+        assert second[1].open_lots["5WT00077"]["MSFT"][0][0] == pytest.approx(3.0)
+
+        async with async_session_maker() as db:
+            result = await db.execute(select(PnlDailySnapshot).where(PnlDailySnapshot.account_id == uuid.UUID(account_id)))
+            days = {(r.day.isoformat(), r.underlying_symbol): r.realized_pnl for r in result.scalars()}
+        assert days[("2024-02-12", "MSFT")] == pytest.approx(100.0)
+
+        resp = await ac.get(f"/api/v1/reports/pnl/summary/{account_id}", headers=headers,
+                            params={"start_date": "2024-02-01T00:00:00Z", "end_date": "2024-03-01T00:00:00Z"})
+        assert resp.json()["realized_pnl"] == pytest.approx(100.0)
+        assert resp.json()["fees_total"] == pytest.approx(2.0)
+
+@pytest.mark.asyncio
+async def test_snapshots_are_rebuilt_per_sub_account_after_migration():
+    from sqlalchemy import func, insert, select
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from app.db.models.pnl_snapshot import PnlCheckpoint, PnlDailySnapshot
+    from app.db.models.tastytrade_account import TastyTradeAccount
+    from app.db.models.user import User
+    from app.services.pnl import get_pnl_summary
+    from app.services.sync_service import AccountSnapshot, write_sync_batch
+    from app.tests.utils import run_migration, scratch_engine
+
+    user_id, account_id = uuid.uuid4(), uuid.uuid4()
+    balances = SimpleNamespace(net_liquidating_value=1000.0)
+    ira = [broker_txn(1, 0, "AAPL", "Buy to Open", 1, -100.0, "AAPL")]
+    margin = [
+        broker_txn(2, 1, "AAPL", "Buy to Open", 1, -200.0, "AAPL"),
+        broker_txn(3, 2, "AAPL", "Sell to Close", 1, 210.0, "AAPL"),
+    ]
+    async with scratch_engine("pnlrebuild") as scratch:
+        async with scratch.begin() as conn:
+            await conn.execute(insert(User.__table__).values(id=user_id, email="rebuild@example.com", hashed_password="x"))
+            await conn.execute(insert(TastyTradeAccount.__table__).values(
+                id=account_id, user_id=user_id, tasty_username="rebuild", tasty_password_encrypted="x"
+            ))
+        async with AsyncSession(scratch, expire_on_commit=False) as db:
+            await write_sync_batch(db, account_id, user_id, [
+                AccountSnapshot("IRA", balances, [], ira), AccountSnapshot("MARGIN", balances, [], margin),
+            ])
+        async with scratch.begin() as conn:
+            # Stand-ins for what the symbol-keyed engine stored: the sale closed the IRA lot.
+            await conn.execute(PnlCheckpoint.__table__.update().values(open_lots={"AAPL": [[1.0, -200.0, 0.0]]}))
+            await conn.execute(PnlDailySnapshot.__table__.update().values(realized_pnl=110.0))
+            await conn.run_sync(run_migration, "0c7e4a2f9b61_rebuild_pnl_snapshots_per_sub_account.py", "upgrade")
+            assert (await conn.execute(select(func.count()).select_from(PnlCheckpoint.__table__))).scalar() == 0
+
+        async with AsyncSession(scratch, expire_on_commit=False) as db:
+            end = datetime(2024, 2, 1, tzinfo=timezone.utc)
+            # Unmaterialised accounts are computed on the fly; the next sync rebuilds the snapshots.
+            assert (await get_pnl_summary(db, account_id, None, end))["realized_pnl"] == pytest.approx(10.0)
+            await write_sync_batch(db, account_id, user_id, [
+                AccountSnapshot("IRA", balances, [], ira), AccountSnapshot("MARGIN", balances, [], margin),
+            ])
+            assert (await get_pnl_summary(db, account_id, None, end))["realized_pnl"] == pytest.approx(10.0)
+            [lots] = (await db.execute(select(PnlCheckpoint.open_lots))).scalars().all()
+            assert lots == {"IRA": {"AAPL": [[1.0, -100.0, datetime(2024, 1, 2, tzinfo=timezone.utc).timestamp()]]}}
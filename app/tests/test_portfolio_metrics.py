@@ -0,0 +1,143 @@
+import json
+import math
+import time
+import pytest
+import numpy as np
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+from app.services.market_data import FileMarketDataProvider, market_data_service
+from app.services.portfolio import aggregate_greeks, black_scholes, implied_volatility, price_positions
+from app.services.portfolio.metrics import years_to_expiry
+from app.tests.utils import EXPIRY, FakeTradingAccount, GreeksAccount, setup_synced_account, sync_fake_account
+
+NOW = datetime(2024, 6, 10, 14, 0, tzinfo=timezone.utc)
+
+def reference_call(spot, strike, years, vol, rate):
+    n = lambda x: 0.5 * (1 + math.erf(x / math.sqrt(2)))
+    d1 = (math.log(spot / strike) + (rate + vol * vol / 2) * years) / (vol * math.sqrt(years))
+    d2 = d1 - vol * math.sqrt(years)
+    return spot * n(d1) - strike * math.exp(-rate * years) * n(d2), n(d1)
+
+def test_black_scholes_matches_closed_form_and_parity():
+    call = black_scholes(100.0, 105.0, 0.5, 0.25, True, rate=0.05)
+    put = black_scholes(100.0, 105.0, 0.5, 0.25, False, rate=0.05)
+    price, delta = reference_call(100.0, 105.0, 0.5, 0.25, 0.05)
+    assert float(call.price) == pytest.approx(price, abs=1e-4)
+    assert float(call.delta) == pytest.approx(delta, abs=1e-6)
+    assert float(call.price - put.price) == pytest.approx(100.0 - 105.0 * math.exp(-0.025), abs=1e-5)
+    assert float(call.delta - put.delta) == pytest.approx(1.0, abs=1e-6)
+    assert float(call.gamma) == pytest.approx(float(put.gamma))
+    # Theta per day and vega per vol point, checked against finite differences.
+    bumped = black_scholes(100.0, 105.0, 0.5 - 1 / 365, 0.25, True, rate=0.05)
+    assert float(call.theta) == pytest.approx(float(bumped.price - call.price), rel=1e-2)
+    bumped = black_scholes(100.0, 105.0, 0.5, 0.26, True, rate=0.05)
+    assert float(call.vega) == pytest.approx(float(bumped.price - call.price), rel=1e-2)
+    # Expired: intrinsic value, delta 0 or ±1, nothing else.
+    expired = black_scholes([110.0, 90.0], 100.0, 0.0, 0.3, [True, True])
+    assert expired.price.tolist() == [10.0, 0.0]
+    assert expired.delta.tolist() == [1.0, 0.0]
+    assert expired.vega.tolist() == [0.0, 0.0]
+
+def test_implied_volatility_round_trips_a_large_book():
+    rng = np.random.default_rng(7)
+    n = 5000
+    spot = rng.uniform(50, 150, n)
+    strike = rng.uniform(50, 150, n)
+    years = rng.uniform(0.02, 2, n)
+    vol = rng.uniform(0.1, 1.0, n)
+    is_call = rng.random(n) < 0.5
+    greeks = black_scholes(spot, strike, years, vol, is_call, rate=0.04)
+
+    started = time.perf_counter()
+    solved = implied_volatility(greeks.price, spot, strike, years, is_call, rate=0.04)
+    repriced = black_scholes(spot, strike, years, solved, is_call, rate=0.04)
+    elapsed = time.perf_counter() - started
+    assert not np.isnan(solved).any()
+    assert np.abs(repriced.price - greeks.price).max() < 1e-5
+    identifiable = greeks.vega > 1e-3
+    assert np.abs(solved - vol)[identifiable].max() < 1e-4
+    assert elapsed < 0.5
+
+    # Above the no-arbitrage ceiling there is no volatility; at intrinsic, the minimum.
+    assert np.isnan(implied_volatility(101.0, 100.0, 100.0, 0.5, True))
+    assert implied_volatility(10.0, 110.0, 100.0, 0.5, True) == pytest.approx(1e-4)
+
+def position(symbol, quantity, market_value, account_number="5WT00077"):
+    return SimpleNamespace(symbol=symbol, quantity=quantity, market_value=market_value, account_number=account_number)
+
+def test_price_positions_scales_and_aggregates():
+    years = years_to_expiry(date(2024, 7, 19), NOW)
+    put_price = float(black_scholes(500.0, 480.0, years, 0.2, False, rate=0.05).price)
+    legs = price_positions([
+        position("SPY", 100, 50000.0),
+        position("SPY   240719P00480000", -2, -put_price * 200),
+        position("QQQ   240719C00450000", 1, 300.0),        # no underlying price
+        position("/ESU4", 1, 250000.0),
+        position("SPY   240607C00490000", 1, 1000.0),       # expired in the money
+        position("IWM", 0, 0.0),
+    ], {"SPY": 500.0}, now=NOW, rate=0.05)
+
+    by_symbol = {leg["symbol"]: leg for leg in legs}
+    assert "IWM" not in by_symbol
+    assert by_symbol["SPY"]["delta"] == 100.0 and by_symbol["SPY"]["gamma"] == 0.0
+    put = by_symbol["SPY   240719P00480000"]
+    expected = black_scholes(500.0, 480.0, years, 0.2, False, rate=0.05)
+    assert put["implied_volatility"] == pytest.approx(0.2, abs=1e-5)
+    assert put["delta"] == pytest.approx(float(expected.delta) * -200, rel=1e-4)
+    assert put["theta"] > 0 and put["gamma"] < 0
+    assert by_symbol["QQQ   240719C00450000"]["delta"] is None
+    assert by_symbol["/ESU4"]["instrument"] == "future" and by_symbol["/ESU4"]["delta"] is None
+    assert by_symbol["SPY   240607C00490000"]["delta"] == 100.0
+
+    totals = aggregate_greeks(legs)
+    assert totals["portfolio_delta"] == pytest.approx(200.0 + put["delta"])
+    assert totals["portfolio_vega"] == pytest.approx(put["vega"])
+    assert aggregate_greeks([])["portfolio_delta"] is None
+
+@pytest.mark.asyncio
+async def test_current_portfolio_metrics_endpoint(tmp_path):
+    quotes = tmp_path / "quotes.json"
+    quotes.write_text(json.dumps({"AAPL": {"c": 190.0, "pc": 188.0}, "SPY": {"c": 500.0, "pc": 495.0}}))
+    await market_data_service.set_provider(FileMarketDataProvider(str(quotes)))
+    years = years_to_expiry(EXPIRY, datetime.now(timezone.utc))
+    call_value = float(black_scholes(190.0, 200.0, years, 0.3, True, rate=0.045).price)
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        headers, account_id = await setup_synced_account(ac, "greeks", GreeksAccount(call_value))
+        resp = await ac.get(f"/api/v1/portfolio/metrics/current/{account_id}", headers=headers)
+        assert resp.status_code == 200, resp.text
+        metrics = resp.json()
+
+        assert metrics["net_liquidity"] == 1000.0 and metrics["cash"] == 1000.0
+        assert metrics["open_positions_count"] == 3
+        assert metrics["priced_positions_count"] == 3
+        assert metrics["last_updated_at"] is not None
+        legs = {leg["symbol"]: leg for leg in metrics["positions"]}
+        call = legs["AAPL  310117C00200000"]
+        assert call["underlying_price"] == 190.0
+        assert call["implied_volatility"] == pytest.approx(0.3, abs=1e-3)
+        assert call["delta"] < 0
+        assert legs["SPY   310117P00450000"]["underlying_price"] == 500.0
+        assert metrics["portfolio_delta"] == pytest.approx(sum(leg["delta"] for leg in legs.values()))
+        assert 0 < metrics["portfolio_delta"] < 200
+
+        resp = await ac.get("/api/v1/portfolio/metrics/current/00000000-0000-0000-0000-0000000000ff", headers=headers)
+        assert resp.status_code == 404
+
+@pytest.mark.asyncio
+async def test_sync_without_positions_empties_the_book():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        headers, account_id = await setup_synced_account(ac, "flatbook", GreeksAccount(5.0))
+        # Everything was closed: the next sync reports no positions at all.
+        await sync_fake_account(ac, headers, account_id, FakeTradingAccount())
+        resp = await ac.get(f"/api/v1/portfolio/metrics/current/{account_id}", headers=headers)
+        assert resp.status_code == 200, resp.text
+        metrics = resp.json()
+        assert metrics["open_positions_count"] == 0
+        assert metrics["positions"] == []
+        assert metrics["portfolio_delta"] is None
+        assert metrics["net_liquidity"] == 1000.0
@@ -49,3 +49,66 @@ async def test_position_group_crud_flow():
         resp = await ac.get(f"{settings.API_V1_STR}/position-groups")
         assert resp.status_code == 200
         assert resp.json() == []
+
+@pytest.mark.asyncio
+async def test_position_group_listing_uses_constant_queries():
+    import uuid
+    from sqlalchemy import event
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+    from app.api.v1.endpoints.deps import DummyUser
+    from app.crud.crud_position_group import bulk_insert_group_links, bulk_insert_groups
+    from app.crud.crud_tastytrade_transaction import get_transaction_columns
+    from app.db.models.user import User
+    from app.db.session import async_session_maker, engine
+    from app.tests.utils import FakeTradingAccount, setup_synced_account
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        # Groups are listed for the placeholder user these endpoints run as.
+        _, account_id = await setup_synced_account(ac, "groups", FakeTradingAccount())
+        async with async_session_maker() as db:
+            await db.execute(pg_insert(User).values(
+                id=DummyUser.id, email=f"placeholder-{DummyUser.id}@example.com", hashed_password="!", role="user", is_active=True,
+            ).on_conflict_do_nothing())
+            txn_ids = [r.id for r in await get_transaction_columns(db, account_id, ("id",))]
+            groups = [
+                {"id": uuid.uuid4(), "user_id": DummyUser.id, "account_id": account_id, "name": f"Group {i}"}
+                for i in range(1000)
+            ]
+            await bulk_insert_groups(db, groups)
+            await bulk_insert_group_links(db, [(g["id"], t) for g in groups for t in txn_ids[:2]])
+            await db.commit()
+
+        statements = []
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+        event.listen(engine.sync_engine, "before_cursor_execute", count)
+        try:
+            resp = await ac.get(f"{settings.API_V1_STR}/position-groups/", params={"account_id": account_id, "limit": 10})
+            small = len(statements)
+            statements.clear()
+            resp = await ac.get(f"{settings.API_V1_STR}/position-groups/", params={"account_id": account_id, "limit": 1000})
+            large = len(statements)
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", count)
+        assert resp.status_code == 200
+        page = resp.json()
+        assert len(page) == 1000
+        assert all(sorted(g["transaction_ids"]) == sorted(map(str, txn_ids[:2])) for g in page)
+        # The groups, then their links; selectinload sends 500 keys per IN query.
+        assert small == 2
+        assert large == 3
+
+        # Keyset pages cover the same groups without overlap.
+        seen, cursor = [], None
+        while True:
+            params = {"account_id": account_id, "limit": 400, **({"cursor": cursor} if cursor else {})}
+            resp = await ac.get(f"{settings.API_V1_STR}/position-groups/", params=params)
+            seen.extend(g["id"] for g in resp.json())
+            cursor = resp.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert sorted(seen) == sorted(g["id"] for g in page)
+
+        resp = await ac.get(f"{settings.API_V1_STR}/position-groups/", params={"account_id": account_id, "strategy_id": str(uuid.uuid4())})
+        assert resp.json() == []
@@ -0,0 +1,206 @@
+import time
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import func, select
+from app.main import app
+from app.db.session import async_session_maker
+from app.db.models.position_group import PositionGroup
+from app.db.models.strategy import Strategy
+from app.services.strategies import PositionLeg, identify_strategies, parse_occ_symbol
+from app.db.models.position_group_transaction import PositionGroupTransaction
+from app.db.models.tastytrade_transaction import TastyTradeTransaction
+from app.tests.utils import FakeTradingAccount, broker_position, broker_txn, setup_synced_account, sync_fake_account
+
+def leg(symbol, quantity, account_number="5WT00077"):
+    return PositionLeg(account_number, symbol, quantity)
+
+def test_parse_occ_symbol():
+    option = parse_occ_symbol("SPY   240119P00452500")
+    assert option.root == "SPY"
+    assert option.expiry == date(2024, 1, 19)
+    assert option.option_type == "P"
+    assert option.strike == Decimal("452.5")
+    assert parse_occ_symbol("BRK/B 240119C00400000").root == "BRK/B"
+    assert parse_occ_symbol("AAPL") is None
+    assert parse_occ_symbol("/ESZ4") is None
+    assert parse_occ_symbol("SPY   241332P00450000") is None
+
+def test_identify_strategies_matches_default_structures():
+    matches = identify_strategies([
+        leg("SPY   240119P00395000", 1), leg("SPY   240119P00400000", -1),
+        leg("SPY   240119C00420000", -1), leg("SPY   240119C00425000", 1),
+        leg("QQQ   240119C00300000", 1), leg("QQQ   240119C00310000", -2), leg("QQQ   240119C00320000", 1),
+        leg("AAPL", 250), leg("AAPL  240216C00200000", -3),
+        leg("IWM   240119P00180000", -3), leg("IWM   240119P00175000", 2),
+        leg("TSLA  240119P00200000", -1), leg("TSLA  240119C00200000", -1),
+        leg("TSLA  240119C00300000", 1),
+    ])
+    found = {(m.strategy, m.underlying): dict(m.legs) for m in matches}
+    assert set(found) == {
+        ("Iron Condor", "SPY"), ("Butterfly", "QQQ"), ("Covered Call", "AAPL"),
+        ("Naked Call", "AAPL"), ("Vertical Spread", "IWM"), ("Naked Put", "IWM"),
+        ("Vertical Spread", "TSLA"), ("Naked Put", "TSLA"),
+    }
+    assert found[("Butterfly", "QQQ")]["QQQ   240119C00310000"] == -2
+    # 250 shares cover two of the three short calls.
+    assert found[("Covered Call", "AAPL")] == {"AAPL": 200, "AAPL  240216C00200000": -2}
+    assert found[("Naked Call", "AAPL")] == {"AAPL  240216C00200000": -1}
+    assert found[("Vertical Spread", "IWM")] == {"IWM   240119P00180000": -2, "IWM   240119P00175000": 2}
+    # Keys ignore sizes, so a resized position keeps its group.
+    resized = identify_strategies([leg("IWM   240119P00180000", -5), leg("IWM   240119P00175000", 5)])
+    assert resized[0].key == next(m.key for m in matches if m.strategy == "Vertical Spread" and m.underlying == "IWM")
+
+def test_identify_strategies_keeps_sub_accounts_apart():
+    matches = identify_strategies([
+        leg("SPY   240119P00400000", -1, "A"), leg("SPY   240119P00395000", 1, "B"),
+    ])
+    assert sorted((m.strategy, m.account_number) for m in matches) == [("Naked Put", "A")]
+
+def test_identify_strategies_skips_fractional_partner_legs():
+    # Each rule finds a partner too small for one unit and must move on rather than retry it.
+    matches = identify_strategies([
+        leg("SPY   240119P00395000", 0.5), leg("SPY   240119P00400000", -1),
+        leg("SPY   240119C00420000", -1), leg("SPY   240119C00425000", 1),
+        leg("QQQ   240119C00300000", -1), leg("QQQ   240216C00300000", 0.5),
+        leg("IWM   240119P00180000", -1), leg("IWM   240119C00200000", -0.5),
+    ])
+    assert sorted((m.strategy, m.underlying) for m in matches) == [
+        ("Naked Call", "QQQ"), ("Naked Put", "IWM"), ("Naked Put", "SPY"), ("Vertical Spread", "SPY"),
+    ]
+
+def test_identify_strategies_is_fast_for_large_books():
+    legs = [
+        leg(f"SPY   24{1 + i % 6:02d}19{'CP'[i % 2]}{(300 + i // 2) * 1000:08d}", (-1) ** (i // 3) * (1 + i % 4))
+        for i in range(2000)
+    ]
+    started = time.perf_counter()
+    matches = identify_strategies(legs)
+    elapsed = time.perf_counter() - started
+    assert matches
+    assert elapsed < 1.0
+
+class OptionsAccount(FakeTradingAccount):
+    async def a_get_positions(self, session, **kwargs):
+        return [
+            broker_position("SPY   240315P00480000", 2, "Short", 3.0, 3.0),
+            broker_position("SPY   240315P00470000", 2, "Long", 1.5, 1.5),
+            broker_position("SPY   240315C00520000", 2, "Short", 2.0, 2.0),
+            broker_position("SPY   240315C00530000", 2, "Long", 1.0, 1.0),
+            broker_position("AAPL  240315P00150000", 1, "Short", 2.0, 2.0),
+        ]
+
+@pytest.mark.asyncio
+async def test_sync_creates_position_groups_for_identified_strategies():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        headers, account_id = await setup_synced_account(ac, "strategies", OptionsAccount())
+
+        resp = await ac.post(f"/api/v1/tastytrade/accounts/{account_id}/positions/identify-strategies", headers=headers)
+        assert resp.status_code == 200, resp.text
+        identified = {r["strategy"]: r for r in resp.json()}
+        assert set(identified) == {"Iron Condor", "Naked Put"}
+        # The sync already created the groups.
+        assert not any(r["created"] for r in identified.values())
+        assert {l["quantity"] for l in identified["Iron Condor"]["legs"]} == {2.0, -2.0}
+
+        # A second sync reuses the groups instead of duplicating them.
+        await sync_fake_account(ac, headers, account_id, OptionsAccount())
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(PositionGroup.name, Strategy.name)
+                .join(Strategy, Strategy.id == PositionGroup.strategy_id, isouter=True)
+                .where(PositionGroup.account_id == account_id, ~PositionGroup.match_key.startswith("trade|"))
+            )
+            groups = sorted(result.all())
+        assert groups == [("Iron Condor SPY 2024-03-15", "Iron Condor"), ("Naked Put AAPL 2024-03-15", "Naked Put")]
+
+@pytest.mark.asyncio
+async def test_sync_retires_groups_whose_legs_closed():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        headers, account_id = await setup_synced_account(ac, "retire", OptionsAccount())
+        async with async_session_maker() as db:
+            put_group = (await db.execute(
+                select(PositionGroup.id).where(PositionGroup.account_id == account_id, PositionGroup.name == "Naked Put AAPL 2024-03-15")
+            )).scalar_one()
+            transaction_id = (await db.execute(
+                select(TastyTradeTransaction.id).where(TastyTradeTransaction.account_id == account_id).limit(1)
+            )).scalar_one()
+            db.add(PositionGroupTransaction(group_id=put_group, transaction_id=transaction_id))
+            await db.commit()
+
+        # Every leg is closed: the condor goes, the put group the user linked becomes hand-made.
+        await sync_fake_account(ac, headers, account_id, FakeTradingAccount())
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(PositionGroup.id, PositionGroup.match_key)
+                .where(PositionGroup.account_id == account_id, ~PositionGroup.match_key.startswith("trade|"))
+            )
+            assert result.all() == []
+            remaining = (await db.execute(
+                select(PositionGroup.id).where(PositionGroup.account_id == account_id, PositionGroup.match_key.is_(None))
+            )).scalars().all()
+        assert remaining == [put_group]
+
+async def trade_groups(account_id):
+    async with async_session_maker() as db:
+        result = await db.execute(
+            select(PositionGroup.id, PositionGroup.name, func.count(PositionGroupTransaction.id))
+            .join(PositionGroupTransaction, PositionGroupTransaction.group_id == PositionGroup.id)
+            .where(PositionGroup.account_id == account_id, PositionGroup.match_key.startswith("trade|"))
+            .group_by(PositionGroup.id)
+        )
+        return {name: (group_id, links) for group_id, name, links in result.all()}
+
+@pytest.mark.asyncio
+async def test_sync_tags_transaction_history_into_trades_incrementally():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        headers, account_id = await setup_synced_account(ac, "tagging", FakeTradingAccount())
+        first = await trade_groups(account_id)
+        assert {name: links for name, (_, links) in first.items()} == {
+            "AAPL 2024-01-02": 2, "Naked Put SPY 2024-01-08": 2,
+        }
+
+        condor = [
+            broker_txn(10, 30, "SPY   240315P00480000", "Sell to Open", 1, 300.0, "SPY", "Equity Option"),
+            broker_txn(11, 30, "SPY   240315P00470000", "Buy to Open", 1, -150.0, "SPY", "Equity Option"),
+            broker_txn(12, 30, "SPY   240315C00520000", "Sell to Open", 1, 200.0, "SPY", "Equity Option"),
+            broker_txn(13, 30, "SPY   240315C00530000", "Buy to Open", 1, -100.0, "SPY", "Equity Option"),
+            broker_txn(14, 31, "SPY   240315P00480000", "Buy to Close", 1, -100.0, "SPY", "Equity Option"),
+        ]
+        await sync_fake_account(ac, headers, account_id, FakeTradingAccount(extra=condor))
+        second = await trade_groups(account_id)
+        # Only the new fills were processed: earlier groups kept their ids.
+        assert second["AAPL 2024-01-02"] == first["AAPL 2024-01-02"]
+        assert second["Iron Condor SPY 2024-02-01"][1] == 5
+
+        resp = await ac.post(f"/api/v1/tastytrade/accounts/{account_id}/transactions/tag-trades", headers=headers)
+        assert resp.status_code == 200, resp.text
+        assert resp.json() == {"transactions": 0, "groups_created": 0, "links_created": 0, "open_trades": 1, "rebuilt": False}
+
+        resp = await ac.post(f"/api/v1/tastytrade/accounts/{account_id}/transactions/tag-trades?rebuild=true", headers=headers)
+        assert resp.json() == {"transactions": 9, "groups_created": 3, "links_created": 9, "open_trades": 1, "rebuilt": True}
+        rebuilt = await trade_groups(account_id)
+        assert {name: links for name, (_, links) in rebuilt.items()} == {
+            name: links for name, (_, links) in second.items()
+        }
+
+@pytest.mark.asyncio
+async def test_trade_strategy_uses_legs_filled_moments_apart():
+    spread = [
+        broker_txn(10, 30, "SPY   240315P00480000", "Sell to Open", 1, 300.0, "SPY", "Equity Option"),
+        broker_txn(11, 30, "SPY   240315P00470000", "Buy to Open", 1, -150.0, "SPY", "Equity Option"),
+        # Well after the opening order: an adjustment, not part of the structure.
+        broker_txn(12, 30, "SPY   240315P00460000", "Buy to Open", 1, -50.0, "SPY", "Equity Option"),
+    ]
+    # The two legs of the spread order fill a couple of seconds apart.
+    spread[1].executed_at += timedelta(seconds=2)
+    spread[2].executed_at += timedelta(hours=2)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        _, account_id = await setup_synced_account(ac, "tagwindow", FakeTradingAccount(extra=spread))
+        groups = await trade_groups(account_id)
+    assert groups["Vertical Spread SPY 2024-02-01"][1] == 3
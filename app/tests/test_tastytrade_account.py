@@ -7,6 +7,7 @@ import os
 from dotenv import load_dotenv
 from unittest.mock import patch
 from app.api.v1.endpoints import tastytrade as tastytrade_module
+from app.tests.utils import wait_for_sync_job
 
 # Helper to generate unique emails/usernames
 
@@ -55,9 +56,11 @@ async def test_tastytrade_account_crud():
         assert len(accounts) == 1
         assert accounts[0]["id"] == account_id
 
-        # Sync TastyTrade account (should fail with 401 or 500 due to fake credentials)
+        # Sync TastyTrade account (job should fail due to fake credentials)
         resp = await ac.post(f"/api/v1/tastytrade/accounts/sync/{account_id}", headers=headers)
-        assert resp.status_code in (401, 500)
+        assert resp.status_code == 202, resp.text
+        job = await wait_for_sync_job(ac, headers, resp.json()["id"])
+        assert job["status"] == "failed"
 
         # Try to retrieve balances (should be empty or error due to failed sync)
         resp = await ac.get(f"/api/v1/tastytrade/accounts/{account_id}/balances", headers=headers)
@@ -200,6 +203,8 @@ async def test_tastytrade_real_sync_and_data():
         # Sync
         resp = await ac.post(f"/api/v1/tastytrade/accounts/sync/{account_id}", headers=headers)
         assert resp.status_code == 202, resp.text
+        job = await wait_for_sync_job(ac, headers, resp.json()["id"])
+        assert job["status"] == "completed", job
 
         # Retrieve balances
         resp = await ac.get(f"/api/v1/tastytrade/accounts/{account_id}/balances", headers=headers)
@@ -258,6 +263,8 @@ async def test_tastytrade_empty_data():
         # Sync
         resp = await ac.post(f"/api/v1/tastytrade/accounts/sync/{account_id}", headers=headers)
         assert resp.status_code == 202, resp.text
+        job = await wait_for_sync_job(ac, headers, resp.json()["id"])
+        assert job["status"] == "completed", job
         # Retrieve balances
         resp = await ac.get(f"/api/v1/tastytrade/accounts/{account_id}/balances", headers=headers)
         assert resp.status_code == 200, resp.text
@@ -308,6 +315,8 @@ async def test_tastytrade_pagination():
         # Sync
         resp = await ac.post(f"/api/v1/tastytrade/accounts/sync/{account_id}", headers=headers)
         assert resp.status_code == 202, resp.text
+        job = await wait_for_sync_job(ac, headers, resp.json()["id"])
+        assert job["status"] == "completed", job
         # Retrieve positions with pagination
         resp = await ac.get(f"/api/v1/tastytrade/accounts/{account_id}/positions?limit=1&offset=0", headers=headers)
         assert resp.status_code == 200, resp.text
@@ -359,6 +368,8 @@ async def test_tastytrade_unusual_symbols():
         # Sync
         resp = await ac.post(f"/api/v1/tastytrade/accounts/sync/{account_id}", headers=headers)
         assert resp.status_code == 202, resp.text
+        job = await wait_for_sync_job(ac, headers, resp.json()["id"])
+        assert job["status"] == "completed", job
         # Retrieve positions
         resp = await ac.get(f"/api/v1/tastytrade/accounts/{account_id}/positions", headers=headers)
         assert resp.status_code == 200, resp.text
@@ -464,9 +475,11 @@ async def test_tastytrade_invalid_credentials():
         }, headers=headers)
         assert resp.status_code == 201, resp.text
         account_id = resp.json()["id"]
-        # Sync (should fail)
+        # Sync (job should fail)
         resp = await ac.post(f"/api/v1/tastytrade/accounts/sync/{account_id}", headers=headers)
-        assert resp.status_code in (401, 500), resp.text
+        assert resp.status_code == 202, resp.text
+        job = await wait_for_sync_job(ac, headers, resp.json()["id"])
+        assert job["status"] == "failed", job
         # Clean up
         await ac.delete(f"/api/v1/tastytrade/accounts/{account_id}", headers=headers)
 
@@ -506,7 +519,10 @@ async def test_tastytrade_api_downtime():
         # Patch tastytrade.Session to raise an exception
         with patch.object(tastytrade_module.tastytrade, "Session", side_effect=Exception("Simulated downtime")):
             resp = await ac.post(f"/api/v1/tastytrade/accounts/sync/{account_id}", headers=headers)
-            assert resp.status_code == 500, resp.text
+            assert resp.status_code == 202, resp.text
+            job = await wait_for_sync_job(ac, headers, resp.json()["id"])
+            assert job["status"] == "failed", job
+            assert "Simulated downtime" in job["error"]
         # Clean up
         await ac.delete(f"/api/v1/tastytrade/accounts/{account_id}", headers=headers)
 
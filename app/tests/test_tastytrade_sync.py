@@ -0,0 +1,540 @@
+import asyncio
+import pytest
+from httpx import AsyncClient, ASGITransport
+from app.main import app
+import json
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.api.v1.endpoints import tastytrade as tastytrade_module
+from app.tests.utils import broker_position, unique_email, wait_for_sync_job
+from app.core.encryption import encrypt
+from app.services.sync_service import position_row, transaction_row
+from app.services.tastytrade_service import TastytradeSessionPool
+
+class FakeTastyAccount:
+    """Stands in for tastytrade.Account with canned balances, positions and history."""
+
+    def __init__(self, account_number="5WT00001", n_transactions=3):
+        self.account_number = account_number
+        self.n_transactions = n_transactions
+        self.history_requests = []
+
+    async def a_get_balances(self, session):
+        return SimpleNamespace(cash=1000.0, long_equity_value=500.0, short_equity_value=0.0, net_liquidating_value=1500.0)
+
+    async def a_get_positions(self, session, **kwargs):
+        return [
+            broker_position("AAPL", 10, "Long", 150.0, 160.0, multiplier=1),
+            broker_position("SPY", 5, "Long", 400.0, 420.0, multiplier=1),
+        ]
+
+    async def a_get_history(self, session, **kwargs):
+        self.history_requests.append(kwargs)
+        return [
+            SimpleNamespace(
+                id=int(self.account_number[-5:]) * 1000 + i,
+                transaction_type="Trade",
+                symbol="AAPL",
+                quantity=1,
+                price=150.0 + i,
+                amount=-150.0 - i,
+                date=datetime(2024, 1, 2 + i, 15, 30, tzinfo=timezone.utc),
+            )
+            for i in range(self.n_transactions)
+        ]
+
+async def register_and_login(ac, prefix):
+    email = unique_email(prefix)
+    resp = await ac.post("/api/v1/auth/register-user", json={
+        "email": email,
+        "password": "SyncTestPassword123!",
+        "role": "user"
+    })
+    assert resp.status_code == 201, resp.text
+    resp = await ac.post("/api/v1/auth/login", json={
+        "email": email,
+        "password": "SyncTestPassword123!"
+    })
+    assert resp.status_code == 200, resp.text
+    return {"Authorization": f"Bearer {resp.json()['access_token']}"}
+
+@pytest.mark.asyncio
+async def test_sync_bulk_upsert_is_idempotent():
+    """Repeated syncs of the same history update rows in place instead of duplicating them."""
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        headers = await register_and_login(ac, "bulksync")
+        resp = await ac.post("/api/v1/tastytrade/accounts/", json={
+            "tasty_username": "bulkuser",
+            "tasty_password": "bulkpass"
+        }, headers=headers)
+        assert resp.status_code == 201, resp.text
+        account_id = resp.json()["id"]
+
+        async def fake_accounts(session):
+            return [FakeTastyAccount()]
+
+        with patch.object(tastytrade_module.tastytrade, "Session"), \
+                patch.object(tastytrade_module.tastytrade.Account, "a_get", side_effect=fake_accounts):
+            for _ in range(2):
+                resp = await ac.post(f"/api/v1/tastytrade/accounts/sync/{account_id}", headers=headers)
+                assert resp.status_code == 202, resp.text
+                job = await wait_for_sync_job(ac, headers, resp.json()["id"])
+                assert job["status"] == "completed", job
+                assert job["transactions_written"] == 3
+                assert job["positions_written"] == 2
+
+        resp = await ac.get(f"/api/v1/tastytrade/accounts/{account_id}/transactions", headers=headers)
+        assert resp.status_code == 200, resp.text
+        assert len(resp.json()) == 3
+        resp = await ac.get(f"/api/v1/tastytrade/accounts/{account_id}/balances", headers=headers)
+        assert len(resp.json()) == 2
+        resp = await ac.get(f"/api/v1/tastytrade/accounts/{account_id}/positions", headers=headers)
+        positions = {p["symbol"]: (p["average_price"], p["market_value"]) for p in resp.json()}
+        assert positions == {"AAPL": (150.0, 1600.0), "SPY": (400.0, 2100.0)}
+
+        await ac.delete(f"/api/v1/tastytrade/accounts/{account_id}", headers=headers)
+
+def test_position_row_values_legs_from_their_marks():
+    synced_at = datetime(2024, 1, 2, tzinfo=timezone.utc)
+    short_call = broker_position("AAPL  240119C00200000", 2, "Short", 3.0, 2.5)
+    row = position_row("5WT00077", short_call, synced_at)
+    assert (row["quantity"], row["average_price"], row["market_value"]) == (-2, 3.0, -500.0)
+    # Without a mark_price the total mark is used, then the last close.
+    short_call.mark_price = None
+    short_call.mark = 480.0
+    assert position_row("5WT00077", short_call, synced_at)["market_value"] == -480.0
+    short_call.mark = None
+    assert position_row("5WT00077", short_call, synced_at)["market_value"] == -600.0
+
+def test_transaction_row_keeps_fractional_quantities():
+    from decimal import Decimal
+    from app.tests.utils import broker_txn
+    txn = broker_txn(1, 0, "AAPL", "Buy", Decimal("0.5"), -95.0, "AAPL")
+    assert transaction_row("5WT00077", txn, datetime(2024, 1, 2, tzinfo=timezone.utc))["quantity"] == 0.5
+
+@pytest.mark.asyncio
+async def test_sync_fetches_history_from_the_newest_stored_transaction():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        headers = await register_and_login(ac, "watermark")
+        resp = await ac.post("/api/v1/tastytrade/accounts/", json={
+            "tasty_username": "watermarkuser",
+            "tasty_password": "watermarkpass"
+        }, headers=headers)
+        account_id = resp.json()["id"]
+        accounts = [FakeTastyAccount("5WT00001", 3), FakeTastyAccount("5WT00002", 0)]
+
+        async def fake_accounts(session):
+            return accounts
+
+        with patch.object(tastytrade_module.tastytrade, "Session"), \
+                patch.object(tastytrade_module.tastytrade.Account, "a_get", side_effect=fake_accounts):
+            for _ in range(2):
+                resp = await ac.post(f"/api/v1/tastytrade/accounts/sync/{account_id}", headers=headers)
+                job = await wait_for_sync_job(ac, headers, resp.json()["id"])
+                assert job["status"] == "completed", job
+
+        # The first sync fetches everything; the next starts a lookback window
+        # before the newest stored row (2024-01-04), per sub-account.
+        synced, empty = accounts
+        assert [r["start_date"] for r in synced.history_requests] == [None, date(2023, 12, 30)]
+        assert [r["start_date"] for r in empty.history_requests] == [None, None]
+
+        await ac.delete(f"/api/v1/tastytrade/accounts/{account_id}", headers=headers)
+
+@pytest.mark.asyncio
+async def test_sync_jobs_for_one_account_do_not_overlap():
+    from sqlalchemy import update
+    from app.db.session import async_session_maker
+    from app.db.models.sync_job import SyncJob
+    from app.crud.crud_sync_job import claim_next_sync_job, create_sync_job
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        headers = await register_and_login(ac, "jobqueue")
+        resp = await ac.post("/api/v1/tastytrade/accounts/", json={
+            "tasty_username": "jobqueueuser",
+            "tasty_password": "jobqueuepass"
+        }, headers=headers)
+        account_id = uuid.UUID(resp.json()["id"])
+        user_id = uuid.UUID((await ac.get("/api/v1/auth/me", headers=headers)).json()["id"])
+
+        async def make_oldest(job_id):
+            # Ahead of anything else in the shared queue.
+            await db.execute(update(SyncJob).where(SyncJob.id == job_id).values(
+                created_at=datetime(1970, 1, 1, tzinfo=timezone.utc)
+            ))
+            await db.commit()
+
+        async with async_session_maker() as db:
+            first = await create_sync_job(db, user_id, account_id)
+            # Asking again while the job waits returns the same job.
+            assert (await create_sync_job(db, user_id, account_id)).id == first.id
+            await make_oldest(first.id)
+            claimed = await claim_next_sync_job(db)
+            assert claimed.id == first.id
+
+            # Once it runs, a new request queues behind it but is not claimed alongside.
+            second = await create_sync_job(db, user_id, account_id)
+            assert second.id != first.id
+            await make_oldest(second.id)
+            other = await claim_next_sync_job(db)
+            assert other is None or other.account_id != account_id
+
+        await ac.delete(f"/api/v1/tastytrade/accounts/{account_id}", headers=headers)
+
+@pytest.mark.asyncio
+async def test_stale_sync_jobs_are_requeued_until_attempts_run_out():
+    from sqlalchemy import update
+    from app.db.session import async_session_maker
+    from app.db.models.sync_job import SyncJob
+    from app.crud.crud_sync_job import create_sync_job, get_sync_job, requeue_stale_sync_jobs, touch_sync_job
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        headers = await register_and_login(ac, "jobsweep")
+        resp = await ac.post("/api/v1/tastytrade/accounts/", json={
+            "tasty_username": "jobsweepuser",
+            "tasty_password": "jobsweeppass"
+        }, headers=headers)
+        account_id = uuid.UUID(resp.json()["id"])
+        user_id = uuid.UUID((await ac.get("/api/v1/auth/me", headers=headers)).json()["id"])
+        long_ago = datetime.now(timezone.utc) - timedelta(hours=1)
+
+        async with async_session_maker() as db:
+            job_id = (await create_sync_job(db, user_id, account_id)).id
+
+            async def run_silently(attempts, heartbeat=False):
+                await db.execute(update(SyncJob).where(SyncJob.id == job_id).values(
+                    status="running", attempts=attempts, updated_at=long_ago
+                ))
+                await db.commit()
+                if heartbeat:
+                    await touch_sync_job(db, job_id)
+                await requeue_stale_sync_jobs(db, timedelta(minutes=5), max_attempts=3)
+                db.expire_all()
+                return await get_sync_job(db, job_id)
+
+            # A worker still heartbeating keeps its job however long the write takes.
+            assert (await run_silently(1, heartbeat=True)).status == "running"
+            assert (await run_silently(1)).status == "queued"
+            job = await run_silently(3)
+            assert job.status == "failed"
+            assert job.error == "Sync abandoned after 3 attempts"
+
+        await ac.delete(f"/api/v1/tastytrade/accounts/{account_id}", headers=headers)
+
+@pytest.mark.asyncio
+async def test_sync_after_broker_id_migration_adopts_legacy_rows():
+    from sqlalchemy import insert, select
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from app.db.models.user import User
+    from app.db.models.tastytrade_account import TastyTradeAccount
+    from app.db.models.tastytrade_transaction import TastyTradeTransaction
+    from app.services.sync_service import AccountSnapshot, history_start_date, write_sync_batch
+    from app.tests.utils import broker_txn, run_migration, scratch_engine
+
+    user_id, account_id = uuid.uuid4(), uuid.uuid4()
+    txns = TastyTradeTransaction.__table__
+
+    def legacy(symbol, day, quantity, amount, account_number="5WT00077"):
+        return {
+            "id": uuid.uuid4(), "account_id": account_id, "user_id": user_id, "account_number": account_number,
+            "transaction_type": "Trade", "symbol": symbol, "quantity": quantity, "amount": amount,
+            "date": datetime(2024, 1, 2, tzinfo=timezone.utc) + timedelta(days=day),
+        }
+
+    async with scratch_engine("legacy") as scratch:
+        async with scratch.begin() as conn:
+            # Step back to the schema without broker ids and fill it as syncs did then.
+            await conn.run_sync(run_migration, "b72e5a9d4c13_add_broker_transaction_id.py", "downgrade")
+            await conn.execute(insert(User.__table__).values(id=user_id, email="legacy@example.com", hashed_password="x"))
+            await conn.execute(insert(TastyTradeAccount.__table__).values(
+                id=account_id, user_id=user_id, tasty_username="legacy", tasty_password_encrypted="x"
+            ))
+            rows = [
+                legacy("AAPL", 0, 10, -1501.0),
+                # Two fills at one timestamp were merged into the last one written.
+                legacy("AAPL", 5, 6, 959.0),
+                # Synced before sub-accounts were told apart.
+                legacy("SPY", 8, 1, 199.0, account_number=None),
+            ]
+            await conn.execute(insert(txns).values(rows))
+            await conn.run_sync(run_migration, "b72e5a9d4c13_add_broker_transaction_id.py", "upgrade")
+
+        history = [
+            broker_txn(1, 0, "AAPL", "Buy to Open", 10, -1500.0, "AAPL"),
+            broker_txn(2, 5, "AAPL", "Sell to Close", 4, 640.0, "AAPL"),
+            broker_txn(3, 5, "AAPL", "Sell to Close", 6, 960.0, "AAPL"),
+            broker_txn(4, 8, "SPY", "Buy to Open", 1, 200.0, "SPY"),
+            broker_txn(5, 9, "SPY", "Sell to Close", 1, 210.0, "SPY"),
+        ]
+        async with AsyncSession(scratch, expire_on_commit=False) as db:
+            # Placeholder rows do not count as synced, so the whole history is fetched.
+            assert await history_start_date(db, account_id, "5WT00077") is None
+            snapshot = AccountSnapshot("5WT00077", SimpleNamespace(net_liquidating_value=1000.0), [], history)
+            for _ in range(2):
+                await write_sync_batch(db, account_id, user_id, [snapshot])
+
+            stored = {r.id: r.transaction_id for r in (await db.execute(select(txns.c.id, txns.c.transaction_id))).all()}
+            assert sorted(stored.values()) == ["770001", "770002", "770003", "770004", "770005"]
+            assert [stored[r["id"]] for r in rows] == ["770001", "770003", "770004"]
+            assert await history_start_date(db, account_id, "5WT00077") is not None
+
+@pytest.mark.asyncio
+async def test_sync_reuses_tastytrade_session():
+    """A second sync of the same account reuses the pooled session instead of logging in again."""
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        headers = await register_and_login(ac, "sessionpool")
+        resp = await ac.post("/api/v1/tastytrade/accounts/", json={
+            "tasty_username": "pooluser",
+            "tasty_password": "poolpass"
+        }, headers=headers)
+        account_id = resp.json()["id"]
+
+        async def fake_accounts(session):
+            return [FakeTastyAccount()]
+
+        with patch.object(tastytrade_module.tastytrade, "Session") as session_cls, \
+                patch.object(tastytrade_module.tastytrade.Account, "a_get", side_effect=fake_accounts):
+            for _ in range(2):
+                resp = await ac.post(f"/api/v1/tastytrade/accounts/sync/{account_id}", headers=headers)
+                job = await wait_for_sync_job(ac, headers, resp.json()["id"])
+                assert job["status"] == "completed", job
+            assert session_cls.call_count == 1
+
+        await ac.delete(f"/api/v1/tastytrade/accounts/{account_id}", headers=headers)
+
+@pytest.mark.asyncio
+async def test_session_pool_renews_expired_session_with_remember_token():
+    pool = TastytradeSessionPool(idle_ttl=900, expiry_margin=timedelta(seconds=60))
+    account = SimpleNamespace(id=uuid.uuid4(), tasty_username="pooluser", tasty_password_encrypted=encrypt("poolpass"))
+    logins = []
+
+    def fake_session(login, password=None, remember_me=False, remember_token=None):
+        logins.append({"password": password, "remember_token": remember_token})
+        return SimpleNamespace(
+            remember_token=f"token-{len(logins)}",
+            session_expiration=datetime.now(timezone.utc) + timedelta(seconds=30 if len(logins) == 1 else 3600),
+        )
+
+    with patch.object(tastytrade_module.tastytrade, "Session", side_effect=fake_session):
+        first = await pool.get(account)
+        # The first session is inside the expiry margin, so it is renewed.
+        second = await pool.get(account)
+        third = await pool.get(account)
+
+    assert first is not second and second is third
+    assert logins == [
+        {"password": "poolpass", "remember_token": None},
+        {"password": None, "remember_token": "token-1"},
+    ]
+
+@pytest.mark.asyncio
+async def test_session_pool_logs_out_dropped_sessions():
+    pool = TastytradeSessionPool(idle_ttl=900, expiry_margin=timedelta(seconds=60))
+    accounts = [
+        SimpleNamespace(id=uuid.uuid4(), tasty_username=f"pooluser{i}", tasty_password_encrypted=encrypt("poolpass"))
+        for i in range(3)
+    ]
+
+    def fake_session(login, password=None, remember_me=False, remember_token=None):
+        return SimpleNamespace(remember_token=None, session_expiration=None, a_destroy=AsyncMock(), destroy=MagicMock())
+
+    async def settle():
+        await asyncio.gather(*pool._closing)
+
+    with patch.object(tastytrade_module.tastytrade, "Session", side_effect=fake_session):
+        invalidated = await pool.get(accounts[0])
+        pool.invalidate(accounts[0].id)
+        await settle()
+        invalidated.a_destroy.assert_awaited_once()
+
+        idle = await pool.get(accounts[1])
+        pool._entries[accounts[1].id].last_used -= 1000
+        rebound = await pool.get(accounts[2])
+        await settle()
+        idle.a_destroy.assert_awaited_once()
+        assert len(pool) == 1
+
+        # Sessions created on another event loop are logged out with the blocking client.
+        pool._loop = None
+        await pool.get(accounts[0])
+        await asyncio.sleep(0.1)
+        rebound.destroy.assert_called_once()
+        rebound.a_destroy.assert_not_awaited()
+
+@pytest.mark.asyncio
+async def test_sync_includes_all_sub_accounts():
+    """Every broker account under the login is synced, keyed by its account number."""
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        headers = await register_and_login(ac, "subaccounts")
+        resp = await ac.post("/api/v1/tastytrade/accounts/", json={
+            "tasty_username": "multiuser",
+            "tasty_password": "multipass"
+        }, headers=headers)
+        account_id = resp.json()["id"]
+
+        async def fake_accounts(session):
+            return [FakeTastyAccount("5WT00001", 3), FakeTastyAccount("5WT00002", 2)]
+
+        with patch.object(tastytrade_module.tastytrade, "Session"), \
+                patch.object(tastytrade_module.tastytrade.Account, "a_get", side_effect=fake_accounts):
+            resp = await ac.post(f"/api/v1/tastytrade/accounts/sync/{account_id}", headers=headers)
+            job = await wait_for_sync_job(ac, headers, resp.json()["id"])
+        assert job["status"] == "completed", job
+        assert job["balances_written"] == 2
+        assert job["positions_written"] == 4
+        assert job["transactions_written"] == 5
+
+        resp = await ac.get(f"/api/v1/tastytrade/accounts/{account_id}/transactions", headers=headers)
+        numbers = [t["account_number"] for t in resp.json()]
+        assert sorted(numbers) == ["5WT00001"] * 3 + ["5WT00002"] * 2
+
+        await ac.delete(f"/api/v1/tastytrade/accounts/{account_id}", headers=headers)
+
+@pytest.mark.asyncio
+async def test_transactions_keyset_pagination():
+    """Walking X-Next-Cursor visits every row exactly once, even when created_at ties."""
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        headers = await register_and_login(ac, "keyset")
+        resp = await ac.post("/api/v1/tastytrade/accounts/", json={
+            "tasty_username": "keysetuser",
+            "tasty_password": "keysetpass"
+        }, headers=headers)
+        account_id = resp.json()["id"]
+
+        async def fake_accounts(session):
+            return [FakeTastyAccount(n_transactions=7)]
+
+        with patch.object(tastytrade_module.tastytrade, "Session"), \
+                patch.object(tastytrade_module.tastytrade.Account, "a_get", side_effect=fake_accounts):
+            resp = await ac.post(f"/api/v1/tastytrade/accounts/sync/{account_id}", headers=headers)
+            await wait_for_sync_job(ac, headers, resp.json()["id"])
+
+        seen = []
+        url = f"/api/v1/tastytrade/accounts/{account_id}/transactions?limit=3"
+        resp = await ac.get(url, headers=headers)
+        assert resp.headers["X-Total-Count"] == "7"
+        while True:
+            assert resp.status_code == 200, resp.text
+            seen.extend(t["id"] for t in resp.json())
+            cursor = resp.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+            resp = await ac.get(f"{url}&count=none&cursor={cursor}", headers=headers)
+            assert "X-Total-Count" not in resp.headers
+        assert len(seen) == len(set(seen)) == 7
+
+        resp = await ac.get(f"{url}&count=estimated", headers=headers)
+        assert resp.headers["X-Total-Count-Estimated"] == "true"
+        assert int(resp.headers["X-Total-Count"]) >= 0
+
+        resp = await ac.get(f"{url}&cursor=not-a-cursor", headers=headers)
+        assert resp.status_code == 400
+
+        await ac.delete(f"/api/v1/tastytrade/accounts/{account_id}", headers=headers)
+
+@pytest.mark.asyncio
+async def test_transactions_export_streams_filtered_rows():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        headers = await register_and_login(ac, "export")
+        resp = await ac.post("/api/v1/tastytrade/accounts/", json={
+            "tasty_username": "exportuser",
+            "tasty_password": "exportpass"
+        }, headers=headers)
+        account_id = resp.json()["id"]
+
+        async def fake_accounts(session):
+            return [FakeTastyAccount(n_transactions=5)]
+
+        with patch.object(tastytrade_module.tastytrade, "Session"), \
+                patch.object(tastytrade_module.tastytrade.Account, "a_get", side_effect=fake_accounts):
+            resp = await ac.post(f"/api/v1/tastytrade/accounts/sync/{account_id}", headers=headers)
+            await wait_for_sync_job(ac, headers, resp.json()["id"])
+
+        url = f"/api/v1/tastytrade/accounts/{account_id}/transactions/export"
+        resp = await ac.get(url, headers=headers)
+        assert resp.status_code == 200, resp.text
+        assert resp.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in resp.text.splitlines()]
+        assert [r["price"] for r in rows] == [150.0, 151.0, 152.0, 153.0, 154.0]
+
+        resp = await ac.get(url, params={
+            "format": "csv", "start": "2024-01-03T00:00:00Z", "end": "2024-01-05T00:00:00Z", "symbol": "AAPL"
+        }, headers=headers)
+        assert resp.status_code == 200, resp.text
+        lines = resp.text.strip().splitlines()
+        assert lines[0].startswith("id,account_number,transaction_id")
+        assert len(lines) == 3
+
+        await ac.delete(f"/api/v1/tastytrade/accounts/{account_id}", headers=headers)
+
+def test_balance_series_downsamples_to_fixed_points():
+    import numpy as np
+    from app.services.balance_history import BalanceSeries
+
+    ts = np.arange(0, 1000, 1.0)
+    values = np.arange(1000, 2000, 1.0)
+    series = BalanceSeries(ts, values, values, values, values)
+    down = series.downsample(0, 1000, 10)
+    assert len(down) == 10
+    assert down.open[0] == 1000 and down.close[0] == 1099
+    assert down.high[9] == 1999 and down.low[9] == 1900
+
+    # Sparse data: gaps repeat the previous close
+    sparse = BalanceSeries(np.array([5.0, 95.0]), np.array([1.0, 3.0]), np.array([2.0, 3.0]),
+                           np.array([0.5, 3.0]), np.array([1.5, 3.0]))
+    down = sparse.downsample(0, 100, 5)
+    assert down.close.tolist() == [1.5, 1.5, 1.5, 1.5, 3.0]
+    assert down.high.tolist() == [2.0, 1.5, 1.5, 1.5, 3.0]
+
+@pytest.mark.asyncio
+async def test_balance_history_rolls_up_old_snapshots():
+    from sqlalchemy import select
+    from app.db.session import async_session_maker
+    from app.db.models.tastytrade_balance import TastyTradeBalance
+    from app.db.models.balance_history import BalanceDailyOhlc
+    from app.services.balance_history import apply_balance_retention
+
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        headers = await register_and_login(ac, "balhist")
+        resp = await ac.post("/api/v1/tastytrade/accounts/", json={
+            "tasty_username": "balhistuser",
+            "tasty_password": "balhistpass"
+        }, headers=headers)
+        account_id = uuid.UUID(resp.json()["id"])
+        me = (await ac.get("/api/v1/auth/me", headers=headers)).json()
+
+        old_day = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=90)
+        async with async_session_maker() as db:
+            for hour, nlv in [(14, 1000.0), (16, 1200.0), (18, 900.0), (20, 1100.0)]:
+                db.add(TastyTradeBalance(account_id=account_id, user_id=uuid.UUID(me["id"]), account_number="5WT1",
+                                         net_liquidating_value=nlv, created_at=old_day + timedelta(hours=hour)))
+            db.add(TastyTradeBalance(account_id=account_id, user_id=uuid.UUID(me["id"]), account_number="5WT1",
+                                     net_liquidating_value=1500.0, created_at=datetime.now(timezone.utc)))
+            await db.commit()
+            assert await apply_balance_retention(db, account_id) == 4
+            await db.commit()
+            ohlc = (await db.execute(select(BalanceDailyOhlc).where(BalanceDailyOhlc.account_id == account_id))).scalars().one()
+            assert (ohlc.open, ohlc.high, ohlc.low, ohlc.close, ohlc.samples) == (1000.0, 1200.0, 900.0, 1100.0, 4)
+            remaining = (await db.execute(select(TastyTradeBalance).where(TastyTradeBalance.account_id == account_id))).scalars().all()
+            assert [b.net_liquidating_value for b in remaining] == [1500.0]
+
+        resp = await ac.get(f"/api/v1/tastytrade/accounts/{account_id}/balances/history",
+                            params={"points": 50}, headers=headers)
+        assert resp.status_code == 200, resp.text
+        points = resp.json()
+        assert len(points) == 50
+        assert (points[0]["open"], points[0]["high"], points[0]["low"]) == (1000.0, 1200.0, 900.0)
+        assert points[-1]["close"] == 1500.0
+
+        await ac.delete(f"/api/v1/tastytrade/accounts/{account_id}", headers=headers)
@@ -0,0 +1,153 @@
+import importlib
+import uuid
+import numpy as np
+import pytest
+from datetime import timedelta
+from unittest.mock import patch
+from httpx import AsyncClient, ASGITransport
+from sqlalchemy import update
+from app.crud.crud_tastytrade_account import bump_transactions_version
+from app.db.models.tastytrade_transaction import TastyTradeTransaction
+from app.db.session import async_session_maker
+from app.main import app
+from app.services.pnl import TransactionCache, TransactionColumns, TransactionFrame, compute_realized_pnl, transaction_cache
+from app.services.pnl.service import compute_account_pnl
+from app.tests.utils import OPTION, T0, FakeTradingAccount, broker_txn, row, setup_synced_account, sync_fake_account
+
+# The package re-exports the singleton under the module's own name.
+cache_module = importlib.import_module("app.services.pnl.transaction_cache")
+
+HISTORY = [
+    row(0, "AAPL", "Buy to Open", 10, -1000.0, fees=1.0),
+    row(1, OPTION, "Sell to Open", 2, 300.0, fees=2.5, underlying="SPY", instrument="Equity Option"),
+    row(2, "AAPL", "Sell to Close", 10, 1100.0, fees=1.0),
+    row(14, OPTION, None, 2, 0.0, sub_type="Expiration", txn_type="Receive Deliver",
+        underlying="SPY", instrument="Equity Option"),
+    row(20, "TSLA", "Buy", 1, None, price=200.0),
+]
+
+def assert_same_columns(actual, expected):
+    for name, value in vars(expected).items():
+        if isinstance(value, np.ndarray):
+            np.testing.assert_array_equal(getattr(actual, name), value)
+        else:
+            assert getattr(actual, name) == value, name
+
+def test_frame_round_trips_columns():
+    frame = TransactionFrame.from_rows(HISTORY)
+    assert len(frame) == 5 and frame.dated == 5
+    assert_same_columns(frame.columns(), TransactionColumns.from_rows(HISTORY))
+    # Repeated symbols share one vocabulary entry: None plus 13 distinct strings.
+    assert len(frame.vocabulary) == 14
+    assert frame.strings.dtype == np.int32
+    cached = compute_realized_pnl(frame.columns()).summary()
+    assert cached == compute_realized_pnl(TransactionColumns.from_rows(HISTORY)).summary()
+
+def test_frame_slices_by_date():
+    frame = TransactionFrame.from_rows(HISTORY)
+    assert_same_columns(frame.columns(end=T0 + timedelta(days=14)), TransactionColumns.from_rows(HISTORY[:3]))
+    assert_same_columns(
+        frame.columns(T0 + timedelta(days=1), T0 + timedelta(days=15)), TransactionColumns.from_rows(HISTORY[1:4])
+    )
+    assert len(frame.columns(T0 + timedelta(days=30))) == 0
+
+def test_replace_from_splices_changed_rows():
+    frame = TransactionFrame.from_rows(HISTORY[:4])
+    changed = [
+        row(14, OPTION, None, 2, 0.0, sub_type="Expiration", txn_type="Receive Deliver",
+            underlying="SPY", instrument="Equity Option"),
+        row(15, "MSFT", "Buy to Open", 5, -2000.0),
+        row(16, "MSFT", "Sell to Close", 5, 2100.0),
+    ]
+    updated = frame.replace_from((T0 + timedelta(days=14)).timestamp(), changed)
+    assert_same_columns(updated.columns(), TransactionColumns.from_rows(HISTORY[:3] + changed))
+    # The original frame is untouched for readers still holding it.
+    assert len(frame) == 4
+    assert compute_realized_pnl(updated.columns()).summary()["realized_pnl"] == pytest.approx(100.0 + 300.0 + 100.0)
+
+def test_cache_evicts_least_recently_used():
+    frames = {uuid.uuid4(): TransactionFrame.from_rows(HISTORY) for _ in range(3)}
+    first, second, third = frames
+    size = frames[first].nbytes
+    cache = TransactionCache(max_bytes=2 * size)
+    cache._store(first, frames[first], 1)
+    cache._store(second, frames[second], 1)
+    cache._entries.move_to_end(first)
+    cache._store(third, frames[third], 1)
+    assert first in cache and third in cache and second not in cache
+    assert cache.nbytes == 2 * size
+
+    small = TransactionCache(max_bytes=size - 1)
+    small._store(first, frames[first], 1)
+    assert len(small) == 0 and small.nbytes == 0
+
+async def cached_pnl(account_id):
+    async with async_session_maker() as db:
+        return await compute_account_pnl(db, account_id)
+
+@pytest.mark.asyncio
+async def test_sync_updates_cached_history_incrementally():
+    extra = [
+        broker_txn(20, 40, "MSFT", "Buy to Open", 5, -2000.0, "MSFT"),
+        broker_txn(21, 41, "MSFT", "Sell to Close", 5, 2100.0, "MSFT"),
+    ]
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        headers, account_id = await setup_synced_account(ac, "txncache", FakeTradingAccount())
+        account_id = uuid.UUID(account_id)
+        # Materialising the first sync's snapshots loaded the history.
+        assert account_id in transaction_cache
+        result = await cached_pnl(account_id)
+        assert result.summary()["realized_pnl"] == pytest.approx(300.0)
+
+        # The next sync re-reads only rows from the earliest change, splices them
+        # in for the snapshot rebuild and publishes the frame once committed.
+        calls = []
+        original = cache_module.get_transaction_columns
+        async def spy(db, account, columns, **kwargs):
+            calls.append(kwargs)
+            return await original(db, account, columns, **kwargs)
+        with patch.object(cache_module, "get_transaction_columns", spy):
+            await sync_fake_account(ac, headers, account_id, FakeTradingAccount(extra))
+            result = await cached_pnl(account_id)
+        assert [set(kwargs) for kwargs in calls] == [{"start"}]
+        assert result.summary()["realized_pnl"] == pytest.approx(400.0)
+        resp = await ac.get(f"/api/v1/reports/pnl/summary/{account_id}", params={"period": "all_time"}, headers=headers)
+        assert resp.json()["realized_pnl"] == pytest.approx(400.0)
+        transaction_cache.invalidate(account_id)
+
+@pytest.mark.asyncio
+async def test_cache_reloads_after_another_worker_syncs():
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        headers, account_id = await setup_synced_account(ac, "txnstale", FakeTradingAccount())
+        account_id = uuid.UUID(account_id)
+        assert (await cached_pnl(account_id)).summary()["realized_pnl"] == pytest.approx(300.0)
+
+        # Another process commits a sync: the rows change and the version moves on.
+        async with async_session_maker() as db:
+            await db.execute(
+                update(TastyTradeTransaction)
+                .where(TastyTradeTransaction.account_id == account_id, TastyTradeTransaction.action == "Sell to Close")
+                .values(value=1700.0, amount=1699.0)
+            )
+            await bump_transactions_version(db, account_id)
+            await db.commit()
+        assert (await cached_pnl(account_id)).summary()["realized_pnl"] == pytest.approx(400.0)
+
+        # A sync here after one elsewhere cannot splice into the stale frame, so it reloads.
+        async with async_session_maker() as db:
+            await bump_transactions_version(db, account_id)
+            await db.commit()
+        calls = []
+        original = cache_module.get_transaction_columns
+        async def spy(db, account, columns, **kwargs):
+            calls.append(kwargs)
+            return await original(db, account, columns, **kwargs)
+        extra = [broker_txn(20, 40, "MSFT", "Buy to Open", 5, -2000.0, "MSFT")]
+        with patch.object(cache_module, "get_transaction_columns", spy):
+            await sync_fake_account(ac, headers, account_id, FakeTradingAccount(extra))
+        assert calls == [{}]
+        async with async_session_maker() as db:
+            assert len(await transaction_cache.get(db, account_id)) == 5
+        transaction_cache.invalidate(account_id)
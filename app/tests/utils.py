@@ -1,6 +1,22 @@
+import asyncio
+import importlib.util
 import uuid
 import random
 import string
+from contextlib import asynccontextmanager
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+from app.api.v1.endpoints import tastytrade as tastytrade_module
+from app.core.config import settings
+from app.db.models.user import Base
+from app.db.session import engine
 
 # Generate a unique email for each test run
 
@@ -37,3 +53,128 @@ async def create_test_transaction(ac, headers, account_id) -> dict:
     )
     assert resp.status_code == 201, resp.text
     return resp.json()
+
+# Poll a background sync job until it finishes
+async def wait_for_sync_job(ac, headers, job_id, timeout: float = 30.0) -> dict:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while True:
+        resp = await ac.get(f"/api/v1/tastytrade/accounts/sync/jobs/{job_id}", headers=headers)
+        assert resp.status_code == 200, resp.text
+        job = resp.json()
+        if job["status"] in ("completed", "failed") or loop.time() > deadline:
+            return job
+        await asyncio.sleep(0.1)
+
+# Every table in a throwaway schema, so a migration can run without touching the shared ones
+@asynccontextmanager
+async def scratch_engine(prefix: str = "scratch"):
+    schema = f"{prefix}_{uuid.uuid4().hex[:8]}"
+    async with engine.begin() as conn:
+        await conn.execute(text(f"CREATE SCHEMA {schema}"))
+    scratch = create_async_engine(
+        settings.database_uri, poolclass=NullPool, connect_args={"server_settings": {"search_path": schema}}
+    )
+    try:
+        async with scratch.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        yield scratch
+    finally:
+        await scratch.dispose()
+        async with engine.begin() as conn:
+            await conn.execute(text(f"DROP SCHEMA {schema} CASCADE"))
+
+# Run one step ("upgrade" or "downgrade") of an alembic revision file on a sync connection
+def run_migration(connection, filename: str, step: str) -> None:
+    path = Path(__file__).resolve().parents[2] / "alembic" / "versions" / filename
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    with Operations.context(MigrationContext.configure(connection)):
+        getattr(module, step)()
+
+# Realized P&L engine rows and fake broker accounts shared by the sync-driven tests
+T0 = datetime(2024, 3, 1, 15, 0, tzinfo=timezone.utc)
+OPTION = "SPY   240315P00500000"
+
+def row(day, symbol, action, quantity, value, fees=0.0, sub_type=None, txn_type="Trade",
+        underlying=None, instrument="Equity", price=None, amount=None, account_number=None):
+    # Column order matches crud_tastytrade_transaction.PNL_COLUMNS
+    return (T0 + timedelta(days=day), symbol, underlying, txn_type, sub_type, action,
+            instrument, quantity, price, value, amount, fees, account_number)
+
+def broker_txn(i, day, symbol, action, qty, value, underlying, instrument="Equity", sub_type=None, txn_type="Trade"):
+    return SimpleNamespace(
+        id=770000 + i, transaction_type=txn_type, transaction_sub_type=sub_type, action=action,
+        symbol=symbol, underlying_symbol=underlying, instrument_type=instrument,
+        quantity=qty, price=None, value=value, net_value=value - 1.0, commission=-1.0,
+        executed_at=datetime(2024, 1, 2, tzinfo=timezone.utc) + timedelta(days=day),
+    )
+
+def broker_position(symbol, quantity, direction, open_price, mark_price, multiplier=100):
+    # The fields CurrentPosition reports when fetched with include_marks.
+    return SimpleNamespace(
+        symbol=symbol, quantity=quantity, quantity_direction=direction, average_open_price=open_price,
+        mark_price=mark_price, mark=mark_price * quantity * multiplier, close_price=open_price, multiplier=multiplier,
+    )
+
+class FakeTradingAccount:
+    account_number = "5WT00077"
+
+    def __init__(self, extra=()):
+        self.extra = list(extra)
+
+    async def a_get_balances(self, session):
+        return SimpleNamespace(
+            cash=1000.0, long_equity_value=0.0, short_equity_value=0.0, net_liquidating_value=1000.0,
+            derivative_buying_power=800.0, equity_buying_power=1600.0, maintenance_requirement=200.0,
+        )
+
+    async def a_get_positions(self, session, **kwargs):
+        return []
+
+    async def a_get_history(self, session, **kwargs):
+        return [
+            broker_txn(1, 0, "AAPL", "Buy to Open", 10, -1500.0, "AAPL"),
+            broker_txn(2, 5, "AAPL", "Sell to Close", 10, 1600.0, "AAPL"),
+            broker_txn(3, 6, OPTION, "Sell to Open", 1, 200.0, "SPY", "Equity Option"),
+            broker_txn(4, 20, OPTION, None, 1, 0.0, "SPY", "Equity Option", "Expiration", "Receive Deliver"),
+            *self.extra,
+        ]
+
+async def setup_synced_account(ac, prefix, tasty_account):
+    email = unique_email(prefix)
+    await ac.post("/api/v1/auth/register-user", json={"email": email, "password": "PnlTestPassword123!", "role": "user"})
+    resp = await ac.post("/api/v1/auth/login", json={"email": email, "password": "PnlTestPassword123!"})
+    headers = {"Authorization": f"Bearer {resp.json()['access_token']}"}
+    resp = await ac.post("/api/v1/tastytrade/accounts/", json={
+        "tasty_username": "pnluser", "tasty_password": "pnlpass"
+    }, headers=headers)
+    account_id = resp.json()["id"]
+    await sync_fake_account(ac, headers, account_id, tasty_account)
+    return headers, account_id
+
+async def sync_fake_account(ac, headers, account_id, tasty_account):
+    async def fake_accounts(session):
+        return [tasty_account]
+
+    with patch.object(tastytrade_module.tastytrade, "Session"), \
+            patch.object(tastytrade_module.tastytrade.Account, "a_get", side_effect=fake_accounts):
+        resp = await ac.post(f"/api/v1/tastytrade/accounts/sync/{account_id}", headers=headers)
+        job = await wait_for_sync_job(ac, headers, resp.json()["id"])
+        assert job["status"] == "completed", job
+
+# Stock, a short call and a long put for the greeks and dashboard tests
+EXPIRY = date(2031, 1, 17)
+
+class GreeksAccount(FakeTradingAccount):
+    def __init__(self, call_value):
+        super().__init__()
+        self.call_value = call_value
+
+    async def a_get_positions(self, session, **kwargs):
+        return [
+            broker_position("AAPL", 200, "Long", 150.0, 190.0, multiplier=1),
+            broker_position("AAPL  310117C00200000", 2, "Short", 20.0, self.call_value),
+            broker_position("SPY   310117P00450000", 1, "Long", 30.0, 40.0),
+        ]
@@ -0,0 +1,27 @@
+-- Schema sync.py relies on. Apply once to the Supabase database, e.g. with
+-- `supabase db push` or the SQL editor; every statement is safe to re-run.
+
+-- Batched inserts upsert with on_conflict=account_number,transaction_id and
+-- ignore duplicates, which PostgREST can only do against a unique index on
+-- exactly those columns. Rows written twice before it existed are collapsed
+-- to one first, or the index cannot be built.
+DELETE FROM transactions t
+USING transactions d
+WHERE t.account_number = d.account_number
+  AND t.transaction_id = d.transaction_id
+  AND t.ctid > d.ctid;
+
+CREATE UNIQUE INDEX IF NOT EXISTS transactions_account_number_transaction_id_key
+    ON transactions (account_number, transaction_id);
+
+-- Serves the newest-transaction lookup used when an account has no cursor yet.
+CREATE INDEX IF NOT EXISTS transactions_account_number_executed_at_idx
+    ON transactions (account_number, executed_at DESC);
+
+-- Per-account watermark for incremental syncs (SYNC_CURSOR_TABLE), upserted
+-- on account_number after each page of history is written.
+CREATE TABLE IF NOT EXISTS sync_cursors (
+    account_number   text PRIMARY KEY,
+    last_executed_at timestamptz,
+    updated_at       timestamptz NOT NULL DEFAULT now()
+);
@@ -1,12 +1,21 @@
-"""Tastytrade transaction synchronization module."""
+"""Tastytrade transaction synchronization module.
 
+Expects the unique index on transactions (account_number, transaction_id)
+and the sync_cursors table from
+supabase/migrations/20261017120000_transaction_sync.sql.
+"""
+
+import argparse
+import asyncio
 import sys
+import time
 from datetime import datetime, timezone, timedelta, date
 from decimal import Decimal
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 from uuid import UUID
 
 from postgrest import AsyncPostgrestClient
+from postgrest.types import ReturnMethod
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from tastytrade import Account, Session
@@ -15,14 +24,64 @@ from config import Config
 
 console = Console()
 
+# Rows per PostgREST insert request; tune down if requests hit payload limits.
+DEFAULT_BATCH_SIZE = 500
+# Attempts per chunk before it is split in half to isolate bad rows.
+BATCH_RETRIES = 2
+TRANSACTION_CONFLICT_COLUMNS = "account_number,transaction_id"
+# Transactions requested per history page.
+HISTORY_PAGE_SIZE = 250
+# Days re-fetched before the watermark to pick up late-posting transactions.
+INCREMENTAL_LOOKBACK_DAYS = 5
+# Per-account watermark: account_number (PK), last_executed_at, updated_at.
+SYNC_CURSOR_TABLE = "sync_cursors"
+# Accounts synced at the same time.
+DEFAULT_CONCURRENCY = 4
+# Global ceiling on Tastytrade API requests across all accounts.
+DEFAULT_REQUESTS_PER_SECOND = 2.0
+
+class RateLimiter:
+    """Token bucket shared by all concurrent account syncs."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None) -> None:
+        """Allow `rate` acquisitions per second with bursts of up to `burst`."""
+        self.rate = rate
+        self.capacity = float(burst or max(1, int(rate)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent."""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
 class TransactionSync:
     """Handles synchronization of Tastytrade transactions to Supabase."""
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        incremental: bool = True,
+        max_concurrency: int = DEFAULT_CONCURRENCY,
+        requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+    ) -> None:
         """Initialize the sync handler."""
         self.session: Optional[Session] = None
         self.postgrest: Optional[AsyncPostgrestClient] = None
         self.config = Config()
+        self.batch_size = max(1, batch_size)
+        self.incremental = incremental
+        self.max_concurrency = max(1, max_concurrency)
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.rate_limiter = RateLimiter(requests_per_second)
 
     async def connect(self) -> None:
         """Connect to both Tastytrade and Supabase."""
@@ -65,121 +124,231 @@ class TransactionSync:
             return datetime.fromisoformat(result.data[0]["executed_at"])
         return None
 
+    @staticmethod
+    def transaction_row(account_number: str, transaction: Any) -> Dict[str, Any]:
+        """Map a Tastytrade transaction to a `transactions` table row."""
+        return {
+            "account_number": account_number,
+            "transaction_id": transaction.id,
+            "transaction_type": getattr(transaction, "transaction_type", None),
+            "transaction_subtype": getattr(transaction, "transaction_sub_type", None),
+            "symbol": transaction.symbol,
+            "instrument_type": transaction.instrument_type,
+            "underlying_symbol": transaction.underlying_symbol,
+            "action": transaction.action,
+            "value": str(transaction.value) if transaction.value else None,
+            "price": str(transaction.price) if transaction.price else None,
+            "quantity": str(transaction.quantity) if transaction.quantity else None,
+            "commission": str(transaction.commission) if hasattr(transaction, "commission") and transaction.commission else None,
+            "regulatory_fees": str(transaction.regulatory_fees) if hasattr(transaction, "regulatory_fees") and transaction.regulatory_fees else None,
+            "clearing_fees": str(transaction.clearing_fees) if hasattr(transaction, "clearing_fees") and transaction.clearing_fees else None,
+            "proprietary_index_option_fees": str(transaction.proprietary_index_option_fees) if hasattr(transaction, "proprietary_index_option_fees") and transaction.proprietary_index_option_fees else None,
+            "other_charge": str(transaction.other_charge) if hasattr(transaction, "other_charge") and transaction.other_charge else None,
+            "multiplier": transaction.multiplier if hasattr(transaction, "multiplier") else None,
+            "executed_at": transaction.executed_at.isoformat() if transaction.executed_at else None,
+            "description": transaction.description
+        }
+
+    async def insert_batch(
+        self, rows: List[Dict[str, Any]], failed: Optional[List[Dict[str, Any]]] = None
+    ) -> int:
+        """Insert a chunk of rows in one request, ignoring already-synced transactions.
+
+        A failing chunk is retried, then split in half so a single bad row
+        only costs its own insert. Returns the number of rows written; rows
+        given up on are appended to `failed`.
+        """
+        if not rows:
+            return 0
+        last_error: Optional[Exception] = None
+        for _ in range(BATCH_RETRIES):
+            try:
+                await self.postgrest.from_("transactions").upsert(
+                    rows,
+                    on_conflict=TRANSACTION_CONFLICT_COLUMNS,
+                    ignore_duplicates=True,
+                    returning=ReturnMethod.minimal,
+                ).execute()
+                return len(rows)
+            except Exception as e:
+                last_error = e
+        if len(rows) == 1:
+            console.print(f"[red]Error inserting transaction {rows[0]['transaction_id']}:[/red] {str(last_error)}")
+            if failed is not None:
+                failed.append(rows[0])
+            return 0
+        middle = len(rows) // 2
+        return await self.insert_batch(rows[:middle], failed) + await self.insert_batch(rows[middle:], failed)
+
+    async def get_sync_cursor(self, account_number: str) -> Optional[datetime]:
+        """Get the persisted sync watermark for an account, if any."""
+        result = await self.postgrest.from_(SYNC_CURSOR_TABLE) \
+            .select("last_executed_at") \
+            .eq("account_number", account_number) \
+            .limit(1) \
+            .execute()
+
+        if result.data and result.data[0] and result.data[0]["last_executed_at"]:
+            return datetime.fromisoformat(result.data[0]["last_executed_at"])
+        return None
+
+    async def save_sync_cursor(self, account_number: str, last_executed_at: datetime) -> None:
+        """Persist the sync watermark for an account."""
+        await self.postgrest.from_(SYNC_CURSOR_TABLE).upsert(
+            {
+                "account_number": account_number,
+                "last_executed_at": last_executed_at.isoformat(),
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+            },
+            on_conflict="account_number",
+            returning=ReturnMethod.minimal,
+        ).execute()
+
+    async def hold_sync_cursor(self, account_number: str, failed: List[Dict[str, Any]]) -> None:
+        """Move the watermark to just before the oldest row that could not be written.
+
+        The next incremental sync then re-fetches it. Undated failures cannot
+        be placed in the history, so the existing cursor is left as it is.
+        """
+        if any(row["executed_at"] is None for row in failed):
+            return
+        oldest = min(datetime.fromisoformat(row["executed_at"]) for row in failed)
+        await self.save_sync_cursor(account_number, oldest - timedelta(microseconds=1))
+
+    async def iter_history_pages(
+        self, account: Account, start_date: Optional[date]
+    ) -> AsyncIterator[List[Any]]:
+        """Yield transaction history one page at a time, oldest first."""
+        page_offset = 0
+        while True:
+            await self.rate_limiter.acquire()
+            page = await account.a_get_history(
+                self.session,
+                per_page=HISTORY_PAGE_SIZE,
+                page_offset=page_offset,
+                sort="Asc",
+                start_date=start_date,
+            )
+            if page:
+                yield page
+            if len(page) < HISTORY_PAGE_SIZE:
+                return
+            page_offset += 1
+
+    async def sync_account(self, account: Account, progress: Progress) -> int:
+        """Synchronize one account's transactions. Returns rows written."""
+        label = account.account_number
+        task = progress.add_task(f"{label}: waiting...", total=None)
+        try:
+            async with self.semaphore:
+                start_date: Optional[date] = None
+                if self.incremental:
+                    watermark = await self.get_sync_cursor(account.account_number) \
+                        or await self.get_last_sync_time(account.account_number)
+                    if watermark:
+                        # Re-read a short overlap window; conflicts on transaction_id are ignored.
+                        start_date = watermark.date() - timedelta(days=INCREMENTAL_LOOKBACK_DAYS)
+
+                fetched = 0
+                inserted = 0
+                # Set once a row could not be written; the cursor then stays behind it.
+                stalled = False
+                progress.update(task, description=f"{label}: fetching transactions...")
+                async for page in self.iter_history_pages(account, start_date):
+                    fetched += len(page)
+                    rows = [self.transaction_row(account.account_number, t) for t in page]
+                    failed: List[Dict[str, Any]] = []
+                    for start in range(0, len(rows), self.batch_size):
+                        inserted += await self.insert_batch(rows[start:start + self.batch_size], failed)
+                    if failed and not stalled:
+                        stalled = True
+                        await self.hold_sync_cursor(account.account_number, failed)
+                    elif not stalled:
+                        # Pages arrive oldest first, so the cursor only moves forward.
+                        executed = [t.executed_at for t in page if t.executed_at]
+                        if executed:
+                            await self.save_sync_cursor(account.account_number, max(executed))
+                    progress.update(
+                        task,
+                        description=f"{label}: fetched {fetched} transactions, wrote {inserted}...",
+                    )
+        except Exception:
+            progress.update(task, description=f"{label}: [red]failed[/red]", total=1, completed=1)
+            raise
+        progress.update(
+            task,
+            description=f"{label}: fetched {fetched} transactions, wrote {inserted}",
+            total=1,
+            completed=1,
+        )
+        return inserted
+
     async def sync_transactions(self) -> None:
-        """Synchronize transactions from Tastytrade to Supabase."""
+        """Synchronize transactions for all accounts from Tastytrade to Supabase."""
         if not self.session or not self.postgrest:
             console.print("[red]Error:[/red] Not connected to services.")
             return
 
         # Fetch accounts using the correct async method
+        await self.rate_limiter.acquire()
         accounts = await Account.a_get(self.session)
+        console.print(f"Syncing {len(accounts)} accounts (concurrency {self.max_concurrency})...")
+
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            console=console,
+        ) as progress:
+            results = await asyncio.gather(
+                *(self.sync_account(account, progress) for account in accounts),
+                return_exceptions=True,
+            )
+
+        # A failing account never cancels the others; report each outcome.
+        failures = 0
+        for account, result in zip(accounts, results):
+            if isinstance(result, BaseException):
+                failures += 1
+                console.print(f"[red]Error syncing account {account.account_number}:[/red] {str(result)}")
+        console.print(f"Sync completed: {len(accounts) - failures} succeeded, {failures} failed.")
 
-        for account in accounts:
-            console.print(f"\nSyncing transactions for account {account.account_number}...")
-
-            # Get last sync time
-            last_sync = await self.get_last_sync_time(account.account_number)
-            if last_sync:
-                console.print(f"Last sync: {last_sync.isoformat()}")
-
-            # Fetch transactions using the correct async method
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                transient=True,
-            ) as progress:
-                task = progress.add_task("Fetching transactions...", total=None)
-                transactions = await account.a_get_history(self.session)
-                # No last_sync filter; rely on deduplication
-                progress.update(task, completed=True)
-
-            if not transactions:
-                console.print("No new transactions found.")
-                continue
-
-            console.print(f"Found {len(transactions)} new transactions.")
-            if transactions:
-                first_txn = transactions[0]
-                print("Sample transaction attributes:", dir(first_txn))
-                print("Sample transaction as dict:", getattr(first_txn, '__dict__', str(first_txn)))
-
-            # 1. Get the latest executed_at date for this account
-            result = await self.postgrest.from_("transactions") \
-                .select("executed_at") \
-                .eq("account_number", account.account_number) \
-                .order("executed_at", desc=True) \
-                .limit(1) \
-                .execute()
-            if result.data and result.data[0]:
-                latest_date = datetime.fromisoformat(result.data[0]["executed_at"]).date()
-                # 2. Set window: from (latest_date - 5 days) to today
-                start_date = latest_date - timedelta(days=5)
-                end_date = date.today()
-                # 3. Filter Tastytrade transactions in that window
-                recent_trades = [
-                    t for t in transactions
-                    if t.executed_at and start_date <= t.executed_at.date() <= end_date
-                ]
-                # 4. Fetch all transaction_ids from the DB in that window
-                db_result = await self.postgrest.from_("transactions") \
-                    .select("transaction_id") \
-                    .eq("account_number", account.account_number) \
-                    .gte("executed_at", start_date.isoformat()) \
-                    .lte("executed_at", end_date.isoformat()) \
-                    .execute()
-                existing_ids = set(str(row["transaction_id"]) for row in (db_result.data or []))
-            else:
-                # First sync: consider all transactions
-                recent_trades = transactions
-                existing_ids = set()
-
-            # 5. Insert only trades whose transaction_id is not already present
-            truly_new = [t for t in recent_trades if str(t.id) not in existing_ids]
-
-            if not truly_new:
-                console.print("No new transactions to insert.")
-                continue
-
-            console.print(f"Inserting {len(truly_new)} new transactions...")
-
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                transient=True,
-            ) as progress:
-                task = progress.add_task("Inserting transactions...", total=len(truly_new))
-                for transaction in truly_new:
-                    try:
-                        await self.postgrest.from_("transactions").insert({
-                            "account_number": account.account_number,
-                            "transaction_id": transaction.id,
-                            "transaction_type": getattr(transaction, "transaction_type", None),
-                            "transaction_subtype": getattr(transaction, "transaction_sub_type", None),
-                            "symbol": transaction.symbol,
-                            "instrument_type": transaction.instrument_type,
-                            "underlying_symbol": transaction.underlying_symbol,
-                            "action": transaction.action,
-                            "value": str(transaction.value) if transaction.value else None,
-                            "price": str(transaction.price) if transaction.price else None,
-                            "quantity": str(transaction.quantity) if transaction.quantity else None,
-                            "commission": str(transaction.commission) if hasattr(transaction, "commission") and transaction.commission else None,
-                            "regulatory_fees": str(transaction.regulatory_fees) if hasattr(transaction, "regulatory_fees") and transaction.regulatory_fees else None,
-                            "clearing_fees": str(transaction.clearing_fees) if hasattr(transaction, "clearing_fees") and transaction.clearing_fees else None,
-                            "proprietary_index_option_fees": str(transaction.proprietary_index_option_fees) if hasattr(transaction, "proprietary_index_option_fees") and transaction.proprietary_index_option_fees else None,
-                            "other_charge": str(transaction.other_charge) if hasattr(transaction, "other_charge") and transaction.other_charge else None,
-                            "multiplier": transaction.multiplier if hasattr(transaction, "multiplier") else None,
-                            "executed_at": transaction.executed_at.isoformat() if transaction.executed_at else None,
-                            "description": transaction.description
-                        }).execute()
-                        progress.advance(task)
-                    except Exception as e:
-                        console.print(f"[red]Error inserting transaction {transaction.id}:[/red] {str(e)}")
-                        continue
-            console.print("Sync completed.")
+def parse_args() -> argparse.Namespace:
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description="Sync Tastytrade transactions to Supabase.")
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"rows per insert request (default: {DEFAULT_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="ignore the sync cursor and re-fetch the full account history",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"accounts synced in parallel (default: {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=DEFAULT_REQUESTS_PER_SECOND,
+        help=f"max Tastytrade requests per second (default: {DEFAULT_REQUESTS_PER_SECOND})",
+    )
+    return parser.parse_args()
 
 async def main() -> None:
     """Main entry point."""
-    sync = TransactionSync()
+    args = parse_args()
+    sync = TransactionSync(
+        batch_size=args.batch_size,
+        incremental=not args.full,
+        max_concurrency=args.concurrency,
+        requests_per_second=args.rate_limit,
+    )
     try:
         await sync.connect()
         await sync.sync_transactions()
@@ -188,5 +357,4 @@ async def main() -> None:
         sys.exit(1)
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main())